@@ -8,3 +8,21 @@ class BlogConfig(AppConfig):
     default_auto_field = "django.db.models.BigAutoField"
     name = "blog"
     verbose_name = "Блог"
+
+    def ready(self):
+        """Подключение сигналов, настроек соединений и триггеров поиска."""
+        from django.core.signals import request_started
+        from django.db.backends.signals import connection_created
+        from django.db.models.signals import post_migrate
+
+        from . import signals  # noqa: F401
+        from .connections import check_connections
+        from .fts import ensure_triggers
+        from .sqlite import configure_connection
+
+        connection_created.connect(configure_connection,
+                                   dispatch_uid='blog_sqlite_pragmas')
+        request_started.connect(check_connections,
+                                dispatch_uid='blog_connection_health')
+        post_migrate.connect(ensure_triggers, sender=self,
+                             dispatch_uid='blog_fts_triggers')
@@ -0,0 +1,116 @@
+"""Замеры времени ответа маршрутов blog и pages."""
+import time
+from datetime import timedelta
+
+from django.conf import settings
+from django.test import Client
+from django.urls import URLPattern, reverse
+from django.utils import timezone
+
+from blog import urls as blog_urls
+from pages import urls as pages_urls
+
+from .budgets import query_budget
+from .models import Category, Comment, Post, User
+from .perf import collect
+
+
+def percentile(values, percent):
+    """Перцентиль методом ближайшего ранга."""
+    if not values:
+        return None
+    ordered = sorted(values)
+    rank = max(1, -(-len(ordered) * percent // 100))
+    return ordered[int(rank) - 1]
+
+
+def sample_objects():
+    """Объекты, на которые ссылаются маршруты с параметрами.
+
+    Пользователь бенчмарка сам пишет пост и комментарий, чтобы
+    страницы редактирования и удаления отвечали 200, а не 302/403.
+    Вызывать внутри транзакции, которая откатывается (см. manage.py
+    bench), иначе объекты останутся в базе.
+    """
+    category = Category.objects.filter(is_published=True).first()
+    if category is None:
+        category = Category.objects.create(
+            title='Бенчмарк', description='Бенчмарк', slug='bench')
+    user, _ = User.objects.get_or_create(username='bench_user')
+    post = Post.objects.create(
+        title='Бенчмарк', text='Текст публикации бенчмарка.',
+        pub_date=timezone.now() - timedelta(days=1),
+        author=user, category=category)
+    comment = Comment.objects.create(post=post, author=user,
+                                     text='Комментарий бенчмарка.')
+    return user, {
+        'pk': post.pk,
+        'category_slug': category.slug,
+        'username': user.username,
+        'comment_pk': comment.pk,
+    }
+
+
+def make_client():
+    """Client с токеном METRICS_TOKEN, если он задан.
+
+    Без токена /metrics/ отвечает 404 и замер его не показателен.
+    """
+    token = getattr(settings, 'METRICS_TOKEN', None)
+    if not token:
+        return Client()
+    return Client(HTTP_AUTHORIZATION=f'Bearer {token}')
+
+
+def routes(kwargs_source):
+    """Имена и адреса всех маршрутов blog и pages."""
+    result = []
+    for module in (blog_urls, pages_urls):
+        for pattern in module.urlpatterns:
+            if not isinstance(pattern, URLPattern):
+                continue
+            name = f'{module.app_name}:{pattern.name}'
+            kwargs = {key: kwargs_source[key]
+                      for key in pattern.pattern.converters}
+            result.append((name, reverse(name, kwargs=kwargs)))
+    return result
+
+
+def measure(client, url, repeat, before_request=None):
+    """Статистика repeat GET-запросов к url."""
+    samples = []
+    for _ in range(repeat):
+        if before_request is not None:
+            before_request()
+        with collect() as timings:
+            started = time.perf_counter()
+            response = client.get(url)
+            elapsed = time.perf_counter() - started
+        samples.append((elapsed, timings, response.status_code))
+    latencies = [sample[0] * 1000 for sample in samples]
+    return {
+        'status': samples[-1][2],
+        'p50_ms': percentile(latencies, 50),
+        'p95_ms': percentile(latencies, 95),
+        'p99_ms': percentile(latencies, 99),
+        'queries': percentile([sample[1].queries for sample in samples], 50),
+        'sql_ms': sum(sample[1].sql for sample in samples)
+        * 1000 / len(samples),
+        'template_ms': sum(sample[1].template for sample in samples)
+        * 1000 / len(samples),
+    }
+
+
+def run(repeat, user, kwargs_source, before_request=None):
+    """Замер всех маршрутов анонимно и от имени пользователя."""
+    anonymous = make_client()
+    authenticated = make_client()
+    authenticated.force_login(user)
+    results = []
+    for name, url in routes(kwargs_source):
+        for client_name, client in (('anonymous', anonymous),
+                                    ('authenticated', authenticated)):
+            result = measure(client, url, repeat, before_request)
+            results.append(dict(route=name, url=url, client=client_name,
+                                budget=query_budget(name), **result))
+    return results
@@ -0,0 +1,31 @@
+"""Бюджеты SQL-запросов маршрутов blog и pages.
+
+Бюджет — наибольшее число запросов на GET с холодным кешем от имени
+автора публикации, включая чтение сессии и пользователя. Число не
+должно зависеть от объёма данных: это проверяют
+tests/test_query_budgets.py и колонка «бюджет» в manage.py bench.
+Новый маршрут без бюджета роняет тесты.
+"""
+QUERY_BUDGETS = {
+    'blog:index': 4,
+    'blog:search': 4,
+    'blog:metrics': 0,
+    'blog:post_detail': 4,
+    'blog:category_posts': 5,
+    'blog:profile': 5,
+    'blog:edit_profile': 2,
+    'blog:create_post': 3,
+    'blog:edit_post': 4,
+    'blog:delete_post': 3,
+    'blog:post_comments': 4,
+    'blog:add_comment': 3,
+    'blog:edit_comment': 3,
+    'blog:delete_comment': 3,
+    'pages:about': 2,
+    'pages:rules': 2,
+}
+
+
+def query_budget(view_name):
+    """Бюджет маршрута или None, если он не задан."""
+    return QUERY_BUDGETS.get(view_name)
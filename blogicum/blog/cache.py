@@ -0,0 +1,149 @@
+"""Кеш страниц и карточек с инвалидацией по версиям тегов."""
+import hashlib
+import time
+
+from django.conf import settings
+from django.core.cache import cache
+from django.db import transaction
+from django.template.loader import render_to_string
+
+from .perf import record_cache
+
+TAG_PREFIX = 'blog:tag:'
+PAGE_PREFIX = 'blog:page:'
+CARD_PREFIX = 'blog:card:'
+
+INDEX_TAG = 'feed:index'
+
+
+def category_tag(slug):
+    """Тег ленты категории."""
+    return f'feed:category:{slug}'
+
+
+def author_tag(username):
+    """Тег ленты профиля."""
+    return f'feed:author:{username}'
+
+
+def post_tag(pk):
+    """Тег страницы публикации."""
+    return f'post:{pk}'
+
+
+def card_tag(kind, pk):
+    """Тег карточек, зависящих от объекта kind с ключом pk."""
+    return f'card:{kind}:{pk}'
+
+
+def card_tags(post):
+    """Теги карточки: сама публикация, её категория, место и автор."""
+    return [card_tag('post', post.pk),
+            card_tag('category', post.category_id),
+            card_tag('location', post.location_id),
+            card_tag('author', post.author_id)]
+
+
+def page_tags(resolver_match):
+    """Теги кешируемой страницы или None, если страница не кешируется.
+
+    Теги зависят только от URL, чтобы ключ можно было посчитать
+    без обращения к базе. Изменение категории сбрасывает её ленту,
+    главную и страницы её публикаций, изменение места — главную;
+    остальные страницы с их названием обновляются
+    за PAGE_CACHE_TIMEOUT.
+    """
+    kwargs = resolver_match.kwargs
+    tags = {
+        'blog:index': lambda: [INDEX_TAG],
+        'blog:category_posts': lambda: [
+            category_tag(kwargs['category_slug'])],
+        'blog:profile': lambda: [author_tag(kwargs['username'])],
+        'blog:post_detail': lambda: [post_tag(kwargs['pk'])],
+    }.get(resolver_match.view_name)
+    if tags is None:
+        return None
+    return tags()
+
+
+def tag_versions(tags):
+    """Текущие версии тегов.
+
+    Отсутствующая версия создаётся из текущего времени, а не с нуля,
+    чтобы после вытеснения ключа не ожила старая копия страницы.
+    """
+    keys = [TAG_PREFIX + tag for tag in tags]
+    versions = cache.get_many(keys)
+    missing = [key for key in keys if key not in versions]
+    if missing:
+        initial = time.time_ns()
+        for key in missing:
+            cache.add(key, initial, timeout=None)
+        versions.update(cache.get_many(missing))
+    return [versions.get(key, 0) for key in keys]
+
+
+def bump(*tags, using=None):
+    """Инвалидация всех страниц, зависящих от тегов.
+
+    Версии меняются сразу и ещё раз после фиксации транзакции:
+    параллельный читатель мог успеть закешировать незафиксированное
+    состояние под новой версией, и второй сброс делает такую копию
+    недоступной. Вне транзакции второй сброс выполняется сразу же.
+    """
+    tags = set(tags)
+    bump_now(tags)
+    if transaction.get_connection(using).in_atomic_block:
+        transaction.on_commit(lambda: bump_now(tags), using=using)
+
+
+def bump_now(tags):
+    """Немедленная смена версий тегов."""
+    for tag in tags:
+        key = TAG_PREFIX + tag
+        try:
+            cache.incr(key)
+        except ValueError:
+            cache.set(key, time.time_ns(), timeout=None)
+
+
+def page_key(request, tags):
+    """Ключ страницы по полному пути и версиям тегов."""
+    versions = ':'.join(map(str, tag_versions(tags)))
+    raw = f'{request.get_full_path()}|{versions}'
+    return PAGE_PREFIX + hashlib.md5(raw.encode()).hexdigest()
+
+
+def page_timeout():
+    """Время жизни страницы в кеше."""
+    return getattr(settings, 'PAGE_CACHE_TIMEOUT', 30)
+
+
+def render_post_cards(posts):
+    """HTML карточек includes/post_card.html, по возможности из кеша.
+
+    Версии тегов всех карточек и сами карточки читаются двумя
+    запросами к кешу на страницу, поэтому одна и та же карточка
+    переиспользуется лентами главной, категории и профиля.
+    """
+    posts = list(posts)
+    tags = [card_tags(post) for post in posts]
+    unique = list({tag: None for post_tags in tags for tag in post_tags})
+    versions = dict(zip(unique, tag_versions(unique)))
+    keys = []
+    for post, post_tags in zip(posts, tags):
+        raw = ':'.join(str(versions[tag]) for tag in post_tags)
+        keys.append(f'{CARD_PREFIX}{post.pk}:'
+                    + hashlib.md5(raw.encode()).hexdigest())
+    cards = cache.get_many(keys)
+    record_cache(hits=len(cards), misses=len(keys) - len(cards))
+    rendered = {}
+    for post, key in zip(posts, keys):
+        if key not in cards:
+            rendered[key] = render_to_string('includes/post_card.html',
+                                             {'post': post})
+    if rendered:
+        cache.set_many(rendered,
+                       getattr(settings, 'POST_CARD_CACHE_TIMEOUT', 3600))
+        cards.update(rendered)
+    return [cards[key] for key in keys]
@@ -0,0 +1,30 @@
+"""Проверка постоянных соединений с базой перед запросом.
+
+В Django 3.2 нет CONN_HEALTH_CHECKS (он появился в 4.1): если сервер
+закрыл постоянное соединение между запросами, ошибка всплывает
+в первом же запросе пользователя. check_connections() выполняется
+на request_started и закрывает такие соединения у баз, для которых
+в DATABASES указан CONN_HEALTH_CHECKS; Django откроет новое при
+первом обращении.
+"""
+from django.db import connections
+
+
+def close_unusable(connection):
+    """Закрытие соединения, не прошедшего проверку.
+
+    Возвращает True, если соединение было закрыто.
+    """
+    if (connection.connection is None
+            or not connection.settings_dict.get('CONN_HEALTH_CHECKS')
+            or connection.in_atomic_block
+            or connection.is_usable()):
+        return False
+    connection.close()
+    return True
+
+
+def check_connections(**kwargs):
+    """Проверка всех открытых соединений."""
+    for connection in connections.all():
+        close_unusable(connection)
@@ -0,0 +1,73 @@
+"""Число записей в лентах без COUNT(*) по всей таблице.
+
+Счётчик берётся из кеша под версиями тех же тегов, что и страница
+ленты, поэтому сбрасывается теми же сигналами. На промахе
+считается не больше COUNT_ESTIMATE_LIMIT записей: для больших
+лент показывается «более N». Точный COUNT(*) выполняется, только
+если его запросили явно.
+"""
+import hashlib
+
+from django.conf import settings
+from django.core.cache import cache
+
+from .cache import tag_versions
+from .perf import record_cache
+
+COUNT_PREFIX = 'blog:count:'
+
+
+class FeedCount(int):
+    """Число записей; exact=False означает «не меньше value»."""
+
+    def __new__(cls, value, exact=True):
+        """Значение и признак точности."""
+        count = super().__new__(cls, value)
+        count.exact = exact
+        return count
+
+    def __reduce__(self):
+        """Сериализация для кеша вместе с признаком точности."""
+        return FeedCount, (int(self), self.exact)
+
+    def __str__(self):
+        """Вывод в шаблоне."""
+        return str(int(self)) if self.exact else f'более {int(self)}'
+
+
+def estimate_limit():
+    """Сколько записей считать до перехода к оценке."""
+    return getattr(settings, 'COUNT_ESTIMATE_LIMIT', 10000)
+
+
+def count_key(queryset, tags):
+    """Ключ счётчика по запросу ленты и версиям её тегов."""
+    query = queryset.order_by().values('pk').query
+    sql, params = query.sql_with_params()
+    versions = ':'.join(map(str, tag_versions(tags)))
+    raw = f'{sql}|{params}|{versions}'
+    return COUNT_PREFIX + hashlib.md5(raw.encode()).hexdigest()
+
+
+def feed_count(queryset, tags, exact=False):
+    """Число записей queryset, по возможности из кеша.
+
+    Точное значение в кеше подходит и для обычного запроса,
+    оценка для exact=True — нет.
+    """
+    key = count_key(queryset, tags)
+    count = cache.get(key)
+    if count is not None and (count.exact or not exact):
+        record_cache(hits=1)
+        return count
+    record_cache(misses=1)
+    queryset = queryset.order_by()
+    if exact:
+        count = FeedCount(queryset.count())
+    else:
+        limit = estimate_limit()
+        value = queryset[:limit + 1].count()
+        count = (FeedCount(value) if value <= limit
+                 else FeedCount(limit, exact=False))
+    cache.set(key, count, getattr(settings, 'COUNT_CACHE_TIMEOUT', 60))
+    return count
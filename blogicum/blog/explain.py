@@ -0,0 +1,93 @@
+"""Горячие запросы лент и их планы выполнения.
+
+Снимок планов хранится в tests/snapshots/query_plans.json:
+tests/test_query_plans.py сравнивает с ним текущие планы и падает
+на полном просмотре таблицы и сортировке во временном B-дереве.
+Снимок обновляется запуском pytest --update-query-plans.
+"""
+import re
+from datetime import timedelta
+
+from django.utils import timezone
+
+from . import scheduler
+from .models import Category, Comment, FeedEntry, Post, rounded_now
+from .paginators import NEXT, CursorPaginator
+from .views import NUM_COMMENTS_ON_PAGE, NUM_POST_ON_PAGE
+
+# Полный просмотр таблицы, в том числе с суффиксом вроде LEFT-JOIN;
+# просмотр по индексу («SCAN t USING [COVERING] INDEX») допустим.
+FULL_SCAN = re.compile(
+    r'^SCAN (?!CONSTANT ROW)\S+(?!\S)(?! USING (COVERING )?INDEX)')
+# Индекс, который SQLite строит на время запроса.
+AUTOMATIC_INDEX = 'AUTOMATIC'
+
+OLD_TABLE_PREFIX = re.compile(r'^(SCAN|SEARCH) TABLE ')
+TEMP_SORT = 'USE TEMP B-TREE FOR'
+
+
+def hot_querysets():
+    """Запросы каждой страницы ленты и каждого тика планировщика.
+
+    Возвращает словарь «имя → queryset» в том виде, в котором
+    их строят представления, включая сортировку и LIMIT страницы.
+    """
+    category = Category.objects.filter(is_published=True).first()
+    post = Post.objects.order_by('-comment_count').first()
+    visible = CursorPaginator(FeedEntry.objects.visible(), NUM_POST_ON_PAGE)
+    deep_cursor = (NEXT, rounded_now() - timedelta(days=1000), 0)
+    category_feed = CursorPaginator(
+        FeedEntry.objects.visible().filter(category=category),
+        NUM_POST_ON_PAGE)
+    profile_feed = CursorPaginator(Post.objects.for_cards().filter(
+        author_id=post.author_id if post else 0), NUM_POST_ON_PAGE)
+    comment_list = CursorPaginator(
+        Comment.objects.select_related('author').filter(post=post),
+        NUM_COMMENTS_ON_PAGE, 'created_at')
+    limit = NUM_POST_ON_PAGE + 1
+    now = timezone.now()
+    return {
+        'index_feed': visible.get_queryset()[:limit],
+        'index_feed_deep': visible.get_queryset(deep_cursor)[:limit],
+        'category_lookup': Category.objects.filter(
+            slug=category.slug if category else '', is_published=True),
+        'category_feed': category_feed.get_queryset()[:limit],
+        'profile_feed': profile_feed.get_queryset()[:limit],
+        'comment_list': comment_list.get_queryset()[
+            :NUM_COMMENTS_ON_PAGE + 1],
+        'scheduler_due': scheduler.due_posts(now, now - scheduler.OVERLAP),
+        'scheduler_next': scheduler.scheduled_posts(now)[:1],
+    }
+
+
+def query_plan(queryset):
+    """Строки EXPLAIN QUERY PLAN без служебных идентификаторов.
+
+    «SCAN TABLE» и «SEARCH TABLE» старых версий SQLite приводятся
+    к виду 3.36+, чтобы снимок не зависел от версии.
+    """
+    plan = []
+    for line in queryset.explain().splitlines():
+        parts = line.split(' ', 3)
+        line = parts[3] if len(parts) == 4 else line
+        plan.append(OLD_TABLE_PREFIX.sub(r'\1 ', line))
+    return plan
+
+
+def plan_problems(plan):
+    """Строки плана с полным просмотром, временным индексом или сортировкой.
+
+    Сортировка во временном B-дереве означает, что ORDER BY не
+    покрыт индексом, и страница ленты читает все подходящие строки.
+    Автоматический индекс SQLite строит на каждый запрос, просматривая
+    всю таблицу.
+    """
+    return [line for line in plan
+            if FULL_SCAN.match(line) or AUTOMATIC_INDEX in line or (
+                TEMP_SORT in line and 'ORDER BY' in line)]
+
+
+def plan_snapshot():
+    """Планы всех горячих запросов: имя → строки плана."""
+    return {name: query_plan(queryset)
+            for name, queryset in hot_querysets().items()}
@@ -0,0 +1,123 @@
+"""Поддержка таблицы ленты FeedEntry.
+
+В таблице только уже наступившие публикации; отложенные добавляет
+blog.scheduler.
+
+Записи меняются точечно из сигналов (см. blog.signals): сохранение
+поста обновляет одну строку, снятие категории с публикации удаляет
+все её строки одним запросом, а возврат — вставляет их через
+INSERT ... SELECT. Массовые изменения в обход сигналов
+(QuerySet.update(), bulk_create) требуют manage.py rebuild_feed;
+после фикстур ленту пересобирает сама команда loaddata.
+"""
+from django.db import connection, transaction
+from django.utils import timezone
+
+from .models import FeedEntry, Post
+
+FILL_SQL = '''
+    INSERT INTO blog_feedentry (
+        post_id, pub_date, title, excerpt, image, image_renditions,
+        comment_count, category_id, category_title, category_slug,
+        location_id, location_name, author_id, author_username)
+    SELECT
+        post.id, post.pub_date, post.title, post.excerpt, post.image,
+        post.image_renditions, post.comment_count, category.id,
+        category.title, category.slug, location.id,
+        CASE WHEN location.is_published THEN location.name ELSE '' END,
+        author.id, author.username
+    FROM blog_post AS post
+    INNER JOIN blog_category AS category ON category.id = post.category_id
+    LEFT OUTER JOIN blog_location AS location
+        ON location.id = post.location_id
+    INNER JOIN auth_user AS author ON author.id = post.author_id
+    WHERE post.is_published AND category.is_published
+'''
+
+
+def fill(where='', params=(), now=None):
+    """Вставка строк для опубликованных постов, подходящих под where.
+
+    where — дополнительное условие SQL над post, category
+    и location; строки для этих постов должны отсутствовать.
+    Посты с датой публикации позже now пропускаются: их добавит
+    blog.scheduler.activate_due().
+    """
+    sql = FILL_SQL + ' AND post.pub_date < %s'
+    with connection.cursor() as cursor:
+        cursor.execute(sql + (f' AND ({where})' if where else ''),
+                       [now or timezone.now(), *params])
+        return cursor.rowcount
+
+
+def rebuild():
+    """Полное пересоздание ленты."""
+    with transaction.atomic():
+        FeedEntry.objects.all().delete()
+        return fill()
+
+
+def entry_fields(post):
+    """Поля строки ленты для поста с загруженными связями."""
+    location = post.location
+    return {
+        'pub_date': post.pub_date,
+        'title': post.title,
+        'excerpt': post.excerpt,
+        'image': post.image.name,
+        'image_renditions': post.image_renditions,
+        'comment_count': post.comment_count,
+        'category_id': post.category_id,
+        'category_title': post.category.title,
+        'category_slug': post.category.slug,
+        'location_id': post.location_id,
+        'location_name': (location.name if location is not None
+                          and location.is_published else ''),
+        'author_id': post.author_id,
+        'author_username': post.author.username,
+    }
+
+
+def sync_post(pk):
+    """Строка ленты поста по его текущему состоянию в базе."""
+    post = Post.objects.with_relations().filter(
+        pk=pk, is_published=True, category__is_published=True,
+        pub_date__lt=timezone.now()).first()
+    if post is None:
+        FeedEntry.objects.filter(post_id=pk).delete()
+        return
+    FeedEntry.objects.update_or_create(post_id=pk,
+                                       defaults=entry_fields(post))
+
+
+def sync_category(category, old=None):
+    """Строки ленты после изменения категории.
+
+    old — значения полей до сохранения или None для новой
+    категории.
+    """
+    was_published = old is not None and old['is_published']
+    if not category.is_published:
+        if was_published:
+            FeedEntry.objects.filter(category_id=category.pk).delete()
+        return
+    if not was_published:
+        if old is not None:
+            fill('category.id = %s', [category.pk])
+        return
+    if (old['title'], old['slug']) != (category.title, category.slug):
+        FeedEntry.objects.filter(category_id=category.pk).update(
+            category_title=category.title, category_slug=category.slug)
+
+
+def sync_location(location):
+    """Название места в строках ленты."""
+    FeedEntry.objects.filter(location_id=location.pk).update(
+        location_name=location.name if location.is_published else '')
+
+
+def sync_author(user):
+    """Имя автора в строках ленты."""
+    FeedEntry.objects.filter(author_id=user.pk).exclude(
+        author_username=user.username).update(
+        author_username=user.username)
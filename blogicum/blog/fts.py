@@ -0,0 +1,102 @@
+"""Таблицы FTS5 для поиска и триггеры, которые их обновляют.
+
+Перестройка таблицы при миграции SQLite (AddField, AlterField)
+удаляет триггеры blog_post и blog_comment, поэтому они заново
+создаются после каждого migrate (см. BlogConfig.ready).
+"""
+# ё приводится к е и в индексе, и в запросе (см. blog.search),
+# остальное — регистр и диакритику — снимает токенизатор unicode61.
+TOKENIZE = "tokenize = 'unicode61 remove_diacritics 2'"
+
+TABLES = ('blog_post_fts', 'blog_comment_fts')
+
+
+def norm(column):
+    """SQL-выражение колонки с ё, заменённой на е."""
+    return f"replace(replace({column}, 'ё', 'е'), 'Ё', 'Е')"
+
+
+CREATE_TABLES = [
+    f"CREATE VIRTUAL TABLE blog_post_fts USING fts5("
+    f"title, text, content = '', {TOKENIZE})",
+    f"CREATE VIRTUAL TABLE blog_comment_fts USING fts5("
+    f"text, content = '', {TOKENIZE})",
+]
+
+CREATE_TRIGGERS = [
+    f"""CREATE TRIGGER IF NOT EXISTS blog_post_fts_insert
+        AFTER INSERT ON blog_post BEGIN
+        INSERT INTO blog_post_fts (rowid, title, text)
+        VALUES (new.id, {norm('new.title')}, {norm('new.text')});
+    END""",
+    f"""CREATE TRIGGER IF NOT EXISTS blog_post_fts_delete
+        AFTER DELETE ON blog_post BEGIN
+        INSERT INTO blog_post_fts (blog_post_fts, rowid, title, text)
+        VALUES ('delete', old.id, {norm('old.title')}, {norm('old.text')});
+    END""",
+    f"""CREATE TRIGGER IF NOT EXISTS blog_post_fts_update
+        AFTER UPDATE OF title, text ON blog_post
+        WHEN old.title IS NOT new.title OR old.text IS NOT new.text BEGIN
+        INSERT INTO blog_post_fts (blog_post_fts, rowid, title, text)
+        VALUES ('delete', old.id, {norm('old.title')}, {norm('old.text')});
+        INSERT INTO blog_post_fts (rowid, title, text)
+        VALUES (new.id, {norm('new.title')}, {norm('new.text')});
+    END""",
+    f"""CREATE TRIGGER IF NOT EXISTS blog_comment_fts_insert
+        AFTER INSERT ON blog_comment BEGIN
+        INSERT INTO blog_comment_fts (rowid, text)
+        VALUES (new.id, {norm('new.text')});
+    END""",
+    f"""CREATE TRIGGER IF NOT EXISTS blog_comment_fts_delete
+        AFTER DELETE ON blog_comment BEGIN
+        INSERT INTO blog_comment_fts (blog_comment_fts, rowid, text)
+        VALUES ('delete', old.id, {norm('old.text')});
+    END""",
+    f"""CREATE TRIGGER IF NOT EXISTS blog_comment_fts_update
+        AFTER UPDATE OF text ON blog_comment
+        WHEN old.text IS NOT new.text BEGIN
+        INSERT INTO blog_comment_fts (blog_comment_fts, rowid, text)
+        VALUES ('delete', old.id, {norm('old.text')});
+        INSERT INTO blog_comment_fts (rowid, text)
+        VALUES (new.id, {norm('new.text')});
+    END""",
+]
+
+FILL_TABLES = [
+    f"""INSERT INTO blog_post_fts (rowid, title, text)
+        SELECT id, {norm('title')}, {norm('text')} FROM blog_post""",
+    f"""INSERT INTO blog_comment_fts (rowid, text)
+        SELECT id, {norm('text')} FROM blog_comment""",
+]
+
+DROP = [
+    "DROP TRIGGER IF EXISTS blog_post_fts_insert",
+    "DROP TRIGGER IF EXISTS blog_post_fts_delete",
+    "DROP TRIGGER IF EXISTS blog_post_fts_update",
+    "DROP TRIGGER IF EXISTS blog_comment_fts_insert",
+    "DROP TRIGGER IF EXISTS blog_comment_fts_delete",
+    "DROP TRIGGER IF EXISTS blog_comment_fts_update",
+    "DROP TABLE IF EXISTS blog_post_fts",
+    "DROP TABLE IF EXISTS blog_comment_fts",
+]
+
+
+def fts_enabled(connection):
+    """Созданы ли в базе таблицы поиска."""
+    if connection.vendor != 'sqlite':
+        return False
+    with connection.cursor() as cursor:
+        tables = connection.introspection.table_names(cursor)
+    return all(table in tables for table in TABLES)
+
+
+def ensure_triggers(sender, using='default', **kwargs):
+    """Обработчик post_migrate: недостающие триггеры создаются заново."""
+    from django.db import connections
+
+    connection = connections[using]
+    if not fts_enabled(connection):
+        return
+    with connection.cursor() as cursor:
+        for statement in CREATE_TRIGGERS:
+            cursor.execute(statement)
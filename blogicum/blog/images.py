@@ -0,0 +1,68 @@
+"""Уменьшенные копии изображений публикаций."""
+import posixpath
+from io import BytesIO
+
+from django.conf import settings
+from django.core.files.base import ContentFile
+from PIL import Image, ImageOps, UnidentifiedImageError
+
+RENDITIONS_DIR = 'posts_images/renditions'
+JPEG_QUALITY = 82
+CARD_IMAGE_WIDTH = 640
+
+
+def rendition_widths():
+    """Ширины уменьшенных копий из настроек."""
+    return sorted(getattr(settings, 'POST_IMAGE_WIDTHS', (320, 640, 1280)))
+
+
+def make_renditions(field_file):
+    """Создание копий фиксированной ширины для загруженного изображения.
+
+    Ориентация исправляется по EXIF, метаданные не сохраняются.
+    Возвращает описание для Post.image_renditions или пустой
+    словарь, если файл не удалось прочитать как изображение.
+    """
+    try:
+        field_file.open('rb')
+        with Image.open(field_file) as source:
+            image = ImageOps.exif_transpose(source)
+            image.load()
+    except (OSError, UnidentifiedImageError, ValueError):
+        return {}
+    finally:
+        field_file.close()
+
+    has_alpha = image.mode in ('RGBA', 'LA', 'P')
+    image = image.convert('RGBA' if has_alpha else 'RGB')
+    extension, image_format = ('png', 'PNG') if has_alpha else ('jpg', 'JPEG')
+    stem = posixpath.splitext(posixpath.basename(field_file.name))[0]
+    widths = [width for width in rendition_widths() if width < image.width]
+    widths = widths or [image.width]
+
+    renditions = []
+    for width in widths:
+        height = max(1, round(image.height * width / image.width))
+        resized = image.resize((width, height), Image.LANCZOS)
+        buffer = BytesIO()
+        if image_format == 'JPEG':
+            resized.save(buffer, image_format, quality=JPEG_QUALITY,
+                         optimize=True, progressive=True)
+        else:
+            resized.save(buffer, image_format, optimize=True)
+        name = field_file.storage.save(
+            f'{RENDITIONS_DIR}/{stem}_{width}.{extension}',
+            ContentFile(buffer.getvalue()))
+        renditions.append({'name': name, 'width': width, 'height': height})
+    return {
+        'source': field_file.name,
+        'width': image.width,
+        'height': image.height,
+        'renditions': renditions,
+    }
+
+
+def delete_renditions(storage, description):
+    """Удаление файлов копий, описанных в image_renditions."""
+    for rendition in description.get('renditions', ()):
+        storage.delete(rendition['name'])
@@ -0,0 +1,122 @@
+"""Бенчмарк всех маршрутов blog и pages."""
+import json
+import subprocess
+import sys
+
+import django
+from django.core.cache import cache
+from django.core.management.base import BaseCommand
+from django.db import connection, transaction
+from django.test.utils import (setup_test_environment,
+                               teardown_test_environment)
+
+from blog import bench
+from blog.seed import seed
+
+
+class Command(BaseCommand):
+    """Команда bench.
+
+    По умолчанию данные создаются во временной тестовой базе,
+    рабочая база не меняется. С --use-existing замеры идут
+    на настроенной базе без заполнения; объекты, которые создаёт
+    бенчмарк, откатываются вместе с транзакцией.
+    """
+
+    help = ('Заполняет базу синтетикой и замеряет p50/p95/p99, '
+            'число и время SQL и время шаблонов по каждому маршруту.')
+
+    def add_arguments(self, parser):
+        """Аргументы команды."""
+        parser.add_argument('--users', type=int, default=50)
+        parser.add_argument('--categories', type=int, default=10)
+        parser.add_argument('--locations', type=int, default=20)
+        parser.add_argument('--posts', type=int, default=10000)
+        parser.add_argument('--comments', type=int, default=50000)
+        parser.add_argument('--repeat', type=int, default=50,
+                            help='Запросов на маршрут и клиента.')
+        parser.add_argument('--use-existing', action='store_true',
+                            help='Не создавать тестовую базу.')
+        parser.add_argument('--cold', action='store_true',
+                            help='Очищать кеш перед каждым запросом.')
+        parser.add_argument('--json', metavar='PATH',
+                            help='Записать результат в JSON (- для stdout).')
+
+    def handle(self, *args, **options):
+        """Выполнение команды."""
+        try:
+            setup_test_environment()
+            own_environment = True
+        except RuntimeError:
+            # Окружение уже подготовлено, например, при запуске из pytest.
+            own_environment = False
+        old_name = None
+        try:
+            if not options['use_existing']:
+                old_name = connection.settings_dict['NAME']
+                connection.creation.create_test_db(verbosity=0)
+                dataset = seed(users=options['users'],
+                               categories=options['categories'],
+                               locations=options['locations'],
+                               posts=options['posts'],
+                               comments=options['comments'])
+            else:
+                dataset = None
+            cache.clear()
+            with transaction.atomic():
+                user, kwargs_source = bench.sample_objects()
+                results = bench.run(
+                    options['repeat'], user, kwargs_source,
+                    before_request=cache.clear if options['cold'] else None)
+                # Пост, комментарий и сессии бенчмарка не остаются
+                # в базе, в том числе с --use-existing.
+                transaction.set_rollback(True)
+        finally:
+            if old_name is not None:
+                connection.creation.destroy_test_db(old_name, verbosity=0)
+            if own_environment:
+                teardown_test_environment()
+        report = {
+            'commit': self._commit(),
+            'django': django.get_version(),
+            'python': sys.version.split()[0],
+            'dataset': dataset,
+            'repeat': options['repeat'],
+            'cold': options['cold'],
+            'routes': results,
+        }
+        if options['json'] == '-':
+            self.stdout.write(json.dumps(report, ensure_ascii=False,
+                                         indent=2))
+            return
+        if options['json']:
+            with open(options['json'], 'w', encoding='utf-8') as fh:
+                json.dump(report, fh, ensure_ascii=False, indent=2)
+        self._print_table(results)
+
+    def _print_table(self, results):
+        """Таблица результатов для терминала."""
+        header = (f'{"маршрут":<22}{"клиент":<15}{"код":>5}{"p50":>9}'
+                  f'{"p95":>9}{"p99":>9}{"SQL":>5}{"бюджет":>8}'
+                  f'{"SQL мс":>9}{"шабл. мс":>10}')
+        self.stdout.write(header)
+        for row in results:
+            budget = '—' if row['budget'] is None else row['budget']
+            line = (f'{row["route"]:<22}{row["client"]:<15}'
+                    f'{row["status"]:>5}{row["p50_ms"]:>9.2f}'
+                    f'{row["p95_ms"]:>9.2f}{row["p99_ms"]:>9.2f}'
+                    f'{row["queries"]:>5}{budget:>8}'
+                    f'{row["sql_ms"]:>9.2f}{row["template_ms"]:>10.2f}')
+            if row['budget'] is not None and row['queries'] > row['budget']:
+                line = self.style.ERROR(line)
+            self.stdout.write(line)
+
+    @staticmethod
+    def _commit():
+        """Текущий коммит git, если он доступен."""
+        try:
+            return subprocess.run(
+                ['git', 'rev-parse', '--short', 'HEAD'],
+                capture_output=True, text=True, check=True).stdout.strip()
+        except (OSError, subprocess.CalledProcessError):
+            return None
@@ -0,0 +1,137 @@
+"""Конкурентная нагрузка чтения и записи на SQLite."""
+import os
+import random
+import sqlite3
+import tempfile
+import time
+from concurrent.futures import ProcessPoolExecutor
+
+from django.core.management.base import BaseCommand
+
+from blog.bench import percentile
+from blog.sqlite import apply_pragmas, sqlite_pragmas
+
+# Поведение Django без настроек: журнал отката, synchronous=FULL,
+# таймаут модуля sqlite3 по умолчанию.
+BASELINE_PRAGMAS = {'journal_mode': 'delete', 'synchronous': 'full'}
+
+SCHEMA = '''
+CREATE TABLE post (id INTEGER PRIMARY KEY, title TEXT, text TEXT,
+                   pub_date TEXT, comment_count INTEGER NOT NULL);
+CREATE INDEX post_pub_date ON post (pub_date DESC, id DESC);
+CREATE TABLE comment (id INTEGER PRIMARY KEY, post_id INTEGER NOT NULL,
+                      text TEXT, created_at TEXT);
+CREATE INDEX comment_post ON comment (post_id, created_at);
+'''
+
+
+def _prepare(path, posts):
+    """Схема, похожая на ленту блога, и начальные данные."""
+    with sqlite3.connect(path) as db:
+        db.executescript(SCHEMA)
+        db.executemany(
+            'INSERT INTO post VALUES (?, ?, ?, ?, 0)',
+            ((pk, f'Пост {pk}', 'Текст ' * 50, f'2020-01-01 {pk:08d}')
+             for pk in range(1, posts + 1)))
+
+
+def _worker(path, pragmas, seconds, write_ratio, posts, seed):
+    """Смешанная нагрузка одного процесса.
+
+    Запись повторяет CommentCreateView: вставка комментария
+    и обновление счётчика в одной транзакции.
+    """
+    rng = random.Random(seed)
+    db = sqlite3.connect(path, isolation_level=None)
+    apply_pragmas(db, pragmas)
+    stats = {'reads': 0, 'writes': 0, 'errors': 0,
+             'read_ms': [], 'write_ms': []}
+    deadline = time.perf_counter() + seconds
+    while time.perf_counter() < deadline:
+        post = rng.randint(1, posts)
+        started = time.perf_counter()
+        try:
+            if rng.random() < write_ratio:
+                db.execute('BEGIN')
+                try:
+                    db.execute('INSERT INTO comment (post_id, text, '
+                               "created_at) VALUES (?, 'Комментарий', "
+                               "datetime('now'))", (post,))
+                    db.execute('UPDATE post SET comment_count = '
+                               'comment_count + 1 WHERE id = ?', (post,))
+                    db.execute('COMMIT')
+                except sqlite3.Error:
+                    db.execute('ROLLBACK')
+                    raise
+                stats['writes'] += 1
+                stats['write_ms'].append(
+                    (time.perf_counter() - started) * 1000)
+            else:
+                db.execute('SELECT id, title, comment_count FROM post '
+                           'ORDER BY pub_date DESC, id DESC LIMIT 10 '
+                           'OFFSET ?', (post % 100,)).fetchall()
+                db.execute('SELECT id, text FROM comment WHERE post_id = ? '
+                           'ORDER BY created_at', (post,)).fetchall()
+                stats['reads'] += 1
+                stats['read_ms'].append(
+                    (time.perf_counter() - started) * 1000)
+        except sqlite3.OperationalError:
+            stats['errors'] += 1
+    db.close()
+    return stats
+
+
+class Command(BaseCommand):
+    """Команда bench_sqlite.
+
+    Сравнивает пропускную способность смешанной нагрузки
+    при настройках Django по умолчанию и с settings.SQLITE_PRAGMAS.
+    Нагрузка идёт в отдельных процессах, как у воркеров gunicorn,
+    на временном файле базы.
+    """
+
+    help = ('Замеряет конкурентное чтение и запись в SQLite '
+            'до и после настройки PRAGMA.')
+
+    def add_arguments(self, parser):
+        """Аргументы команды."""
+        parser.add_argument('--workers', type=int, default=8)
+        parser.add_argument('--seconds', type=float, default=5.0)
+        parser.add_argument('--write-ratio', type=float, default=0.2,
+                            help='Доля операций записи.')
+        parser.add_argument('--posts', type=int, default=10000)
+
+    def handle(self, *args, **options):
+        """Выполнение команды."""
+        profiles = (('по умолчанию', BASELINE_PRAGMAS),
+                    ('SQLITE_PRAGMAS', sqlite_pragmas()))
+        for title, pragmas in profiles:
+            with tempfile.TemporaryDirectory() as directory:
+                path = os.path.join(directory, 'bench.sqlite3')
+                _prepare(path, options['posts'])
+                stats = self._run(path, pragmas, options)
+            seconds = options['seconds']
+            self.stdout.write(self.style.SUCCESS(title) + f' {pragmas}')
+            self.stdout.write(
+                f'  чтений/с {stats["reads"] / seconds:9.1f}'
+                f'  p99 {percentile(stats["read_ms"], 99) or 0:8.2f} мс')
+            self.stdout.write(
+                f'  записей/с {stats["writes"] / seconds:8.1f}'
+                f'  p99 {percentile(stats["write_ms"], 99) or 0:8.2f} мс')
+            self.stdout.write(f'  ошибок блокировки {stats["errors"]}')
+
+    @staticmethod
+    def _run(path, pragmas, options):
+        """Запуск воркеров и суммирование их статистики."""
+        total = {'reads': 0, 'writes': 0, 'errors': 0,
+                 'read_ms': [], 'write_ms': []}
+        with ProcessPoolExecutor(options['workers']) as pool:
+            futures = [pool.submit(_worker, path, pragmas,
+                                   options['seconds'],
+                                   options['write_ratio'],
+                                   options['posts'], seed)
+                       for seed in range(options['workers'])]
+            for future in futures:
+                for key, value in future.result().items():
+                    total[key] += value
+        return total
@@ -0,0 +1,110 @@
+"""Пропускная способность записи комментариев."""
+import multiprocessing
+import os
+import tempfile
+import threading
+import time
+
+from django.core.management.base import BaseCommand
+from django.db import connection, connections
+from django.test.utils import override_settings
+
+from blog.models import Comment, Post, User
+from blog.seed import seed
+from blog.writes import WriteUnavailable, run_write
+
+
+def _writer(post_ids, author_id, deadline, stats, lock):
+    """Поток, создающий комментарии до истечения времени."""
+    created = unavailable = 0
+    index = 0
+    try:
+        while time.perf_counter() < deadline:
+            post_id = post_ids[index % len(post_ids)]
+            index += 1
+            try:
+                run_write(lambda: Comment.objects.create(
+                    post_id=post_id, author_id=author_id,
+                    text='Комментарий нагрузки.'))
+                created += 1
+            except WriteUnavailable:
+                unavailable += 1
+    finally:
+        connections.close_all()
+    with lock:
+        stats['created'] += created
+        stats['unavailable'] += unavailable
+
+
+def _process(threads, seconds, post_ids, author_id):
+    """Процесс-воркер с несколькими потоками записи, как gthread."""
+    stats = {'created': 0, 'unavailable': 0}
+    lock = threading.Lock()
+    deadline = time.perf_counter() + seconds
+    workers = [threading.Thread(target=_writer, args=(
+        post_ids, author_id, deadline, stats, lock))
+        for _ in range(threads)]
+    for worker in workers:
+        worker.start()
+    for worker in workers:
+        worker.join()
+    return stats
+
+
+class Command(BaseCommand):
+    """Команда bench_writes.
+
+    Создаёт комментарии из нескольких процессов (по --threads потоков
+    в каждом, как воркеры gunicorn gthread) на временном файле базы
+    с очередью записи и без неё.
+    """
+
+    help = ('Замеряет число созданных комментариев в секунду '
+            'в зависимости от числа конкурирующих потоков.')
+
+    def add_arguments(self, parser):
+        """Аргументы команды."""
+        parser.add_argument('--processes', type=int, nargs='+',
+                            default=[1, 2, 4, 8])
+        parser.add_argument('--threads', type=int, default=4,
+                            help='Потоков записи в каждом процессе.')
+        parser.add_argument('--seconds', type=float, default=3.0)
+
+    def handle(self, *args, **options):
+        """Выполнение команды."""
+        old_name = connection.settings_dict['NAME']
+        with tempfile.TemporaryDirectory() as directory:
+            connection.settings_dict['TEST']['NAME'] = os.path.join(
+                directory, 'bench.sqlite3')
+            connection.creation.create_test_db(verbosity=0)
+            try:
+                seed(users=10, categories=2, locations=2, posts=100,
+                     comments=0)
+                post_ids = list(Post.objects.values_list('pk', flat=True))
+                author_id = User.objects.values_list(
+                    'pk', flat=True).first()
+                for queued in (False, True):
+                    for processes in options['processes']:
+                        with override_settings(SQLITE_WRITE_QUEUE=queued):
+                            stats = self._run(
+                                processes, options['threads'],
+                                options['seconds'], post_ids, author_id)
+                        title = 'очередь' if queued else 'напрямую'
+                        self.stdout.write(
+                            f'{title:<10} процессов {processes:>3}  '
+                            f'комментариев/с '
+                            f'{stats["created"] / options["seconds"]:8.1f}'
+                            f'  503: {stats["unavailable"]}')
+            finally:
+                connection.creation.destroy_test_db(old_name, verbosity=0)
+
+    @staticmethod
+    def _run(processes, threads, seconds, post_ids, author_id):
+        """Запуск процессов записи и суммирование результата."""
+        connections.close_all()
+        context = multiprocessing.get_context('fork')
+        with context.Pool(processes) as pool:
+            results = pool.starmap(_process, [
+                (threads, seconds, post_ids, author_id)] * processes)
+        return {key: sum(result[key] for result in results)
+                for key in ('created', 'unavailable')}
@@ -0,0 +1,27 @@
+"""Создание уменьшенных копий для уже загруженных изображений."""
+from django.core.management.base import BaseCommand
+
+from blog.models import Post
+
+
+class Command(BaseCommand):
+    """Команда build_image_renditions."""
+
+    help = 'Создаёт уменьшенные копии изображений публикаций.'
+
+    def add_arguments(self, parser):
+        """Аргументы команды."""
+        parser.add_argument('--force', action='store_true',
+                            help='Пересоздать и уже существующие копии.')
+
+    def handle(self, *args, **options):
+        """Выполнение команды."""
+        built = 0
+        posts = Post.objects.exclude(image='').only(
+            'pk', 'image', 'image_renditions')
+        for post in posts.iterator():
+            before = post.image_renditions
+            post.refresh_image_renditions(force=options['force'])
+            built += post.image_renditions is not before
+        self.stdout.write(self.style.SUCCESS(
+            f'Обработано изображений: {built}.'))
@@ -0,0 +1,49 @@
+"""Планы и время выполнения горячих запросов лент."""
+import time
+
+from django.core.management.base import BaseCommand
+
+from blog.explain import hot_querysets, plan_problems, query_plan
+from blog.seed import seed
+
+
+class Command(BaseCommand):
+    """Команда explain_feeds.
+
+    Чтобы сравнить планы до и после индексов, выполните команду
+    на базе, мигрированной до 0010_post_comment_count, и после
+    migrate blog 0011_feed_indexes.
+    """
+
+    help = 'Показывает EXPLAIN QUERY PLAN и время горячих запросов лент.'
+
+    def add_arguments(self, parser):
+        """Аргументы команды."""
+        parser.add_argument('--seed-posts', type=int, default=0,
+                            help='Сначала создать столько постов.')
+        parser.add_argument('--seed-comments', type=int, default=0,
+                            help='Сначала создать столько комментариев.')
+        parser.add_argument('--repeat', type=int, default=20,
+                            help='Сколько раз выполнить каждый запрос.')
+
+    def handle(self, *args, **options):
+        """Выполнение команды."""
+        if options['seed_posts'] or options['seed_comments']:
+            created = seed(users=100, categories=20, locations=50,
+                           posts=options['seed_posts'],
+                           comments=options['seed_comments'])
+            self.stdout.write(f'Создано: {created}')
+        for name, queryset in hot_querysets().items():
+            timings = []
+            for _ in range(options['repeat']):
+                started = time.perf_counter()
+                list(queryset.all())
+                timings.append(time.perf_counter() - started)
+            timings.sort()
+            self.stdout.write(self.style.MIGRATE_HEADING(
+                f'{name}: {timings[len(timings) // 2] * 1000:.2f} мс'))
+            plan = query_plan(queryset)
+            problems = plan_problems(plan)
+            for line in plan:
+                self.stdout.write(self.style.ERROR(f'  {line}')
+                                  if line in problems else f'  {line}')
@@ -0,0 +1,21 @@
+"""loaddata с пересборкой ленты после загрузки фикстур."""
+from django.core.management.commands import loaddata
+
+from blog import feed
+
+
+class Command(loaddata.Command):
+    """Команда loaddata.
+
+    Фикстуры сохраняются в режиме raw, и сигналы ленты их пропускают:
+    автор или категория поста могут загрузиться позже самого поста.
+    Поэтому после загрузки лента FeedEntry пересобирается целиком.
+    """
+
+    def handle(self, *fixture_labels, **options):
+        """Загрузка фикстур и пересборка ленты."""
+        super().handle(*fixture_labels, **options)
+        if self.loaded_object_count:
+            count = feed.rebuild()
+            if self.verbosity >= 1:
+                self.stdout.write(f'В ленте {count} публикаций.')
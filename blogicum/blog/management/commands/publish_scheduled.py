@@ -0,0 +1,51 @@
+"""Активация отложенных публикаций."""
+import time
+
+from django.core.management.base import BaseCommand
+from django.db import close_old_connections
+from django.utils import timezone
+
+from blog.scheduler import activate_due, next_due
+
+
+class Command(BaseCommand):
+    """Команда publish_scheduled.
+
+    Без --loop выполняет один тик (для cron), с --loop работает
+    как тикер и просыпается к ближайшей отложенной публикации,
+    но не реже чем раз в указанный интервал. Время прошлого тика
+    хранится в базе, так что запуск из cron проверяет только новые
+    посты. Версии тегов страниц лежат в кеше: с LocMemCache сброс
+    из отдельного процесса до веб-процессов не доходит, и кеш
+    страниц устаревает сам по PAGE_CACHE_TIMEOUT.
+    """
+
+    help = 'Добавляет в ленты публикации, дата которых наступила.'
+
+    def add_arguments(self, parser):
+        """Аргументы команды."""
+        parser.add_argument('--loop', type=float, metavar='SECONDS',
+                            help='Работать постоянно, проверяя не реже '
+                                 'чем раз в SECONDS секунд.')
+        parser.add_argument('--catch-up', action='store_true',
+                            help='Проверить все посты, а не только '
+                                 'новее прошлого тика.')
+
+    def handle(self, *args, **options):
+        """Выполнение команды."""
+        catch_up = options['catch_up']
+        while True:
+            count = activate_due(catch_up=catch_up)
+            if count or options['verbosity'] > 1:
+                self.stdout.write(self.style.SUCCESS(
+                    f'Опубликовано отложенных постов: {count}.'))
+            if not options['loop']:
+                return
+            catch_up = False
+            now = timezone.now()
+            due = next_due(now)
+            delay = options['loop']
+            if due is not None:
+                delay = min(delay, (due - now).total_seconds())
+            close_old_connections()
+            time.sleep(max(delay, 0.01))
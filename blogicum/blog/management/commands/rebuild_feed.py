@@ -0,0 +1,20 @@
+"""Пересоздание таблицы ленты."""
+from django.core.management.base import BaseCommand
+
+from blog import feed
+
+
+class Command(BaseCommand):
+    """Команда rebuild_feed.
+
+    Нужна после массовых изменений в обход сигналов:
+    QuerySet.update(), bulk_create, правки напрямую в базе.
+    """
+
+    help = 'Пересоздаёт таблицу ленты FeedEntry из публикаций.'
+
+    def handle(self, *args, **options):
+        """Выполнение команды."""
+        count = feed.rebuild()
+        self.stdout.write(self.style.SUCCESS(
+            f'В ленте {count} публикаций.'))
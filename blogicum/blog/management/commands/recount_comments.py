@@ -0,0 +1,77 @@
+"""Пересчёт денормализованного счётчика комментариев."""
+from django.core.management.base import BaseCommand
+from django.db import transaction
+from django.db.models import Count, F, IntegerField, OuterRef, Subquery
+from django.db.models.functions import Coalesce
+
+from blog.cache import (INDEX_TAG, author_tag, bump, card_tag, category_tag,
+                        post_tag)
+from blog.models import Comment, FeedEntry, Post
+
+
+class Command(BaseCommand):
+    """Команда recount_comments.
+
+    Счётчик хранится и в Post, и в строке ленты FeedEntry, которую
+    выводят главная и ленты категорий, поэтому исправляются оба,
+    а карточки и страницы исправленных постов сбрасываются из кеша.
+    """
+
+    help = ('Пересчитывает счётчик комментариев в публикациях и ленте '
+            'пачками по первичному ключу.')
+
+    def add_arguments(self, parser):
+        """Аргументы команды."""
+        parser.add_argument('--batch-size', type=int, default=1000,
+                            help='Количество постов в одной пачке.')
+        parser.add_argument('--dry-run', action='store_true',
+                            help='Только показать расхождения.')
+
+    def handle(self, *args, **options):
+        """Выполнение команды."""
+        batch_size = options['batch_size']
+        actual = (Comment.objects.filter(post=OuterRef('pk'))
+                  .order_by().values('post')
+                  .annotate(total=Count('pk')).values('total'))
+        last_pk, checked, fixed = 0, 0, 0
+        while True:
+            with transaction.atomic():
+                batch = list(
+                    Post.objects.filter(pk__gt=last_pk).order_by('pk')
+                    .annotate(actual=Coalesce(
+                        Subquery(actual, output_field=IntegerField()), 0),
+                        feed_count=F('feed_entry__comment_count'),
+                        category_slug=F('category__slug'),
+                        author_username=F('author__username'))
+                    .only('pk', 'comment_count')[:batch_size])
+                if not batch:
+                    break
+                last_pk = batch[-1].pk
+                checked += len(batch)
+                broken = [post for post in batch
+                          if post.comment_count != post.actual
+                          or post.feed_count not in (None, post.actual)]
+                if broken and not options['dry_run']:
+                    self.repair(broken)
+                fixed += len(broken)
+        verb = 'Найдено расхождений' if options['dry_run'] else 'Исправлено'
+        self.stdout.write(self.style.SUCCESS(
+            f'Проверено постов: {checked}. {verb}: {fixed}.'))
+
+    @staticmethod
+    def repair(posts):
+        """Исправление счётчиков пачки и сброс кеша этих постов."""
+        for post in posts:
+            post.comment_count = post.actual
+        Post.objects.bulk_update(posts, ['comment_count'])
+        FeedEntry.objects.bulk_update(
+            [FeedEntry(post_id=post.pk, comment_count=post.actual)
+             for post in posts if post.feed_count is not None],
+            ['comment_count'])
+        tags = {INDEX_TAG}
+        for post in posts:
+            tags.update((post_tag(post.pk), card_tag('post', post.pk),
+                         author_tag(post.author_username)))
+            if post.category_slug:
+                tags.add(category_tag(post.category_slug))
+        bump(*tags)
@@ -0,0 +1,110 @@
+"""Отчёт по журналу медленных SQL-запросов."""
+import json
+from collections import Counter
+from pathlib import Path
+
+from django.conf import settings
+from django.core.management.base import BaseCommand, CommandError
+
+from blog.bench import percentile
+
+SORT_KEYS = {
+    'total': 'total_ms',
+    'count': 'count',
+    'p95': 'p95_ms',
+}
+
+
+def log_files(path):
+    """Файл журнала и его ротированные копии, от старых к новым."""
+    path = Path(path)
+    rotated = sorted(path.parent.glob(f'{path.name}.*'),
+                     key=lambda file: int(file.suffix[1:])
+                     if file.suffix[1:].isdigit() else 0,
+                     reverse=True)
+    return [file for file in rotated + [path] if file.exists()]
+
+
+def aggregate(entries):
+    """Сводка по отпечаткам запросов."""
+    groups = {}
+    for entry in entries:
+        group = groups.setdefault(entry['id'], {
+            'id': entry['id'],
+            'fingerprint': entry['fingerprint'],
+            'durations': [],
+            'views': Counter(),
+            'stacks': Counter(),
+        })
+        group['durations'].append(entry['duration_ms'])
+        group['views'][entry.get('view')] += 1
+        group['stacks'][tuple(entry.get('stack') or ())] += 1
+    report = []
+    for group in groups.values():
+        durations = group['durations']
+        report.append({
+            'id': group['id'],
+            'fingerprint': group['fingerprint'],
+            'count': len(durations),
+            'total_ms': round(sum(durations), 2),
+            'p95_ms': percentile(durations, 95),
+            'max_ms': max(durations),
+            'views': [view for view, _ in group['views'].most_common()],
+            'stack': list(group['stacks'].most_common(1)[0][0]),
+        })
+    return report
+
+
+class Command(BaseCommand):
+    """Команда slow_queries."""
+
+    help = ('Сводка журнала медленных запросов: самые дорогие '
+            'по суммарному времени, числу или p95.')
+
+    def add_arguments(self, parser):
+        """Аргументы команды."""
+        parser.add_argument('--file', default=settings.SLOW_QUERY_LOG,
+                            help='Журнал; ротированные копии читаются '
+                                 'тоже.')
+        parser.add_argument('--top', type=int, default=10,
+                            help='Сколько запросов показать.')
+        parser.add_argument('--sort', choices=SORT_KEYS, default='total',
+                            help='Порядок: total, count или p95.')
+        parser.add_argument('--view', help='Только для указанного view, '
+                                           'например blog:index.')
+        parser.add_argument('--json', action='store_true',
+                            help='Вывести отчёт в JSON.')
+
+    def handle(self, *args, **options):
+        """Выполнение команды."""
+        files = log_files(options['file'])
+        if not files:
+            raise CommandError(f'Журнал {options["file"]} не найден.')
+        entries = []
+        for file in files:
+            with open(file, encoding='utf-8') as lines:
+                for line in lines:
+                    try:
+                        entry = json.loads(line)
+                    except ValueError:
+                        continue
+                    if options['view'] in (None, entry.get('view')):
+                        entries.append(entry)
+        key = SORT_KEYS[options['sort']]
+        report = sorted(aggregate(entries), key=lambda row: row[key],
+                        reverse=True)[:options['top']]
+        if options['json']:
+            self.stdout.write(json.dumps(report, ensure_ascii=False,
+                                         indent=2))
+            return
+        for row in report:
+            self.stdout.write(
+                f'{row["total_ms"]:>10.1f} ms  {row["count"]:>6}x  '
+                f'p95 {row["p95_ms"]:>8.1f} ms  '
+                f'max {row["max_ms"]:>8.1f} ms  {row["id"]}  '
+                f'{", ".join(str(view) for view in row["views"])}')
+            self.stdout.write(f'    {row["fingerprint"][:200]}')
+            for frame in row['stack']:
+                self.stdout.write(f'      {frame}')
+        self.stdout.write(self.style.SUCCESS(
+            f'Запросов в журнале: {len(entries)}.'))
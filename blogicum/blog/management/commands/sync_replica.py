@@ -0,0 +1,31 @@
+"""Обновление реплики SQLite копией основной базы."""
+from django.core.management.base import BaseCommand, CommandError
+from django.db import DEFAULT_DB_ALIAS, connections
+
+from blog.routers import REPLICA_ALIAS, copy_sqlite, replica_configured
+
+
+class Command(BaseCommand):
+    """Команда sync_replica.
+
+    Для реплики PostgreSQL копирование выполняет сам сервер
+    (потоковая репликация), команда нужна только для SQLite.
+    """
+
+    help = 'Копирует основную базу SQLite в файл реплики.'
+
+    def handle(self, *args, **options):
+        """Выполнение команды."""
+        if not replica_configured():
+            raise CommandError('Реплика не настроена: задайте '
+                               'SQLITE_REPLICA_PATH.')
+        primary = connections[DEFAULT_DB_ALIAS]
+        replica = connections[REPLICA_ALIAS]
+        if primary.vendor != 'sqlite' or replica.vendor != 'sqlite':
+            raise CommandError('Копирование поддерживается только '
+                               'для SQLite.')
+        replica.close()
+        copy_sqlite(primary.settings_dict['NAME'],
+                    replica.settings_dict['NAME'])
+        self.stdout.write(self.style.SUCCESS(
+            f'Реплика {replica.settings_dict["NAME"]} обновлена.'))
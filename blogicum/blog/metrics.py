@@ -0,0 +1,349 @@
+"""Метрики запросов в формате Prometheus.
+
+Значения хранятся в таблицах «ключ → float64» в mmap. Каждый живой
+поток процесса держит свою таблицу, поэтому запись идёт без
+блокировок: пишет в таблицу только её поток. Таблица завершившегося
+потока вместе со значениями переходит к следующему новому потоку,
+так что таблиц не больше, чем потоков, живших одновременно, — даже
+у сервера с потоком на запрос. С settings.METRICS_DIR таблицы —
+файлы в общем каталоге, и экспорт суммирует файлы всех воркеров;
+без него — анонимная память, видная только своему процессу.
+Каталог очищают при деплое, как и для prometheus_client.
+"""
+import json
+import mmap
+import os
+import struct
+import threading
+from bisect import bisect_left
+from pathlib import Path
+
+from django.conf import settings
+
+HEADER = struct.Struct('Q')
+LENGTH = struct.Struct('I')
+VALUE = struct.Struct('d')
+INITIAL_SIZE = 64 * 1024
+
+
+class MmapDict:
+    """Таблица «ключ → float64» в mmap с одним писателем.
+
+    Формат: в начале — число занятых байт, дальше записи «длина
+    ключа, ключ, выравнивание до 8 байт, значение». Запись ключа
+    завершается обновлением заголовка, поэтому читатель всегда
+    видит только целые записи.
+    """
+
+    def __init__(self, path=None):
+        """Открытие файла path или анонимной памяти."""
+        if path is None:
+            self._map = mmap.mmap(-1, INITIAL_SIZE)
+        else:
+            fd = os.open(path, os.O_RDWR | os.O_CREAT)
+            try:
+                if os.fstat(fd).st_size < INITIAL_SIZE:
+                    os.ftruncate(fd, INITIAL_SIZE)
+                self._map = mmap.mmap(fd, 0)
+            finally:
+                os.close(fd)
+        self._used = HEADER.unpack_from(self._map)[0] or HEADER.size
+        self._positions = {key: position for key, position, _
+                           in read_entries(self._map, self._used)}
+
+    def add(self, key, amount):
+        """Увеличение значения ключа."""
+        position = self._positions.get(key)
+        if position is None:
+            position = self._create(key)
+        value = VALUE.unpack_from(self._map, position)[0]
+        VALUE.pack_into(self._map, position, value + amount)
+
+    def items(self):
+        """Пары ключ — значение."""
+        return [(key, value) for key, _, value
+                in read_entries(self._map, self._used)]
+
+    def _create(self, key):
+        encoded = key.encode()
+        start = LENGTH.size + len(encoded)
+        padding = -start % 8
+        size = start + padding + VALUE.size
+        if self._used + size > len(self._map):
+            self._map.resize(max(len(self._map) * 2, self._used + size))
+        LENGTH.pack_into(self._map, self._used, len(encoded))
+        self._map[self._used + LENGTH.size:
+                  self._used + LENGTH.size + len(encoded)] = encoded
+        position = self._used + start + padding
+        VALUE.pack_into(self._map, position, 0.0)
+        self._used += size
+        HEADER.pack_into(self._map, 0, self._used)
+        self._positions[key] = position
+        return position
+
+
+def read_entries(buffer, used=None):
+    """Записи таблицы: ключ, смещение значения, значение.
+
+    Файл мог вырасти после того, как читатель отобразил его в память:
+    тогда заголовок указывает дальше конца buffer, и записи за концом
+    пропускаются до следующего чтения.
+    """
+    if used is None:
+        used = HEADER.unpack_from(buffer)[0]
+    used = min(used, len(buffer))
+    position = HEADER.size
+    while position + LENGTH.size <= used:
+        length = LENGTH.unpack_from(buffer, position)[0]
+        key_start = position + LENGTH.size
+        value_position = key_start + length + (-(LENGTH.size + length) % 8)
+        if value_position + VALUE.size > used:
+            break
+        key = bytes(buffer[key_start:key_start + length]).decode()
+        yield key, value_position, VALUE.unpack_from(buffer,
+                                                     value_position)[0]
+        position = value_position + VALUE.size
+
+
+_local = threading.local()
+_pools = {}
+_pools_lock = threading.Lock()
+
+
+class TablePool:
+    """Таблицы одного процесса: занятые живыми потоками и свободные."""
+
+    def __init__(self, directory):
+        """Пустой пул; directory — каталог файлов или None."""
+        self.directory = directory
+        self.assigned = []
+        self.free = []
+        self.created = 0
+
+    def tables(self):
+        """Все таблицы пула."""
+        return [table for _, table in self.assigned] + self.free
+
+    def acquire(self, thread):
+        """Таблица для потока thread: освободившаяся или новая."""
+        alive = []
+        for owner, table in self.assigned:
+            if owner.is_alive():
+                alive.append((owner, table))
+            else:
+                self.free.append(table)
+        self.assigned = alive
+        table = self.free.pop() if self.free else self._create()
+        self.assigned.append((thread, table))
+        return table
+
+    def _create(self):
+        path = None
+        if self.directory is not None:
+            Path(self.directory).mkdir(parents=True, exist_ok=True)
+            path = os.path.join(
+                self.directory, f'{os.getpid()}-{self.created}.metrics')
+        self.created += 1
+        return MmapDict(path)
+
+
+def metrics_dir():
+    """Общий каталог таблиц или None."""
+    return getattr(settings, 'METRICS_DIR', None)
+
+
+def _table():
+    """Таблица текущего потока.
+
+    Выдаётся заново после fork и при смене METRICS_DIR; блокировка
+    берётся только при выдаче таблицы, а не на каждую запись.
+    """
+    owner = (os.getpid(), metrics_dir())
+    if getattr(_local, 'owner', None) != owner:
+        with _pools_lock:
+            pool = _pools.get(owner)
+            if pool is None:
+                pool = _pools[owner] = TablePool(owner[1])
+            _local.table = pool.acquire(threading.current_thread())
+        _local.owner = owner
+    return _local.table
+
+
+def collect_values():
+    """Суммы значений по всем таблицам."""
+    totals = {}
+    directory = metrics_dir()
+    if directory is not None:
+        tables = []
+        for path in Path(directory).glob('*.metrics'):
+            with open(path, 'rb') as file:
+                if os.fstat(file.fileno()).st_size:
+                    with mmap.mmap(file.fileno(), 0,
+                                   access=mmap.ACCESS_READ) as buffer:
+                        tables.append([(key, value) for key, _, value
+                                       in read_entries(buffer)])
+    else:
+        with _pools_lock:
+            pool = _pools.get((os.getpid(), None))
+            tables = ([table.items() for table in pool.tables()]
+                      if pool else [])
+    for items in tables:
+        for key, value in items:
+            totals[key] = totals.get(key, 0.0) + value
+    return totals
+
+
+class Metric:
+    """Метрика с фиксированным набором меток."""
+
+    kind = None
+
+    def __init__(self, name, documentation, labelnames):
+        """Имя, описание и имена меток."""
+        self.name = name
+        self.documentation = documentation
+        self.labelnames = tuple(labelnames)
+        self._keys = {}
+        REGISTRY.append(self)
+
+    def _labels(self, labels, extra=()):
+        return tuple(zip(self.labelnames, labels)) + tuple(extra)
+
+    def key(self, suffix, labels, bucket=None):
+        """Ключ значения в таблице."""
+        cache_key = (suffix, labels, bucket)
+        key = self._keys.get(cache_key)
+        if key is None:
+            key = self._keys[cache_key] = json.dumps(
+                [self.name, suffix, labels, bucket], ensure_ascii=False)
+        return key
+
+
+class Counter(Metric):
+    """Счётчик."""
+
+    kind = 'counter'
+
+    def inc(self, amount=1, *labels):
+        """Увеличение счётчика для значений меток labels."""
+        _table().add(self.key('', labels), amount)
+
+    def samples(self, values):
+        """Строки экспорта."""
+        for (suffix, labels, _), value in values:
+            yield self.name + suffix, self._labels(labels), value
+
+
+class Histogram(Metric):
+    """Гистограмма с фиксированными границами корзин."""
+
+    kind = 'histogram'
+
+    def __init__(self, name, documentation, labelnames, buckets):
+        """Имя, описание, имена меток и верхние границы корзин."""
+        super().__init__(name, documentation, labelnames)
+        self.buckets = tuple(sorted(buckets)) + (float('inf'),)
+
+    def observe(self, value, *labels):
+        """Учёт наблюдения value для значений меток labels.
+
+        В таблице корзины хранятся без накопления — одна запись на
+        наблюдение; накопленные значения считаются при экспорте.
+        """
+        table = _table()
+        bucket = self.buckets[bisect_left(self.buckets, value)]
+        table.add(self.key('_bucket', labels, bucket), 1)
+        table.add(self.key('_sum', labels), value)
+        table.add(self.key('_count', labels), 1)
+
+    def samples(self, values):
+        """Строки экспорта с накопленными корзинами."""
+        groups = {}
+        for (suffix, labels, bucket), value in values:
+            group = groups.setdefault(tuple(labels), {})
+            group[(suffix, bucket)] = value
+        for labels, group in sorted(groups.items()):
+            cumulative = 0.0
+            for bucket in self.buckets:
+                cumulative += group.get(('_bucket', bucket), 0.0)
+                yield (f'{self.name}_bucket',
+                       self._labels(labels, [('le', format_value(bucket))]),
+                       cumulative)
+            for suffix in ('_sum', '_count'):
+                yield (self.name + suffix, self._labels(labels),
+                       group.get((suffix, None), 0.0))
+
+
+REGISTRY = []
+
+LATENCY_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10)
+QUERY_BUCKETS = (0, 1, 2, 3, 5, 10, 20, 50, 100)
+SIZE_BUCKETS = (1024, 4096, 16384, 65536, 262144, 1048576)
+
+REQUESTS = Counter(
+    'blog_requests_total', 'Число запросов.', ('view', 'status'))
+LATENCY = Histogram(
+    'blog_request_duration_seconds', 'Время ответа.',
+    ('view', 'status'), LATENCY_BUCKETS)
+QUERIES = Histogram(
+    'blog_request_queries', 'Число SQL-запросов на запрос.',
+    ('view', 'status'), QUERY_BUCKETS)
+RESPONSE_SIZE = Histogram(
+    'blog_response_size_bytes', 'Размер ответа.',
+    ('view', 'status'), SIZE_BUCKETS)
+CACHE_HITS = Counter(
+    'blog_cache_hits_total', 'Попадания в кеш.', ('view',))
+CACHE_MISSES = Counter(
+    'blog_cache_misses_total', 'Промахи кеша.', ('view',))
+
+
+def observe_request(view, status, duration, timings, size):
+    """Учёт одного HTTP-запроса."""
+    labels = (view, str(status))
+    REQUESTS.inc(1, *labels)
+    LATENCY.observe(duration, *labels)
+    QUERIES.observe(timings.queries, *labels)
+    if size is not None:
+        RESPONSE_SIZE.observe(size, *labels)
+    if timings.cache_hits:
+        CACHE_HITS.inc(timings.cache_hits, view)
+    if timings.cache_misses:
+        CACHE_MISSES.inc(timings.cache_misses, view)
+
+
+def format_value(value):
+    """Число в формате Prometheus."""
+    if value == float('inf'):
+        return '+Inf'
+    return repr(float(value)) if value != int(value) else str(int(value))
+
+
+def escape(value):
+    """Экранирование значения метки."""
+    return (str(value).replace('\\', r'\\').replace('"', r'\"')
+            .replace('\n', r'\n'))
+
+
+def render():
+    """Все метрики в текстовом формате Prometheus 0.0.4."""
+    values = {}
+    for key, value in collect_values().items():
+        name, suffix, labels, bucket = json.loads(key)
+        values.setdefault(name, []).append(
+            ((suffix, tuple(labels), bucket), value))
+    lines = []
+    for metric in REGISTRY:
+        lines.append(f'# HELP {metric.name} {metric.documentation}')
+        lines.append(f'# TYPE {metric.name} {metric.kind}')
+        for name, labels, value in metric.samples(
+                sorted(values.get(metric.name, []), key=_sort_key)):
+            label_text = ','.join(f'{label}="{escape(text)}"'
+                                  for label, text in labels)
+            lines.append(f'{name}{{{label_text}}} {format_value(value)}'
+                         if label_text else f'{name} {format_value(value)}')
+    return '\n'.join(lines) + '\n'
+
+
+def _sort_key(item):
+    (suffix, labels, bucket), _ = item
+    return suffix, labels, bucket if bucket is not None else 0
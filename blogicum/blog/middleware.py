@@ -0,0 +1,222 @@
+"""Middleware приложения Blog."""
+import json
+import logging
+import time
+
+from django.conf import settings
+from django.core.cache import cache
+from django.urls import Resolver404, resolve
+
+from . import metrics, slowlog
+from .cache import page_key, page_tags, page_timeout
+from .nplusone import NPlusOneError, detect
+from .perf import collect, record_cache, token_matches
+from .routers import (enable_replica_reads, replica_configured,
+                      replica_reads)
+
+SAFE_METHODS = ('GET', 'HEAD', 'OPTIONS')
+STICKY_COOKIE = 'primary_until'
+
+logger = logging.getLogger('blog.perf')
+nplusone_logger = logging.getLogger('blog.nplusone')
+
+
+class AnonymousPageCacheMiddleware:
+    """Кеш целых страниц лент и публикаций для запросов без сессии.
+
+    У авторизованных пользователей есть cookie сессии, поэтому они
+    всегда получают свежую страницу и видят свои изменения сразу.
+    Изменения моделей инвалидируют страницы через сигналы
+    (см. blog.signals).
+    """
+
+    def __init__(self, get_response):
+        """Сохранение следующего обработчика."""
+        self.get_response = get_response
+
+    def __call__(self, request):
+        """Ответ из кеша или кеширование нового ответа."""
+        if (request.method != 'GET' or not page_timeout()
+                or settings.SESSION_COOKIE_NAME in request.COOKIES):
+            return self.get_response(request)
+        try:
+            match = resolve(request.path_info)
+        except Resolver404:
+            return self.get_response(request)
+        tags = page_tags(match)
+        if tags is None:
+            return self.get_response(request)
+        key = page_key(request, tags)
+        response = cache.get(key)
+        record_cache(hits=response is not None,
+                     misses=response is None)
+        if response is not None:
+            # Для журналов и метрик, как если бы запрос дошёл до view.
+            request.resolver_match = match
+            return response
+        response = self.get_response(request)
+        if (response.status_code == 200 and not response.streaming
+                and not response.cookies):
+            cache.set(key, response, page_timeout())
+        return response
+
+
+class ReplicaRoutingMiddleware:
+    """Чтение с реплики для представлений с replica_reads = True.
+
+    Флаг действует до конца обработки запроса, включая отрисовку
+    TemplateResponse. После небезопасного запроса клиент получает
+    cookie и REPLICA_STICKY_SECONDS секунд читает из основной базы,
+    чтобы видеть свои изменения, пока реплика их не догнала.
+    """
+
+    def __init__(self, get_response):
+        """Сохранение следующего обработчика."""
+        self.get_response = get_response
+
+    def __call__(self, request):
+        """Сброс флага после ответа и выдача cookie после записи."""
+        with replica_reads(False):
+            response = self.get_response(request)
+        if request.method not in SAFE_METHODS and replica_configured():
+            sticky = getattr(settings, 'REPLICA_STICKY_SECONDS', 5)
+            response.set_cookie(
+                STICKY_COOKIE, str(time.time() + sticky), max_age=sticky,
+                httponly=True, samesite='Lax')
+        return response
+
+    def process_view(self, request, view_func, view_args, view_kwargs):
+        """Включение чтения с реплики для помеченных представлений."""
+        view = getattr(view_func, 'view_class', view_func)
+        if (request.method in SAFE_METHODS
+                and getattr(view, 'replica_reads', False)
+                and not self.sticky(request)):
+            enable_replica_reads()
+
+    @staticmethod
+    def sticky(request):
+        """Читает ли клиент из основной базы после своей записи."""
+        try:
+            return float(request.COOKIES[STICKY_COOKIE]) > time.time()
+        except (KeyError, ValueError):
+            return False
+
+
+class ServerTimingMiddleware:
+    """Заголовок Server-Timing и строка лога blog.perf для каждого запроса.
+
+    Стоит первым в MIDDLEWARE, чтобы учитывать и ответы из кеша
+    страниц. Заголовок получают только запросы с заголовком
+    X-Server-Timing-Token, равным SERVER_TIMING_TOKEN; строка лога
+    пишется на уровне INFO.
+    Выключается настройкой SERVER_TIMING = False. Заодно
+    пишет журнал медленных запросов, если задан SLOW_QUERY_MS
+    (см. blog.slowlog).
+    """
+
+    def __init__(self, get_response):
+        """Сохранение следующего обработчика."""
+        self.get_response = get_response
+        self.enabled = getattr(settings, 'SERVER_TIMING', True)
+        self.slow_threshold = slowlog.slow_threshold()
+
+    def __call__(self, request):
+        """Замер запроса."""
+        if not self.enabled and self.slow_threshold is None:
+            return self.get_response(request)
+        started = time.perf_counter()
+        with collect(self.slow_threshold) as timings:
+            response = self.get_response(request)
+        if timings.slow:
+            slowlog.write(request, timings.slow)
+            timings.slow.clear()
+        if self.enabled:
+            self.report(request, response, timings,
+                        (time.perf_counter() - started) * 1000)
+        return response
+
+    @staticmethod
+    def report(request, response, timings, total):
+        """Заголовок Server-Timing и строка лога."""
+        sql = timings.sql * 1000
+        template = timings.template * 1000
+        if token_matches(request.headers.get('X-Server-Timing-Token'),
+                         getattr(settings, 'SERVER_TIMING_TOKEN', None)):
+            response['Server-Timing'] = (
+                f'total;dur={total:.1f}, '
+                f'db;dur={sql:.1f};desc="{timings.queries} queries", '
+                f'tpl;dur={template:.1f}, '
+                f'cache;desc="hit={timings.cache_hits} '
+                f'miss={timings.cache_misses}"')
+        if logger.isEnabledFor(logging.INFO):
+            match = request.resolver_match
+            logger.info(json.dumps({
+                'method': request.method,
+                'path': request.path,
+                'view': match.view_name if match else None,
+                'status': response.status_code,
+                'total_ms': round(total, 2),
+                'sql_count': timings.queries,
+                'sql_ms': round(sql, 2),
+                'template_ms': round(template, 2),
+                'cache_hits': timings.cache_hits,
+                'cache_misses': timings.cache_misses,
+            }, ensure_ascii=False))
+
+
+class MetricsMiddleware:
+    """Метрики запросов по имени маршрута и коду ответа (см. blog.metrics).
+
+    Стоит сразу после ServerTimingMiddleware и пользуется его замерами.
+    Выключается настройкой METRICS_ENABLED = False.
+    """
+
+    def __init__(self, get_response):
+        """Сохранение следующего обработчика."""
+        self.get_response = get_response
+        self.enabled = getattr(settings, 'METRICS_ENABLED', True)
+
+    def __call__(self, request):
+        """Учёт запроса в метриках."""
+        if not self.enabled:
+            return self.get_response(request)
+        started = time.perf_counter()
+        with collect() as timings:
+            response = self.get_response(request)
+        match = request.resolver_match
+        if response.streaming:
+            size = response.get('Content-Length')
+            size = int(size) if size else None
+        else:
+            size = len(response.content)
+        metrics.observe_request(
+            match.view_name if match else 'unresolved',
+            response.status_code, time.perf_counter() - started,
+            timings, size)
+        return response
+
+
+class NPlusOneMiddleware:
+    """Предупреждение о N+1 в запросе (см. blog.nplusone).
+
+    Работает при NPLUSONE_DETECT; с NPLUSONE_RAISE вместо записи
+    в лог blog.nplusone выбрасывает NPlusOneError — так тесты
+    падают на забытом select_related.
+    """
+
+    def __init__(self, get_response):
+        """Сохранение следующего обработчика."""
+        self.get_response = get_response
+
+    def __call__(self, request):
+        """Поиск однотипных запросов во время обработки."""
+        if not getattr(settings, 'NPLUSONE_DETECT', False):
+            return self.get_response(request)
+        with detect() as detector:
+            response = self.get_response(request)
+        if detector.problems():
+            report = detector.report(f'{request.method} {request.path}')
+            if getattr(settings, 'NPLUSONE_RAISE', False):
+                raise NPlusOneError(report)
+            nplusone_logger.warning(report)
+        return response
@@ -0,0 +1,107 @@
+from django.db import migrations
+
+# Копия SQL из blog.fts на момент миграции: модуль приложения
+# меняется, а миграция должна создавать таблицы такими, какими
+# они были в 0013.
+CREATE_TABLES = [
+    "CREATE VIRTUAL TABLE blog_post_fts USING fts5(title, text, "
+    "content = '', tokenize = 'unicode61 remove_diacritics 2', "
+    "prefix = '3')",
+    "CREATE VIRTUAL TABLE blog_comment_fts USING fts5(text, "
+    "content = '', tokenize = 'unicode61 remove_diacritics 2', "
+    "prefix = '3')",
+]
+
+CREATE_TRIGGERS = [
+    """CREATE TRIGGER IF NOT EXISTS blog_post_fts_insert
+        AFTER INSERT ON blog_post BEGIN
+        INSERT INTO blog_post_fts (rowid, title, text)
+        VALUES (new.id,
+            replace(replace(new.title, 'ё', 'е'), 'Ё', 'Е'),
+            replace(replace(new.text, 'ё', 'е'), 'Ё', 'Е'));
+    END""",
+    """CREATE TRIGGER IF NOT EXISTS blog_post_fts_delete
+        AFTER DELETE ON blog_post BEGIN
+        INSERT INTO blog_post_fts (blog_post_fts, rowid, title, text)
+        VALUES ('delete', old.id,
+            replace(replace(old.title, 'ё', 'е'), 'Ё', 'Е'),
+            replace(replace(old.text, 'ё', 'е'), 'Ё', 'Е'));
+    END""",
+    """CREATE TRIGGER IF NOT EXISTS blog_post_fts_update
+        AFTER UPDATE OF title, text ON blog_post
+        WHEN old.title IS NOT new.title OR old.text IS NOT new.text BEGIN
+        INSERT INTO blog_post_fts (blog_post_fts, rowid, title, text)
+        VALUES ('delete', old.id,
+            replace(replace(old.title, 'ё', 'е'), 'Ё', 'Е'),
+            replace(replace(old.text, 'ё', 'е'), 'Ё', 'Е'));
+        INSERT INTO blog_post_fts (rowid, title, text)
+        VALUES (new.id,
+            replace(replace(new.title, 'ё', 'е'), 'Ё', 'Е'),
+            replace(replace(new.text, 'ё', 'е'), 'Ё', 'Е'));
+    END""",
+    """CREATE TRIGGER IF NOT EXISTS blog_comment_fts_insert
+        AFTER INSERT ON blog_comment BEGIN
+        INSERT INTO blog_comment_fts (rowid, text)
+        VALUES (new.id,
+            replace(replace(new.text, 'ё', 'е'), 'Ё', 'Е'));
+    END""",
+    """CREATE TRIGGER IF NOT EXISTS blog_comment_fts_delete
+        AFTER DELETE ON blog_comment BEGIN
+        INSERT INTO blog_comment_fts (blog_comment_fts, rowid, text)
+        VALUES ('delete', old.id,
+            replace(replace(old.text, 'ё', 'е'), 'Ё', 'Е'));
+    END""",
+    """CREATE TRIGGER IF NOT EXISTS blog_comment_fts_update
+        AFTER UPDATE OF text ON blog_comment
+        WHEN old.text IS NOT new.text BEGIN
+        INSERT INTO blog_comment_fts (blog_comment_fts, rowid, text)
+        VALUES ('delete', old.id,
+            replace(replace(old.text, 'ё', 'е'), 'Ё', 'Е'));
+        INSERT INTO blog_comment_fts (rowid, text)
+        VALUES (new.id,
+            replace(replace(new.text, 'ё', 'е'), 'Ё', 'Е'));
+    END""",
+]
+
+FILL_TABLES = [
+    """INSERT INTO blog_post_fts (rowid, title, text)
+        SELECT id,
+            replace(replace(title, 'ё', 'е'), 'Ё', 'Е'),
+            replace(replace(text, 'ё', 'е'), 'Ё', 'Е') FROM blog_post""",
+    """INSERT INTO blog_comment_fts (rowid, text)
+        SELECT id,
+            replace(replace(text, 'ё', 'е'), 'Ё', 'Е') FROM blog_comment""",
+]
+
+DROP = [
+    'DROP TRIGGER IF EXISTS blog_post_fts_insert',
+    'DROP TRIGGER IF EXISTS blog_post_fts_delete',
+    'DROP TRIGGER IF EXISTS blog_post_fts_update',
+    'DROP TRIGGER IF EXISTS blog_comment_fts_insert',
+    'DROP TRIGGER IF EXISTS blog_comment_fts_delete',
+    'DROP TRIGGER IF EXISTS blog_comment_fts_update',
+    'DROP TABLE IF EXISTS blog_post_fts',
+    'DROP TABLE IF EXISTS blog_comment_fts',
+]
+
+
+def run(statements):
+    def operation(apps, schema_editor):
+        if schema_editor.connection.vendor != 'sqlite':
+            return
+        for statement in statements:
+            schema_editor.execute(statement)
+    return operation
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('blog', '0012_post_image_renditions'),
+    ]
+
+    operations = [
+        migrations.RunPython(
+            run(CREATE_TABLES + CREATE_TRIGGERS + FILL_TABLES),
+            run(DROP)),
+    ]
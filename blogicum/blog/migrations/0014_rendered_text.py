@@ -0,0 +1,58 @@
+# Generated by Django 3.2.16 on 2026-10-17 05:09
+
+from django.db import migrations, models
+
+from blog.rendering import make_excerpt, render_html
+
+BATCH_SIZE = 2000
+
+
+def fill_derived_text(apps, schema_editor):
+    connection = schema_editor.connection
+    quote = connection.ops.quote_name
+    for model_name, derived in (
+            ('Post', {'text_html': render_html, 'excerpt': make_excerpt}),
+            ('Comment', {'text_html': render_html})):
+        model = apps.get_model('blog', model_name)
+        fields = [model._meta.get_field(name) for name in derived]
+        sql = 'UPDATE {} SET {} WHERE id = %s'.format(
+            quote(model._meta.db_table),
+            ', '.join(f'{quote(field.column)} = %s' for field in fields))
+        last_pk = 0
+        while True:
+            batch = list(model.objects.filter(pk__gt=last_pk)
+                         .order_by('pk').values_list('pk', 'text')
+                         [:BATCH_SIZE])
+            if not batch:
+                break
+            with connection.cursor() as cursor:
+                cursor.executemany(sql, [
+                    [*(render(text) for render in derived.values()), pk]
+                    for pk, text in batch])
+            last_pk = batch[-1][0]
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('blog', '0013_search_fts'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='comment',
+            name='text_html',
+            field=models.TextField(default='', editable=False, verbose_name='Текст в HTML'),
+        ),
+        migrations.AddField(
+            model_name='post',
+            name='excerpt',
+            field=models.TextField(default='', editable=False, verbose_name='Начало текста'),
+        ),
+        migrations.AddField(
+            model_name='post',
+            name='text_html',
+            field=models.TextField(default='', editable=False, verbose_name='Текст в HTML'),
+        ),
+        migrations.RunPython(fill_derived_text, migrations.RunPython.noop),
+    ]
@@ -0,0 +1,77 @@
+# Generated by Django 3.2.16 on 2026-10-17 05:27
+
+from django.conf import settings
+from django.db import migrations, models
+import django.db.models.deletion
+from django.utils import timezone
+
+
+# Копия blog.feed.FILL_SQL на момент миграции: код приложения
+# может меняться вместе со схемой, а миграция должна работать
+# с таблицами, какими они были в 0015.
+FILL_SQL = '''
+    INSERT INTO blog_feedentry (
+        post_id, pub_date, title, excerpt, image, image_renditions,
+        comment_count, category_id, category_title, category_slug,
+        location_id, location_name, author_id, author_username)
+    SELECT
+        post.id, post.pub_date, post.title, post.excerpt, post.image,
+        post.image_renditions, post.comment_count, category.id,
+        category.title, category.slug, location.id,
+        CASE WHEN location.is_published THEN location.name ELSE '' END,
+        author.id, author.username
+    FROM blog_post AS post
+    INNER JOIN blog_category AS category ON category.id = post.category_id
+    LEFT OUTER JOIN blog_location AS location
+        ON location.id = post.location_id
+    INNER JOIN auth_user AS author ON author.id = post.author_id
+    WHERE post.is_published AND category.is_published
+        AND post.pub_date < %s
+'''
+
+
+def fill_feed(apps, schema_editor):
+    schema_editor.execute(FILL_SQL, [timezone.now()])
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+        ('blog', '0014_rendered_text'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='FeedEntry',
+            fields=[
+                ('post', models.OneToOneField(on_delete=django.db.models.deletion.CASCADE, primary_key=True, related_name='feed_entry', serialize=False, to='blog.post')),
+                ('pub_date', models.DateTimeField()),
+                ('title', models.CharField(max_length=256)),
+                ('excerpt', models.TextField()),
+                ('image', models.ImageField(blank=True, upload_to='posts_images')),
+                ('image_renditions', models.JSONField(blank=True, default=dict)),
+                ('comment_count', models.PositiveIntegerField(default=0)),
+                ('category_title', models.CharField(max_length=256)),
+                ('category_slug', models.SlugField()),
+                ('location_name', models.CharField(blank=True, max_length=256)),
+                ('author_username', models.CharField(max_length=150)),
+                ('author', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='+', to=settings.AUTH_USER_MODEL)),
+                ('category', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='+', to='blog.category')),
+                ('location', models.ForeignKey(null=True, on_delete=django.db.models.deletion.SET_NULL, related_name='+', to='blog.location')),
+            ],
+            options={
+                'verbose_name': 'запись ленты',
+                'verbose_name_plural': 'Лента',
+            },
+        ),
+        migrations.AddIndex(
+            model_name='feedentry',
+            index=models.Index(fields=['-pub_date', '-post'], name='feed_pub_date_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='feedentry',
+            index=models.Index(fields=['category', '-pub_date', '-post'], name='feed_category_pub_date_idx'),
+        ),
+        migrations.RunPython(fill_feed, migrations.RunPython.noop),
+    ]
@@ -0,0 +1,18 @@
+from django.db import migrations
+from django.utils import timezone
+
+
+def hide_scheduled(apps, schema_editor):
+    FeedEntry = apps.get_model('blog', 'FeedEntry')
+    FeedEntry.objects.filter(pub_date__gte=timezone.now()).delete()
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('blog', '0015_feed_entry'),
+    ]
+
+    operations = [
+        migrations.RunPython(hide_scheduled, migrations.RunPython.noop),
+    ]
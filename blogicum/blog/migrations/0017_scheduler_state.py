@@ -0,0 +1,24 @@
+# Generated by Django 3.2.16 on 2026-10-17 06:31
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('blog', '0016_hide_scheduled_feed_entries'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='SchedulerState',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('last_tick', models.DateTimeField(null=True, verbose_name='Время прошлого тика')),
+            ],
+            options={
+                'verbose_name': 'состояние планировщика',
+                'verbose_name_plural': 'Состояние планировщика',
+            },
+        ),
+    ]
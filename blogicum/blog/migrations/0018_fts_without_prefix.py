@@ -0,0 +1,44 @@
+from django.db import migrations
+
+# Префиксный индекс prefix = '3' из 0013 не нужен: поиск раскрывает
+# слово в точные формы (см. blog.search.word_forms) и не делает
+# префиксных запросов, а индекс увеличивал таблицы и каждую запись.
+TOKENIZE = "tokenize = 'unicode61 remove_diacritics 2'"
+
+
+def norm(column):
+    return f"replace(replace({column}, 'ё', 'е'), 'Ё', 'Е')"
+
+
+def rebuild(prefix):
+    options = TOKENIZE + (f", prefix = '{prefix}'" if prefix else '')
+
+    def operation(apps, schema_editor):
+        if schema_editor.connection.vendor != 'sqlite':
+            return
+        for statement in (
+            "DROP TABLE IF EXISTS blog_post_fts",
+            "DROP TABLE IF EXISTS blog_comment_fts",
+            f"CREATE VIRTUAL TABLE blog_post_fts USING fts5("
+            f"title, text, content = '', {options})",
+            f"CREATE VIRTUAL TABLE blog_comment_fts USING fts5("
+            f"text, content = '', {options})",
+            f"""INSERT INTO blog_post_fts (rowid, title, text)
+                SELECT id, {norm('title')}, {norm('text')}
+                FROM blog_post""",
+            f"""INSERT INTO blog_comment_fts (rowid, text)
+                SELECT id, {norm('text')} FROM blog_comment""",
+        ):
+            schema_editor.execute(statement)
+    return operation
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('blog', '0017_scheduler_state'),
+    ]
+
+    operations = [
+        migrations.RunPython(rebuild(None), rebuild('3')),
+    ]
@@ -0,0 +1,17 @@
+# Generated by Django 3.2.16 on 2026-10-17 06:57
+
+from django.db import migrations
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('blog', '0018_fts_without_prefix'),
+    ]
+
+    operations = [
+        migrations.RemoveIndex(
+            model_name='post',
+            name='post_category_pub_date_idx',
+        ),
+    ]
@@ -1,9 +1,49 @@
 """Модели проекта."""
+from contextlib import contextmanager
+from contextvars import ContextVar
+from datetime import datetime
+
+from django.conf import settings
 from django.contrib.auth import get_user_model
-from django.db import models
+from django.db import models, transaction
+from django.utils import timezone
+
+from .cache import (INDEX_TAG, author_tag, bump, card_tag, category_tag,
+                    post_tag)
+from .rendering import make_excerpt, render_html, with_rendered_fields
+from .images import CARD_IMAGE_WIDTH, delete_renditions, make_renditions
 
 User = get_user_model()
 
+# Посты, удаляемые прямо сейчас: их комментарии удаляются каскадом,
+# и сигналам незачем пересчитывать счётчик и теги для каждого.
+deleting_posts = ContextVar('blog_deleting_posts', default=frozenset())
+
+
+@contextmanager
+def posts_deleted(pks):
+    """Пометка постов удаляемыми на время удаления, даже при откате."""
+    token = deleting_posts.set(deleting_posts.get() | set(pks))
+    try:
+        yield
+    finally:
+        deleting_posts.reset(token)
+
+
+def rounded_now():
+    """Текущее время, округлённое вниз до POST_VISIBILITY_BUCKET секунд.
+
+    Внутри одного интервала запросы лент дают одинаковый SQL
+    с одинаковыми параметрами, и их можно кешировать.
+    """
+    bucket = getattr(settings, 'POST_VISIBILITY_BUCKET', 30)
+    now = timezone.now()
+    if not bucket:
+        return now
+    timestamp = now.timestamp()
+    return datetime.fromtimestamp(timestamp - timestamp % bucket,
+                                  tz=now.tzinfo)
+
 
 class PublishedModel(models.Model):
     """Абстракт для публикации."""
@@ -36,6 +76,8 @@ class Comment(models.Model):
     """Модель Comment."""
 
     text = models.TextField(verbose_name='Текст')
+    text_html = models.TextField(default='', editable=False,
+                                 verbose_name='Текст в HTML')
     author = models.ForeignKey(
         User,
         on_delete=models.CASCADE, )
@@ -51,6 +93,22 @@ class Comment(models.Model):
         verbose_name = 'комментарий'
         verbose_name_plural = 'Комментарии'
         ordering = ('created_at',)
+        indexes = (
+            models.Index(fields=('post', 'created_at'),
+                         name='comment_post_created_idx'),
+        )
+
+    def render_text(self):
+        """Пересчёт HTML текста."""
+        self.text_html = render_html(self.text)
+
+    def save(self, *args, **kwargs):
+        """Сохранение вместе с HTML текста."""
+        self.render_text()
+        if kwargs.get('update_fields') is not None:
+            kwargs['update_fields'] = with_rendered_fields(
+                kwargs['update_fields'], ('text_html',))
+        super().save(*args, **kwargs)
 
 
 class Category(PublishedModel, CreatedModel):
@@ -94,12 +152,53 @@ class Location(PublishedModel, CreatedModel):
         return self.name
 
 
+class PublishedPostQuerySet(models.QuerySet):
+    """Queryset публикаций с общим условием видимости."""
+
+    @staticmethod
+    def visible_q(now=None):
+        """Условие видимости публикации для читателей."""
+        return models.Q(is_published=True,
+                        category__is_published=True,
+                        pub_date__lt=now or rounded_now())
+
+    def delete(self):
+        """Удаление без пересчёта постов на каждый их комментарий."""
+        with posts_deleted(self.values_list('pk', flat=True)):
+            return super().delete()
+
+    delete.alters_data = True
+    delete.queryset_only = True
+
+    def with_relations(self):
+        """Публикации вместе с категорией, местом и автором."""
+        return self.select_related('category', 'location', 'author')
+
+    def for_cards(self):
+        """Публикации для карточек лент: без полного текста."""
+        return self.with_relations().defer('text', 'text_html')
+
+    def visible(self, now=None):
+        """Опубликованные публикации с наступившей датой."""
+        return self.filter(self.visible_q(now))
+
+    def visible_for(self, user, now=None):
+        """Видимые публикации плюс все публикации самого автора."""
+        if not user.is_authenticated:
+            return self.visible(now)
+        return self.filter(self.visible_q(now) | models.Q(author=user))
+
+
 class Post(PublishedModel, CreatedModel):
     """Модель Post."""
 
     title = models.CharField(max_length=256,
                              verbose_name='Заголовок')
     text = models.TextField(verbose_name='Текст')
+    text_html = models.TextField(default='', editable=False,
+                                 verbose_name='Текст в HTML')
+    excerpt = models.TextField(default='', editable=False,
+                               verbose_name='Начало текста')
     pub_date = models.DateTimeField(
         verbose_name='Дата и время публикации',
         help_text='Если установить дату и время в будущем'
@@ -122,13 +221,227 @@ class Post(PublishedModel, CreatedModel):
     image = models.ImageField('Изображение публикации',
                               upload_to='posts_images',
                               blank=True)
+    comment_count = models.PositiveIntegerField(
+        default=0,
+        editable=False,
+        verbose_name='Количество комментариев')
+    image_renditions = models.JSONField(
+        default=dict,
+        blank=True,
+        editable=False,
+        verbose_name='Уменьшенные копии изображения')
+
+    objects = PublishedPostQuerySet.as_manager()
 
     class Meta:
         """Meta модели Post."""
 
         verbose_name = 'публикация'
         verbose_name_plural = 'Публикации'
+        # Ленты главной и категорий читают FeedEntry; по дате
+        # публикации Post ищут только тики планировщика
+        # (blog.scheduler), а профиль — по автору.
+        indexes = (
+            models.Index(fields=('-pub_date', '-id'),
+                         condition=models.Q(is_published=True),
+                         name='post_visible_pub_date_idx'),
+            models.Index(fields=('author', '-pub_date', '-id'),
+                         name='post_author_pub_date_idx'),
+        )
 
     def __str__(self) -> str:
         """Переопределение вывода."""
         return self.title
+
+    @classmethod
+    def from_db(cls, db, field_names, values):
+        """Экземпляр из базы с запомненными категорией и автором.
+
+        По ним сигналы узнают, сменились ли ленты публикации,
+        не перечитывая её из базы перед сохранением.
+        """
+        instance = super().from_db(db, field_names, values)
+        loaded = dict(zip(field_names, values))
+        instance._saved_feed_ids = (loaded.get('category_id'),
+                                    loaded.get('author_id'))
+        return instance
+
+    def render_text(self):
+        """Пересчёт HTML и начала текста."""
+        self.text_html = render_html(self.text)
+        self.excerpt = make_excerpt(self.text)
+
+    def delete(self, *args, **kwargs):
+        """Удаление без пересчёта поста на каждый его комментарий."""
+        with posts_deleted([self.pk]):
+            return super().delete(*args, **kwargs)
+
+    def save(self, *args, **kwargs):
+        """Сохранение с HTML текста и обновлением копий изображения."""
+        self.render_text()
+        if kwargs.get('update_fields') is not None:
+            kwargs['update_fields'] = with_rendered_fields(
+                kwargs['update_fields'], ('text_html', 'excerpt'))
+        super().save(*args, **kwargs)
+        self._saved_feed_ids = (self.category_id, self.author_id)
+        if self.renditions_stale():
+            transaction.on_commit(self.refresh_image_renditions,
+                                  using=self._state.db)
+
+    def renditions_stale(self):
+        """Копии сделаны не для текущего изображения."""
+        source = (self.image_renditions or {}).get('source')
+        return source != (self.image.name or None)
+
+    def refresh_image_renditions(self, force=False):
+        """Пересоздание копий, если изображение сменилось.
+
+        save() вызывает её после коммита: файлы копий не создаются
+        для откатившейся записи, а ресайз не держит блокировку базы.
+        """
+        if not force and not self.renditions_stale():
+            return
+        old = self.image_renditions or {}
+        self.image_renditions = (
+            make_renditions(self.image) if self.image else {})
+        Post.objects.filter(pk=self.pk).update(
+            image_renditions=self.image_renditions)
+        FeedEntry.objects.filter(post_id=self.pk).update(
+            image_renditions=self.image_renditions)
+        delete_renditions(self.image.storage, old)
+        row = Post.objects.filter(pk=self.pk).values(
+            'category__slug', 'author__username').first()
+        tags = [post_tag(self.pk), card_tag('post', self.pk), INDEX_TAG]
+        if row is not None:
+            tags.append(author_tag(row['author__username']))
+            if row['category__slug']:
+                tags.append(category_tag(row['category__slug']))
+        bump(*tags)
+
+    @property
+    def image_srcset(self):
+        """Значение srcset для тега img."""
+        storage = self.image.storage
+        return ', '.join(
+            f'{storage.url(rendition["name"])} {rendition["width"]}w'
+            for rendition in (self.image_renditions or {}).get(
+                'renditions', ()))
+
+    @property
+    def image_preview(self):
+        """Копия для карточки шириной 40rem или исходный файл."""
+        renditions = (self.image_renditions or {}).get('renditions')
+        if not renditions:
+            return {'url': self.image.url}
+        preview = next((rendition for rendition in renditions
+                        if rendition['width'] >= CARD_IMAGE_WIDTH),
+                       renditions[-1])
+        return dict(preview, url=self.image.storage.url(preview['name']))
+
+
+class FeedEntryQuerySet(models.QuerySet):
+    """Queryset записей ленты."""
+
+    def visible(self):
+        """Записи, видимые читателям.
+
+        Снятые с публикации, отложенные посты и посты скрытых
+        категорий в таблицу не попадают (см. blog.scheduler), поэтому
+        запрос не зависит от текущего времени и кешируется целиком.
+        """
+        return self.all()
+
+
+class FeedEntry(models.Model):
+    """Строка ленты: всё, что нужно карточке опубликованного поста.
+
+    Таблица поддерживается сигналами (см. blog.feed) и отложенной
+    публикацией (blog.scheduler) и содержит только посты, видимые
+    читателям, так что ленты
+    главной и категории читают одну узкую таблицу без JOIN.
+    """
+
+    post = models.OneToOneField(
+        Post,
+        on_delete=models.CASCADE,
+        primary_key=True,
+        related_name='feed_entry')
+    pub_date = models.DateTimeField()
+    title = models.CharField(max_length=256)
+    excerpt = models.TextField()
+    image = models.ImageField(upload_to='posts_images', blank=True)
+    image_renditions = models.JSONField(default=dict, blank=True)
+    comment_count = models.PositiveIntegerField(default=0)
+    category = models.ForeignKey(
+        Category,
+        on_delete=models.CASCADE,
+        related_name='+')
+    category_title = models.CharField(max_length=256)
+    category_slug = models.SlugField()
+    location = models.ForeignKey(
+        Location,
+        on_delete=models.SET_NULL,
+        null=True,
+        related_name='+')
+    location_name = models.CharField(max_length=256, blank=True)
+    author = models.ForeignKey(
+        User,
+        on_delete=models.CASCADE,
+        related_name='+')
+    author_username = models.CharField(max_length=150)
+
+    objects = FeedEntryQuerySet.as_manager()
+
+    class Meta:
+        """Meta модели FeedEntry."""
+
+        verbose_name = 'запись ленты'
+        verbose_name_plural = 'Лента'
+        indexes = (
+            models.Index(fields=('-pub_date', '-post'),
+                         name='feed_pub_date_idx'),
+            models.Index(fields=('category', '-pub_date', '-post'),
+                         name='feed_category_pub_date_idx'),
+        )
+
+    def __str__(self) -> str:
+        """Переопределение вывода."""
+        return self.title
+
+    def as_post(self):
+        """Post для карточки без запросов к базе.
+
+        Заполнены только поля, которые выводит includes/post_card.html.
+        """
+        post = Post(
+            id=self.post_id, title=self.title, excerpt=self.excerpt,
+            pub_date=self.pub_date, image=self.image.name,
+            image_renditions=self.image_renditions,
+            comment_count=self.comment_count, is_published=True,
+            category=Category(id=self.category_id, title=self.category_title,
+                              slug=self.category_slug, is_published=True),
+            author=User(id=self.author_id, username=self.author_username))
+        if self.location_id is not None:
+            post.location = Location(id=self.location_id,
+                                     name=self.location_name,
+                                     is_published=bool(self.location_name))
+        post._state.adding = False
+        post._state.db = self._state.db
+        return post
+
+
+class SchedulerState(models.Model):
+    """Состояние планировщика отложенных публикаций: одна строка.
+
+    Время прошлого тика хранится в базе, а не в кеше, чтобы его
+    видели все процессы, в том числе запуски из cron.
+    """
+
+    last_tick = models.DateTimeField(null=True,
+                                     verbose_name='Время прошлого тика')
+
+    class Meta:
+        """Meta модели SchedulerState."""
+
+        verbose_name = 'состояние планировщика'
+        verbose_name_plural = 'Состояние планировщика'
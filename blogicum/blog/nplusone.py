@@ -0,0 +1,93 @@
+"""Поиск N+1: однотипных SELECT внутри одного HTTP-запроса.
+
+detect() считает SELECT по отпечатку (см. blog.slowlog.fingerprint)
+и для первых повторов запоминает, откуда они пришли: строку шаблона,
+если запрос выполнен при отрисовке, и ближайший кадр кода проекта.
+Отпечаток, встретившийся NPLUSONE_THRESHOLD раз и больше, — почти
+всегда забытый select_related или prefetch_related.
+"""
+import os
+import sys
+from contextlib import ExitStack, contextmanager
+
+from django.conf import settings
+from django.db import connections
+
+from .slowlog import fingerprint, frame_summary, is_project_file
+
+LOCATIONS_KEPT = 3
+TEMPLATE_BASE = os.path.join('django', 'template', 'base.py')
+
+
+class NPlusOneError(AssertionError):
+    """Найдены повторяющиеся однотипные запросы."""
+
+
+def query_location():
+    """Строка шаблона и кадр кода проекта, выполнившие запрос.
+
+    Строка шаблона берётся у самого вложенного отрисовываемого узла:
+    Node.render_annotated держит узел с токеном и именем шаблона.
+    """
+    template = code = None
+    frame = sys._getframe(1)
+    while frame is not None and (template is None or code is None):
+        filename = frame.f_code.co_filename
+        if (template is None and frame.f_code.co_name == 'render_annotated'
+                and filename.endswith(TEMPLATE_BASE)):
+            node = frame.f_locals.get('self')
+            token = getattr(node, 'token', None)
+            origin = getattr(node, 'origin', None)
+            if token is not None and origin is not None:
+                template = f'{origin.template_name}:{token.lineno}'
+        if code is None and is_project_file(filename):
+            code = frame_summary(filename, frame.f_lineno,
+                                 frame.f_code.co_name)
+        frame = frame.f_back
+    return template, code
+
+
+class QueryShapeDetector:
+    """Счётчик SELECT по отпечаткам для execute_wrapper."""
+
+    def __init__(self, threshold=None):
+        """Порог повторов; по умолчанию NPLUSONE_THRESHOLD."""
+        self.threshold = threshold or getattr(
+            settings, 'NPLUSONE_THRESHOLD', 3)
+        self.shapes = {}
+
+    def execute(self, execute, sql, params, many, context):
+        """Обёртка connection.execute_wrapper."""
+        if sql.lstrip()[:6].upper().startswith(('SELECT', 'WITH')):
+            shape = fingerprint(sql)
+            count, locations = self.shapes.get(shape, (0, []))
+            if len(locations) < LOCATIONS_KEPT:
+                locations.append(query_location())
+            self.shapes[shape] = (count + 1, locations)
+        return execute(sql, params, many, context)
+
+    def problems(self):
+        """Отпечатки, повторившиеся не меньше порога, и места вызова."""
+        return [(shape, count, locations)
+                for shape, (count, locations) in self.shapes.items()
+                if count >= self.threshold]
+
+    def report(self, title=''):
+        """Описание найденных N+1 для лога и сообщения об ошибке."""
+        lines = [f'N+1 {title}'.rstrip() + ':']
+        for shape, count, locations in self.problems():
+            lines.append(f'  {count}x {shape[:300]}')
+            for template, code in dict.fromkeys(locations):
+                lines.append(f'    шаблон {template or "—"}, '
+                             f'код {code or "—"}')
+        return '\n'.join(lines)
+
+
+@contextmanager
+def detect(threshold=None):
+    """Поиск N+1 в запросах ко всем базам внутри блока."""
+    detector = QueryShapeDetector(threshold)
+    with ExitStack() as stack:
+        for connection in connections.all():
+            stack.enter_context(connection.execute_wrapper(detector.execute))
+        yield detector
@@ -0,0 +1,126 @@
+"""Замеры одного запроса: SQL, шаблоны и кеш.
+
+collect() собирает числа в RequestTimings, пока выполняется блок:
+SQL — через connection.execute_wrapper на всех базах (медленные
+запросы отбираются для blog.slowlog), шаблоны — через обёртку
+Template._render, кеш — через record_cache() в местах, где
+приложение читает свой кеш. Обёртка шаблонов ставится один раз
+и вне collect() стоит одного ContextVar.get() на шаблон.
+"""
+import hmac
+import time
+from contextlib import ExitStack, contextmanager
+from contextvars import ContextVar
+
+from django.db import connections
+from django.template.base import Template
+
+from .slowlog import stack_summary
+
+_current = ContextVar('blog_request_timings', default=None)
+
+
+class RequestTimings:
+    """Счётчики одного запроса; время — в секундах."""
+
+    __slots__ = ('queries', 'sql', 'template', 'depth',
+                 'cache_hits', 'cache_misses', 'slow_threshold', 'slow')
+
+    def __init__(self, slow_threshold=None):
+        """Пустые счётчики; slow_threshold — порог медленного SQL."""
+        self.slow_threshold = slow_threshold
+        self.slow = []
+        self.queries = 0
+        self.sql = 0.0
+        self.template = 0.0
+        self.depth = 0
+        self.cache_hits = 0
+        self.cache_misses = 0
+
+    def execute(self, execute, sql, params, many, context):
+        """Обёртка connection.execute_wrapper."""
+        started = time.perf_counter()
+        try:
+            return execute(sql, params, many, context)
+        finally:
+            elapsed = time.perf_counter() - started
+            self.queries += 1
+            self.sql += elapsed
+            if (self.slow_threshold is not None
+                    and elapsed >= self.slow_threshold):
+                self.slow.append((sql, elapsed, stack_summary()))
+
+
+def record_cache(hits=0, misses=0):
+    """Учёт попаданий и промахов кеша в текущем запросе."""
+    timings = _current.get()
+    if timings is not None:
+        timings.cache_hits += hits
+        timings.cache_misses += misses
+
+
+def _timed_render(render):
+    """Обёртка Template._render, считающая шаблоны верхнего уровня.
+
+    Вложенные include и extends учитываются внутри внешнего
+    шаблона, поэтому время не суммируется дважды.
+    """
+    def timed_render(template, context):
+        timings = _current.get()
+        if timings is None:
+            return render(template, context)
+        timings.depth += 1
+        started = time.perf_counter()
+        try:
+            return render(template, context)
+        finally:
+            timings.depth -= 1
+            if not timings.depth:
+                timings.template += time.perf_counter() - started
+
+    timed_render.timed = True
+    return timed_render
+
+
+def install_template_timer():
+    """Установка обёртки Template._render, если её ещё нет."""
+    if not getattr(Template._render, 'timed', False):
+        Template._render = _timed_render(Template._render)
+
+
+@contextmanager
+def collect(slow_threshold=None):
+    """Сбор замеров внутри блока.
+
+    Вложенный collect() отдаёт внешний накопитель, так что запрос
+    под бенчмарком и middleware считаются один раз.
+    slow_threshold — порог в секундах, после которого SQL вместе
+    со стеком попадает в RequestTimings.slow.
+    """
+    timings = _current.get()
+    if timings is not None:
+        yield timings
+        return
+    install_template_timer()
+    timings = RequestTimings(slow_threshold)
+    token = _current.set(timings)
+    try:
+        with ExitStack() as stack:
+            for connection in connections.all():
+                stack.enter_context(
+                    connection.execute_wrapper(timings.execute))
+            yield timings
+    finally:
+        _current.reset(token)
+
+
+def token_matches(supplied, token):
+    """Совпадение переданного клиентом токена с настройкой.
+
+    Доступ к диагностике даёт токен, а не адрес клиента: за обратным
+    прокси REMOTE_ADDR у всех запросов один. Без токена в настройках
+    доступа нет ни у кого.
+    """
+    if not token or not supplied:
+        return False
+    return hmac.compare_digest(supplied.encode(), token.encode())
@@ -0,0 +1,22 @@
+"""HTML и начало текста, которые хранятся рядом с текстом."""
+from django.template.defaultfilters import linebreaksbr
+from django.utils.text import Truncator
+
+EXCERPT_WORDS = 10
+
+
+def render_html(text):
+    """Готовый к выводу HTML: экранирование и переносы, как linebreaksbr."""
+    return linebreaksbr(text or '', autoescape=True)
+
+
+def make_excerpt(text):
+    """Первые EXCERPT_WORDS слов, как фильтр truncatewords."""
+    return Truncator(text or '').words(EXCERPT_WORDS, truncate=' …')
+
+
+def with_rendered_fields(update_fields, rendered):
+    """update_fields вместе с полями rendered, если меняется text."""
+    if update_fields is None or 'text' not in update_fields:
+        return update_fields
+    return {*update_fields, *rendered}
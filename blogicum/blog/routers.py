@@ -0,0 +1,93 @@
+"""Чтение с реплики базы для страниц, которые ничего не пишут.
+
+Реплика — псевдоним REPLICA_ALIAS в DATABASES. Чтение уходит на неё
+только внутри replica_reads() или после enable_replica_reads():
+ReplicaRoutingMiddleware включает его для представлений с атрибутом
+replica_reads = True. Всё остальное, включая записи и сессии, идёт
+в основную базу.
+"""
+import os
+import sqlite3
+from contextlib import contextmanager
+from contextvars import ContextVar
+
+from django.db import DEFAULT_DB_ALIAS, connections
+
+REPLICA_ALIAS = 'replica'
+
+_reads_on_replica = ContextVar('blog_reads_on_replica', default=False)
+
+
+def replica_configured():
+    """Объявлена ли реплика в DATABASES."""
+    return REPLICA_ALIAS in connections.databases
+
+
+@contextmanager
+def replica_reads(enabled=True):
+    """Чтение с реплики внутри блока."""
+    token = _reads_on_replica.set(enabled)
+    try:
+        yield
+    finally:
+        _reads_on_replica.reset(token)
+
+
+def enable_replica_reads():
+    """Чтение с реплики до выхода из внешнего блока replica_reads().
+
+    Нужно там, где блок открыть нельзя: например, в process_view
+    middleware, которое само оборачивает запрос в replica_reads(False).
+    """
+    _reads_on_replica.set(True)
+
+
+class ReplicaRouter:
+    """Роутер: чтение на реплику внутри replica_reads(), запись в основную.
+
+    Для чтения вне replica_reads() основная база возвращается явно:
+    иначе Django взял бы базу объекта-подсказки, загруженного
+    с реплики, и связанные запросы ушли бы туда же.
+    """
+
+    def db_for_read(self, model, **hints):
+        """База для чтения."""
+        if (_reads_on_replica.get() and replica_configured()
+                and model._meta.app_label != 'sessions'):
+            return REPLICA_ALIAS
+        return DEFAULT_DB_ALIAS
+
+    def db_for_write(self, model, **hints):
+        """База для записи."""
+        return DEFAULT_DB_ALIAS
+
+    def allow_relation(self, obj1, obj2, **hints):
+        """Реплика содержит те же данные, что и основная база."""
+        return True
+
+    def allow_migrate(self, db, app_label, model_name=None, **hints):
+        """Схема реплики приходит вместе с копией основной базы."""
+        return db != REPLICA_ALIAS
+
+
+def copy_sqlite(source, target):
+    """Согласованная копия базы SQLite source в файл target.
+
+    Копия собирается во временном файле через backup API и заменяет
+    target атомарно, поэтому читатели реплики видят либо старую,
+    либо новую версию целиком. Копия переводится в режим журнала
+    DELETE, чтобы рядом с репликой не оставались файлы -wal и -shm
+    от прежней версии.
+    """
+    temporary = f'{target}.tmp'
+    if os.path.exists(temporary):
+        os.remove(temporary)
+    primary = sqlite3.connect(source)
+    copy = sqlite3.connect(temporary)
+    try:
+        primary.backup(copy)
+        copy.execute('PRAGMA journal_mode = DELETE').fetchall()
+    finally:
+        copy.close()
+        primary.close()
+    os.replace(temporary, target)
@@ -0,0 +1,93 @@
+"""Отложенная публикация постов.
+
+Пост с будущей датой не попадает в таблицу ленты FeedEntry:
+наличие строки и есть хранимое состояние «опубликован сейчас»,
+поэтому запросы лент не сравнивают дату со временем.
+activate_due() добавляет строки для наступивших публикаций
+и инвалидирует только затронутые страницы; её вызывает команда
+manage.py publish_scheduled — из cron или в режиме --loop
+(см. README).
+
+Главная страница и ленты категорий читают только FeedEntry
+(FeedEntryQuerySet.visible() — это self.all()), поэтому пост
+с будущей датой не появится в них, пока не запущен планировщик,
+даже когда дата наступила. Страница поста сравнивает дату со
+временем сама, а профиль показывает все посты автора, так что
+от планировщика они не зависят.
+
+Время прошлого тика хранится в базе (SchedulerState), поэтому
+каждый запуск из cron проверяет только посты новее прошлого тика.
+"""
+from datetime import timedelta
+
+from django.db import transaction
+from django.utils import timezone
+
+from . import feed
+from .cache import INDEX_TAG, author_tag, bump, category_tag, post_tag
+from .models import Post, SchedulerState
+
+STATE_PK = 1
+BATCH_SIZE = 500
+# Запас на транзакции, закоммиченные после чтения прошлого тика.
+OVERLAP = timedelta(minutes=1)
+
+
+def due_posts(now, since=None):
+    """Наступившие публикации, которых ещё нет в ленте.
+
+    since — нижняя граница даты публикации; None — все посты.
+    """
+    posts = Post.objects.filter(
+        is_published=True, category__is_published=True,
+        pub_date__lt=now, feed_entry__isnull=True)
+    if since is not None:
+        posts = posts.filter(pub_date__gte=since)
+    return posts.values_list('pk', 'category__slug', 'author__username')
+
+
+def last_tick():
+    """Время прошлого тика или None, если тиков не было."""
+    return SchedulerState.objects.filter(pk=STATE_PK).values_list(
+        'last_tick', flat=True).first()
+
+
+def activate_due(now=None, catch_up=False):
+    """Добавление в ленту наступивших публикаций.
+
+    Проверяются только посты с датой после прошлого тика: более
+    старые активировал он сам или сигнал сохранения. Без сведений
+    о прошлом тике или с catch_up перебираются все посты — это
+    нужно и после правок базы в обход сигналов.
+    Возвращает число активированных постов.
+    """
+    now = now or timezone.now()
+    since = None if catch_up else last_tick()
+    with transaction.atomic():
+        rows = list(due_posts(now, since - OVERLAP if since else None))
+        for start in range(0, len(rows), BATCH_SIZE):
+            ids = [pk for pk, _, _ in rows[start:start + BATCH_SIZE]]
+            feed.fill(
+                'post.id IN ({})'.format(', '.join(['%s'] * len(ids))),
+                ids, now=now)
+        SchedulerState.objects.update_or_create(
+            pk=STATE_PK, defaults={'last_tick': now})
+    if rows:
+        tags = {INDEX_TAG}
+        for pk, slug, username in rows:
+            tags.update((post_tag(pk), category_tag(slug),
+                         author_tag(username)))
+        bump(*tags)
+    return len(rows)
+
+
+def scheduled_posts(now):
+    """Даты отложенных публикаций, начиная с ближайшей."""
+    return Post.objects.filter(
+        is_published=True, category__is_published=True, pub_date__gte=now,
+    ).order_by('pub_date').values_list('pub_date', flat=True)
+
+
+def next_due(now=None):
+    """Дата ближайшей отложенной публикации или None."""
+    return scheduled_posts(now or timezone.now()).first()
@@ -0,0 +1,225 @@
+"""Полнотекстовый поиск по публикациям и комментариям.
+
+В SQLite поиск идёт по таблицам FTS5 blog_post_fts и blog_comment_fts
+(миграция 0013_search_fts), которые триггеры держат в согласии
+с blog_post и blog_comment. Результаты ранжируются bm25, заголовок
+весит больше текста, совпадение в комментариях — меньше, чем
+в самой публикации.
+
+bm25 считается не для всех совпадений, а для SEARCH_CANDIDATES
+самых новых видимых публикаций и комментариев к ним: FTS5 отдаёт
+совпадения по rowid без сортировки по рангу, видимость проверяется
+по первичному ключу для каждого совпадения до LIMIT, и время ответа
+не растёт с частотой слова. Поэтому более старые совпадения за
+пределами кандидатов в выдачу не попадают даже с высоким рангом;
+глубину задаёт settings.SEARCH_CANDIDATES.
+"""
+import re
+
+from django.conf import settings
+from django.db import connection
+from django.db.models import Q
+from django.db.models.expressions import RawSQL
+from django.utils.encoding import force_bytes, force_str
+from django.utils.http import urlsafe_base64_decode, urlsafe_base64_encode
+
+from .models import Post, rounded_now
+from .paginators import NEXT, PREVIOUS, CursorPage
+
+MAX_TERMS = 8
+MIN_STEM = 3
+TITLE_WEIGHT = 10.0
+TEXT_WEIGHT = 1.0
+COMMENT_WEIGHT = 0.5
+
+TOKEN_RE = re.compile(r'\w+')
+CYRILLIC_RE = re.compile('[а-я]')
+# Окончания русских слов, от длинных к коротким. Слово запроса
+# раскрывается в основу со всеми окончаниями, так что «публикации»
+# находит и «публикация», и «публикаций».
+RUSSIAN_ENDINGS = sorted((
+    'ами', 'ями', 'ого', 'его', 'ому', 'ему', 'ыми', 'ими', 'иях',
+    'ах', 'ях', 'ов', 'ев', 'ей', 'ой', 'ый', 'ий', 'ая', 'яя', 'ое',
+    'ее', 'ые', 'ие', 'ом', 'ем', 'ую', 'юю', 'ам', 'ям', 'ть', 'ия',
+    'а', 'я', 'о', 'е', 'ы', 'и', 'у', 'ю', 'ь', 'й',
+), key=len, reverse=True)
+
+
+def normalize(text):
+    """Нижний регистр и ё → е, как в триггерах индекса."""
+    return text.lower().replace('ё', 'е')
+
+
+def stem(word):
+    """Основа русского слова для префиксного поиска."""
+    if not CYRILLIC_RE.search(word):
+        return word
+    for ending in RUSSIAN_ENDINGS:
+        if word.endswith(ending) and len(word) - len(ending) >= MIN_STEM:
+            return word[:-len(ending)]
+    return word
+
+
+def word_forms(word):
+    """Формы слова для поиска: основа со всеми окончаниями.
+
+    Префиксный запрос «основа*» в FTS5 сначала сливает списки всех
+    подходящих термов и на частых основах стоит сотни миллисекунд,
+    а OR точных форм читается лениво в порядке rowid.
+    """
+    base = stem(word)
+    if base == word and not CYRILLIC_RE.search(word):
+        return [word]
+    forms = [word, base] + [base + ending for ending in RUSSIAN_ENDINGS]
+    return list(dict.fromkeys(forms))
+
+
+def match_expression(query):
+    """Выражение MATCH для FTS5 или None, если искать нечего.
+
+    Все слова запроса должны встретиться в документе. Формы слов
+    берутся в кавычки, поэтому операторы FTS5 из пользовательского
+    ввода не работают.
+    """
+    words = list(dict.fromkeys(TOKEN_RE.findall(normalize(query))))
+    if not words:
+        return None
+    return ' AND '.join(
+        '(' + ' OR '.join(f'"{form}"' for form in word_forms(word)) + ')'
+        for word in words[:MAX_TERMS])
+
+
+class SearchPaginator:
+    """Keyset-пагинатор результатов поиска по паре (ранг, id).
+
+    Ранг bm25 в SQLite отрицательный: чем меньше, тем лучше,
+    поэтому «следующая» страница — это ранги больше курсора.
+    """
+
+    date_field = None
+
+    def __init__(self, query, per_page, now=None, queryset=None):
+        """Поисковый запрос, размер страницы и queryset карточек."""
+        self.query = query
+        self.per_page = int(per_page)
+        self.now = now
+        self.queryset = (queryset if queryset is not None
+                         else Post.objects.for_cards())
+
+    @staticmethod
+    def encode_cursor(direction, obj, date_field=None):
+        """Непрозрачный токен курсора для результата поиска."""
+        value = f'{direction}{obj.search_rank!r}|{obj.pk}'
+        return urlsafe_base64_encode(force_bytes(value))
+
+    @staticmethod
+    def decode_cursor(token):
+        """Разбор токена; при ошибке возвращается None."""
+        try:
+            value = force_str(urlsafe_base64_decode(token))
+            direction, value = value[0], value[1:]
+            rank, pk = value.rsplit('|', 1)
+            rank, pk = float(rank), int(pk)
+        except (TypeError, ValueError, IndexError, UnicodeDecodeError):
+            return None
+        if direction not in (NEXT, PREVIOUS):
+            return None
+        return direction, rank, pk
+
+    def ranked_ids(self, cursor=None, limit=None):
+        """Пары (id, ранг) видимых публикаций в порядке выдачи."""
+        expression = match_expression(self.query)
+        if expression is None:
+            return []
+        if connection.vendor != 'sqlite':
+            return self._fallback_ids(cursor, limit)
+        now = self.now or rounded_now()
+        post_sql, post_params = self._visible_sql(
+            Post.objects.visible(now), 'blog_post_fts.rowid')
+        comment_sql, comment_params = self._visible_sql(
+            Post.objects.visible(now), 'comment.post_id')
+        sql = [f'''
+            WITH post_matches (post_id, rank) AS (
+                SELECT rowid, bm25(blog_post_fts, %s, %s)
+                FROM blog_post_fts WHERE blog_post_fts MATCH %s
+                    AND EXISTS ({post_sql})
+                ORDER BY rowid DESC LIMIT %s
+            ), comment_matches (post_id, rank) AS (
+                SELECT comment.post_id, bm25(blog_comment_fts) * %s
+                FROM blog_comment_fts JOIN blog_comment AS comment
+                    ON comment.id = blog_comment_fts.rowid
+                WHERE blog_comment_fts MATCH %s AND EXISTS ({comment_sql})
+                ORDER BY blog_comment_fts.rowid DESC LIMIT %s
+            ), matches (post_id, rank) AS (
+                SELECT post_id, rank FROM post_matches
+                UNION ALL
+                SELECT post_id, rank FROM comment_matches
+            ), ranked (post_id, rank) AS (
+                SELECT post_id, MIN(rank) FROM matches GROUP BY post_id
+            )
+            SELECT post_id, rank FROM ranked''']
+        candidates = getattr(settings, 'SEARCH_CANDIDATES', 1000)
+        params = [TITLE_WEIGHT, TEXT_WEIGHT, expression, *post_params,
+                  candidates, COMMENT_WEIGHT, expression, *comment_params,
+                  candidates]
+        order = 'ASC'
+        if cursor is not None:
+            direction, rank, pk = cursor
+            sign, order = ('>', 'ASC') if direction == NEXT else ('<', 'DESC')
+            sql.append(f'WHERE (rank {sign} %s OR (rank = %s '
+                       f'AND post_id {sign} %s))')
+            params += [rank, rank, pk]
+        sql.append(f'ORDER BY rank {order}, post_id {order} LIMIT %s')
+        params.append(limit if limit is not None else -1)
+        with connection.cursor() as cursor_:
+            cursor_.execute(' '.join(sql), params)
+            return cursor_.fetchall()
+
+    @staticmethod
+    def _visible_sql(queryset, post_id_sql):
+        """Подзапрос видимости публикации с id из внешнего запроса."""
+        visible = queryset.filter(pk=RawSQL(post_id_sql, ())).values('pk')
+        return visible.query.sql_with_params()
+
+    def _fallback_ids(self, cursor, limit):
+        """Поиск без FTS5 для других баз: медленный icontains.
+
+        Ранг у всех результатов одинаковый, порядок — по id. Слова
+        ищутся по основе, но без замены ё на е в тексте.
+        """
+        condition = Q()
+        for word in TOKEN_RE.findall(normalize(self.query))[:MAX_TERMS]:
+            base = stem(word)
+            condition &= (Q(title__icontains=base) | Q(text__icontains=base)
+                          | Q(comments__text__icontains=base))
+        queryset = Post.objects.visible(self.now).filter(
+            condition).distinct().order_by('pk')
+        if cursor is not None:
+            direction, _, pk = cursor
+            queryset = (queryset.filter(pk__gt=pk) if direction == NEXT
+                        else queryset.filter(pk__lt=pk).order_by('-pk'))
+        ids = queryset.values_list('pk', flat=True)
+        if limit is not None:
+            ids = ids[:limit]
+        return [(pk, 0.0) for pk in ids]
+
+    def get_page(self, token=None):
+        """Страница по токену; битый или пустой токен даёт первую."""
+        cursor = self.decode_cursor(token) if token else None
+        ranked = self.ranked_ids(cursor, self.per_page + 1)
+        has_more = len(ranked) > self.per_page
+        ranked = ranked[:self.per_page]
+        posts = self.queryset.in_bulk([pk for pk, _ in ranked])
+        items = []
+        for pk, rank in ranked:
+            if pk in posts:
+                posts[pk].search_rank = rank
+                items.append(posts[pk])
+        if cursor is None:
+            return CursorPage(items, self,
+                              has_next=has_more, has_previous=False)
+        if cursor[0] == NEXT:
+            return CursorPage(items, self,
+                              has_next=has_more, has_previous=True)
+        return CursorPage(items[::-1], self,
+                          has_next=True, has_previous=has_more)
@@ -0,0 +1,112 @@
+"""Синтетические данные для замеров производительности."""
+import random
+from datetime import timedelta
+
+from django.db import transaction
+from django.utils import timezone
+
+from . import feed
+from .models import Category, Comment, Location, Post, User
+
+SEED_PREFIX = 'seed'
+
+
+def _batched_create(model, objects, batch_size):
+    """bulk_create пачками в одной транзакции."""
+    for obj in objects:
+        if hasattr(obj, 'render_text'):
+            obj.render_text()
+    with transaction.atomic():
+        model.objects.bulk_create(objects, batch_size=batch_size)
+
+
+def _new_pks(model, last_pk):
+    """Первичные ключи, созданные после last_pk."""
+    return list(model.objects.filter(pk__gt=last_pk)
+                .order_by('pk').values_list('pk', flat=True))
+
+
+def _last_pk(model):
+    """Последний первичный ключ модели."""
+    return (model.objects.order_by('-pk')
+            .values_list('pk', flat=True).first() or 0)
+
+
+def seed(users=10, categories=10, locations=10, posts=1000,
+         comments=5000, batch_size=5000, random_seed=0):
+    """Быстрое заполнение базы через bulk_create.
+
+    Сигналы при bulk_create не вызываются, поэтому comment_count
+    выставляется сразу из заранее распределённых комментариев.
+    HTML и начало текста bulk_create сам не считает, поэтому их
+    заполняет render_text() каждого объекта;
+    строки ленты вставляются одним INSERT ... SELECT.
+    Около 5% постов снято с публикации, ещё 5% отложены в будущее.
+    """
+    rnd = random.Random(random_seed)
+    now = timezone.now()
+    tag = f'{SEED_PREFIX}{rnd.getrandbits(32):08x}'
+
+    last_pk = _last_pk(User)
+    _batched_create(User, [
+        User(username=f'{tag}_user{i}', password='!',
+             email=f'{tag}_user{i}@example.com')
+        for i in range(users)
+    ], batch_size)
+    user_pks = _new_pks(User, last_pk)
+
+    last_pk = _last_pk(Category)
+    _batched_create(Category, [
+        Category(title=f'Категория {i}', description='Описание категории',
+                 slug=f'{tag}-category-{i}', is_published=i % 10 != 9)
+        for i in range(categories)
+    ], batch_size)
+    category_pks = _new_pks(Category, last_pk)
+
+    last_pk = _last_pk(Location)
+    _batched_create(Location, [
+        Location(name=f'Место {i}') for i in range(locations)
+    ], batch_size)
+    location_pks = _new_pks(Location, last_pk)
+
+    comment_counts = [0] * posts
+    for _ in range(comments if posts else 0):
+        comment_counts[rnd.randrange(posts)] += 1
+
+    last_pk = _last_pk(Post)
+    for start in range(0, posts, batch_size):
+        _batched_create(Post, [
+            Post(title=f'Публикация {i}',
+                 text=' '.join(['Текст публикации.'] * rnd.randint(5, 50)),
+                 pub_date=now - timedelta(minutes=rnd.randint(-43200,
+                                                              5256000)),
+                 is_published=rnd.random() > 0.05,
+                 author_id=rnd.choice(user_pks),
+                 category_id=rnd.choice(category_pks),
+                 location_id=rnd.choice(location_pks + [None]),
+                 comment_count=comment_counts[i])
+            for i in range(start, min(start + batch_size, posts))
+        ], batch_size)
+    post_pks = _new_pks(Post, last_pk)
+    with transaction.atomic():
+        feed.fill('post.id > %s', [last_pk])
+
+    batch = []
+    for post_pk, count in zip(post_pks, comment_counts):
+        for _ in range(count):
+            batch.append(Comment(post_id=post_pk,
+                                 author_id=rnd.choice(user_pks),
+                                 text='Текст комментария.'))
+        if len(batch) >= batch_size:
+            _batched_create(Comment, batch, batch_size)
+            batch = []
+    if batch:
+        _batched_create(Comment, batch, batch_size)
+
+    return {
+        'users': len(user_pks),
+        'categories': len(category_pks),
+        'locations': len(location_pks),
+        'posts': len(post_pks),
+        'comments': sum(comment_counts),
+    }
@@ -0,0 +1,226 @@
+"""Сигналы приложения Blog."""
+from django.db.models import F
+from django.db.models.signals import (post_delete, post_save, pre_delete,
+                                      pre_save)
+from django.dispatch import receiver
+
+from . import feed
+from .cache import (INDEX_TAG, author_tag, bump, card_tag, category_tag,
+                    post_tag)
+from .models import (Category, Comment, FeedEntry, Location, Post, User,
+                     deleting_posts)
+
+
+@receiver(post_save, sender=Comment)
+def increment_comment_count(sender, instance, created, **kwargs):
+    """Увеличение счётчика комментариев поста."""
+    if created and instance.post_id is not None:
+        Post.objects.filter(pk=instance.post_id).update(
+            comment_count=F('comment_count') + 1)
+        FeedEntry.objects.filter(post_id=instance.post_id).update(
+            comment_count=F('comment_count') + 1)
+
+
+@receiver(post_delete, sender=Comment)
+def decrement_comment_count(sender, instance, **kwargs):
+    """Уменьшение счётчика комментариев поста.
+
+    Срабатывает и при каскадном удалении автора, и при удалении
+    queryset: Collector отправляет post_delete для каждой записи.
+    """
+    if (instance.post_id is not None
+            and instance.post_id not in deleting_posts.get()):
+        Post.objects.filter(
+            pk=instance.post_id, comment_count__gt=0).update(
+            comment_count=F('comment_count') - 1)
+        FeedEntry.objects.filter(
+            post_id=instance.post_id, comment_count__gt=0).update(
+            comment_count=F('comment_count') - 1)
+
+
+@receiver(pre_save, sender=Post)
+@receiver(pre_save, sender=Comment)
+def render_fixture_text(sender, instance, raw=False, **kwargs):
+    """HTML и начало текста для фикстур.
+
+    loaddata сохраняет объекты в обход save(), поэтому поля,
+    которые save() считает из text, заполняются здесь.
+    """
+    if raw:
+        instance.render_text()
+
+
+@receiver(post_save, sender=Post)
+def sync_post_feed_entry(sender, instance, raw=False, **kwargs):
+    """Строка ленты поста; при удалении поста она удаляется каскадом.
+
+    Фикстуры (raw) пропускаются: автор или категория могут загрузиться
+    позже поста, поэтому ленту пересобирает команда loaddata.
+    """
+    if not raw:
+        feed.sync_post(instance.pk)
+
+
+@receiver(pre_save, sender=Category)
+def remember_category_state(sender, instance, **kwargs):
+    """Прежние видимость, название и slug категории."""
+    instance._old_feed_fields = (
+        Category.objects.filter(pk=instance.pk).values(
+            'is_published', 'title', 'slug').first()
+        if instance.pk else None)
+
+
+@receiver(post_save, sender=Category)
+def sync_category_feed_entries(sender, instance, raw=False, **kwargs):
+    """Строки ленты категории: снятие и возврат публикации разом."""
+    if not raw:
+        feed.sync_category(instance,
+                           getattr(instance, '_old_feed_fields', None))
+
+
+@receiver(post_save, sender=Location)
+def sync_location_feed_entries(sender, instance, raw=False, **kwargs):
+    """Название места в строках ленты."""
+    if not raw:
+        feed.sync_location(instance)
+
+
+@receiver(post_save, sender=User)
+def sync_author_feed_entries(sender, instance, update_fields=None,
+                             raw=False, **kwargs):
+    """Имя автора в строках ленты."""
+    if raw or update_fields and set(update_fields) == {'last_login'}:
+        return
+    feed.sync_author(instance)
+
+
+@receiver(pre_save, sender=Post)
+@receiver(pre_delete, sender=Post)
+def remember_post_feeds(sender, instance, signal, **kwargs):
+    """Запоминание прежних категории и автора до изменения.
+
+    Если они не менялись с загрузки, прежние теги совпадают
+    с текущими, и перечитывать публикацию незачем.
+    """
+    if instance.pk is None:
+        instance._old_feed_tags = []
+    elif signal is pre_delete:
+        instance._old_feed_tags = _feed_tags(instance)
+    elif getattr(instance, '_saved_feed_ids', None) == (
+            instance.category_id, instance.author_id):
+        instance._old_feed_tags = []
+    else:
+        instance._old_feed_tags = _post_feed_tags(instance.pk)
+
+
+@receiver(post_save, sender=Post)
+def invalidate_post_pages(sender, instance, **kwargs):
+    """Инвалидация страницы публикации и лент, где она видна."""
+    bump(post_tag(instance.pk), *_feed_tags(instance),
+         *getattr(instance, '_old_feed_tags', []), INDEX_TAG,
+         card_tag('post', instance.pk))
+
+
+@receiver(post_delete, sender=Post)
+def invalidate_deleted_post_pages(sender, instance, **kwargs):
+    """Инвалидация по тегам, запомненным до удаления."""
+    bump(post_tag(instance.pk), *getattr(instance, '_old_feed_tags', []),
+         INDEX_TAG, card_tag('post', instance.pk))
+
+
+@receiver(post_save, sender=Comment)
+@receiver(post_delete, sender=Comment)
+def invalidate_comment_pages(sender, instance, **kwargs):
+    """Инвалидация страницы публикации и лент со счётчиком."""
+    if (instance.post_id is not None
+            and instance.post_id not in deleting_posts.get()):
+        post = (instance.post if Comment.post.is_cached(instance)
+                else None)
+        bump(post_tag(instance.post_id),
+             *(_feed_tags(post) if post is not None
+               else _post_feed_tags(instance.post_id)),
+             INDEX_TAG, card_tag('post', instance.post_id))
+
+
+@receiver(pre_delete, sender=Category)
+def remember_category_posts(sender, instance, **kwargs):
+    """Публикации категории до того, как Collector обнулит их ссылку."""
+    instance._post_pks = list(Post.objects.filter(
+        category_id=instance.pk).values_list('pk', flat=True))
+
+
+@receiver(post_save, sender=Category)
+@receiver(post_delete, sender=Category)
+def invalidate_category_pages(sender, instance, signal, raw=False,
+                              **kwargs):
+    """Лента категории, её карточки, главная и страницы её публикаций.
+
+    Главная и страницы публикаций сбрасываются, только если менялись
+    видимость, название или slug: иначе скрытая публикация ещё
+    отдавалась бы анонимам из кеша. Профили показывают название
+    категории и догоняют изменение за PAGE_CACHE_TIMEOUT.
+    """
+    if raw:
+        return
+    tags = [category_tag(instance.slug), card_tag('category', instance.pk)]
+    old = getattr(instance, '_old_feed_fields', None)
+    if signal is post_delete:
+        post_pks = instance._post_pks
+    elif old is not None and old != {
+            'is_published': instance.is_published,
+            'title': instance.title, 'slug': instance.slug}:
+        post_pks = Post.objects.filter(
+            category_id=instance.pk).values_list('pk', flat=True)
+    else:
+        post_pks = None
+    if old is not None:
+        tags.append(category_tag(old['slug']))
+    if post_pks is not None:
+        tags += [INDEX_TAG, *map(post_tag, post_pks)]
+    bump(*tags)
+
+
+@receiver(post_save, sender=Location)
+@receiver(post_delete, sender=Location)
+def invalidate_location_pages(sender, instance, **kwargs):
+    """Карточки с этим местом и главная, чьи строки ленты обновлены."""
+    bump(card_tag('location', instance.pk), INDEX_TAG)
+
+
+@receiver(post_save, sender=User)
+def invalidate_author_cards(sender, instance, update_fields=None, **kwargs):
+    """Имя автора выводится в карточках его публикаций."""
+    if update_fields and set(update_fields) == {'last_login'}:
+        return
+    bump(card_tag('author', instance.pk))
+
+
+def _feed_tags(post):
+    """Теги лент категории и автора по экземпляру публикации.
+
+    Slug и имя берутся из уже загруженных категории и автора;
+    если их нет в экземпляре, теги читаются из базы.
+    """
+    category_loaded = post.category_id is None or (
+        Post.category.is_cached(post)
+        and post.category.pk == post.category_id)
+    author_loaded = (Post.author.is_cached(post)
+                     and post.author.pk == post.author_id)
+    if not (category_loaded and author_loaded):
+        return _post_feed_tags(post.pk)
+    tags = [author_tag(post.author.username)]
+    if post.category_id is not None:
+        tags.append(category_tag(post.category.slug))
+    return tags
+
+
+def _post_feed_tags(pk):
+    """Теги лент категории и автора публикации."""
+    row = Post.objects.filter(pk=pk).values(
+        'category__slug', 'author__username').first()
+    if row is None:
+        return []
+    tags = [author_tag(row['author__username'])]
+    if row['category__slug']:
+        tags.append(category_tag(row['category__slug']))
+    return tags
@@ -0,0 +1,100 @@
+"""Журнал медленных SQL-запросов.
+
+Запросы дольше settings.SLOW_QUERY_MS запоминаются во время запроса
+(см. blog.perf) вместе с кратким стеком вызовов, а после ответа
+пишутся строками JSON в логгер blog.slow_sql. В settings.LOGGING он
+пишет в ротируемый файл SLOW_QUERY_LOG, который разбирает
+manage.py slow_queries.
+"""
+import hashlib
+import json
+import logging
+import re
+import traceback
+from datetime import datetime, timezone
+
+from django.conf import settings
+
+logger = logging.getLogger('blog.slow_sql')
+
+SQL_PREVIEW = 2000
+STACK_DEPTH = 8
+INSTRUMENTATION = ('blog/perf.py', 'blog/slowlog.py', 'blog/middleware.py',
+                   'blog/nplusone.py')
+
+_STRING = re.compile(r"'(?:[^']|'')*'")
+_NUMBER = re.compile(r'\b\d+(?:\.\d+)?\b')
+_PLACEHOLDER = re.compile(r'%s|\?')
+_LIST = re.compile(r'\(\s*\?(?:\s*,\s*\?)+\s*\)')
+_SPACE = re.compile(r'\s+')
+
+
+def slow_threshold():
+    """Порог медленного запроса в секундах или None."""
+    threshold = getattr(settings, 'SLOW_QUERY_MS', None)
+    return threshold / 1000 if threshold else None
+
+
+def fingerprint(sql):
+    """Запрос без значений: одинаковые по форме запросы совпадают.
+
+    Строки, числа и параметры заменяются на ?, списки IN любой
+    длины — на (...).
+    """
+    sql = _STRING.sub('?', sql)
+    sql = _NUMBER.sub('?', sql)
+    sql = _PLACEHOLDER.sub('?', sql)
+    sql = _LIST.sub('(...)', sql)
+    return _SPACE.sub(' ', sql).strip()
+
+
+def fingerprint_id(fingerprint):
+    """Короткий идентификатор отпечатка."""
+    return hashlib.md5(fingerprint.encode()).hexdigest()[:12]
+
+
+def is_project_file(filename):
+    """Файл кода проекта, а не Django, библиотек или модулей замеров."""
+    base = str(settings.BASE_DIR) + '/'
+    return (filename.startswith(base) and 'site-packages' not in filename
+            and not filename.endswith(INSTRUMENTATION))
+
+
+def frame_summary(filename, lineno, name):
+    """Кадр стека одной строкой относительно BASE_DIR."""
+    return (f'{filename[len(str(settings.BASE_DIR)) + 1:]}:{lineno} '
+            f'in {name}')
+
+
+def stack_summary(depth=STACK_DEPTH):
+    """Кадры кода проекта, из которых выполнен запрос, от внешних к вложенным.
+
+    Кадры Django, библиотек и модулей замеров пропускаются.
+    """
+    frames = [frame_summary(frame.filename, frame.lineno, frame.name)
+              for frame in traceback.extract_stack()[:-1]
+              if is_project_file(frame.filename)]
+    return frames[-depth:]
+
+
+def write(request, queries):
+    """Запись медленных запросов одного HTTP-запроса в журнал.
+
+    queries — кортежи (sql, длительность в секундах, стек).
+    """
+    match = request.resolver_match
+    view = match.view_name if match else None
+    timestamp = datetime.now(timezone.utc).isoformat(timespec='seconds')
+    for sql, duration, stack in queries:
+        shape = fingerprint(sql)
+        logger.warning(json.dumps({
+            'ts': timestamp,
+            'fingerprint': shape,
+            'id': fingerprint_id(shape),
+            'duration_ms': round(duration * 1000, 2),
+            'view': view,
+            'method': request.method,
+            'path': request.path,
+            'sql': sql[:SQL_PREVIEW],
+            'stack': stack,
+        }, ensure_ascii=False))
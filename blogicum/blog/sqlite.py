@@ -0,0 +1,40 @@
+"""Настройка соединений SQLite через PRAGMA."""
+from django.conf import settings
+
+# journal_mode сохраняется в файле базы, поэтому выполняется первым.
+PRAGMA_ORDER = ('journal_mode', 'busy_timeout', 'synchronous',
+                'cache_size', 'mmap_size', 'temp_store')
+
+
+def sqlite_pragmas(overrides=None):
+    """PRAGMA из settings.SQLITE_PRAGMAS.
+
+    Значения задаются только в настройках. overrides — PRAGMA
+    отдельной базы (ключ PRAGMAS в DATABASES) поверх общих.
+    Значение None отключает соответствующую PRAGMA.
+    """
+    pragmas = {**getattr(settings, 'SQLITE_PRAGMAS', {}),
+               **(overrides or {})}
+    return {name: value for name, value in pragmas.items()
+            if value is not None}
+
+
+def apply_pragmas(dbapi_connection, pragmas):
+    """Выполнение PRAGMA на соединении sqlite3."""
+    names = sorted(pragmas, key=lambda name: (
+        PRAGMA_ORDER.index(name) if name in PRAGMA_ORDER
+        else len(PRAGMA_ORDER)))
+    for name in names:
+        if not name.isidentifier():
+            raise ValueError(f'Недопустимое имя PRAGMA: {name!r}')
+        value = pragmas[name]
+        if isinstance(value, str) and not value.isidentifier():
+            raise ValueError(f'Недопустимое значение PRAGMA {name}: {value!r}')
+        dbapi_connection.execute(f'PRAGMA {name} = {value}').fetchall()
+
+
+def configure_connection(sender, connection, **kwargs):
+    """Обработчик connection_created для баз SQLite."""
+    if connection.vendor == 'sqlite':
+        apply_pragmas(connection.connection, sqlite_pragmas(
+            connection.settings_dict.get('PRAGMAS')))
@@ -0,0 +1,13 @@
+"""Теги шаблонов лент."""
+from django import template
+from django.utils.safestring import mark_safe
+
+from blog.cache import render_post_cards
+
+register = template.Library()
+
+
+@register.simple_tag
+def post_cards(posts):
+    """Отрисованные карточки публикаций страницы ленты."""
+    return [mark_safe(card) for card in render_post_cards(posts)]
@@ -6,6 +6,8 @@ from . import views
 app_name = 'blog'
 urlpatterns = [
     path('', views.IndexListView.as_view(), name='index'),
+    path('search/', views.SearchListView.as_view(), name='search'),
+    path('metrics/', views.metrics_view, name='metrics'),
     path('posts/<int:pk>/',
          views.PostDetailView.as_view(),
          name='post_detail'),
@@ -27,6 +29,9 @@ urlpatterns = [
     path('posts/<int:pk>/delete/',
          views.PostDeleteView.as_view(),
          name='delete_post'),
+    path('posts/<int:pk>/comments/',
+         views.CommentListView.as_view(),
+         name='post_comments'),
     path('posts/<int:pk>/comment/',
          views.CommentCreateView.as_view(),
          name='add_comment'),
@@ -1,14 +1,12 @@
 """Вью приложения Blog."""
-from datetime import datetime
-
+from django.conf import settings
 from django.contrib.auth.mixins import LoginRequiredMixin
 from django.core.exceptions import PermissionDenied
-from django.core.paginator import Paginator
-from django.db.models import Count
-from django.http import Http404
-from django.shortcuts import get_object_or_404, redirect
+from django.db import transaction
+from django.http import Http404, HttpResponse, HttpResponseRedirect
+from django.shortcuts import get_object_or_404, redirect, render
 from django.urls import reverse, reverse_lazy
-from django.utils import timezone
+from django.utils.http import urlencode
 from django.views.generic import (CreateView,
                                   DeleteView,
                                   DetailView,
@@ -16,10 +14,17 @@ from django.views.generic import (CreateView,
                                   UpdateView,
                                   )
 
+from . import metrics
+from .cache import page_tags
 from .forms import CommentForm, PostForm, UserForm
-from .models import Category, Comment, Post, User
+from .models import Category, Comment, FeedEntry, Post, User
+from .paginators import CursorPaginator
+from .perf import token_matches
+from .search import SearchPaginator
+from .writes import WriteUnavailable, run_write
 
 NUM_POST_ON_PAGE = 10
+NUM_COMMENTS_ON_PAGE = 20
 
 
 class PostMixin:
@@ -29,6 +34,23 @@ class PostMixin:
     template_name = 'blog/create.html'
 
 
+class QueuedWriteMixin:
+    """Saves the form through blog.writes.
+
+    A busy database yields 503 with Retry-After instead of a 500.
+    """
+
+    def form_valid(self, form):
+        """Сохранение формы с повтором при блокировке базы."""
+        try:
+            self.object = run_write(form.save)
+        except WriteUnavailable:
+            response = render(self.request, 'pages/503.html', status=503)
+            response['Retry-After'] = '1'
+            return response
+        return HttpResponseRedirect(self.get_success_url())
+
+
 class CommentMixin:
     """Mixin for Comment."""
 
@@ -37,98 +59,198 @@ class CommentMixin:
     form_class = CommentForm
 
 
-class IndexListView(ListView):
+class SingleFetchMixin:
+    """Mixin: объект загружается один раз и проверяется в dispatch.
+
+    get_object() возвращает тот же экземпляр, поэтому generic-вью
+    не делает повторный запрос.
+    """
+
+    def get_object(self, queryset=None):
+        """Объект, загруженный в dispatch."""
+        if getattr(self, '_fetched_object', None) is None:
+            self._fetched_object = super().get_object(queryset)
+        return self._fetched_object
+
+    def check_object(self, obj):
+        """Проверка доступа; может вернуть ответ вместо страницы."""
+        return None
+
+    def dispatch(self, request, *args, **kwargs):
+        """Загрузка и проверка объекта до обработки запроса."""
+        response = self.check_object(self.get_object())
+        if response is not None:
+            return response
+        return super().dispatch(request, *args, **kwargs)
+
+
+class CursorPaginationMixin:
+    """Mixin для keyset-пагинации лент по (pub_date, id)."""
+
+    paginate_by = NUM_POST_ON_PAGE
+    cursor_kwarg = 'cursor'
+    cursor_date_field = 'pub_date'
+
+    def get_count_tags(self):
+        """Теги кеша для числа записей ленты."""
+        return page_tags(self.request.resolver_match)
+
+    def paginate_queryset(self, queryset, page_size):
+        """Пагинация курсором вместо OFFSET/LIMIT."""
+        paginator = CursorPaginator(queryset, page_size,
+                                    self.cursor_date_field,
+                                    self.get_count_tags())
+        page = paginator.get_page(self.request.GET.get(self.cursor_kwarg))
+        return (paginator, page, page.object_list, page.has_other_pages())
+
+
+class FeedEntryMixin:
+    """Mixin для лент из таблицы FeedEntry.
+
+    В контекст попадают Post, собранные из строк ленты, поэтому
+    шаблоны карточек не меняются.
+    """
+
+    def paginate_queryset(self, queryset, page_size):
+        """Страница строк ленты в виде публикаций."""
+        paginator, page, object_list, is_paginated = (
+            super().paginate_queryset(queryset, page_size))
+        page.object_list = [entry.as_post() for entry in object_list]
+        return paginator, page, page.object_list, is_paginated
+
+
+def paginate_comments(post, cursor=None):
+    """Страница комментариев поста, начиная с самых новых."""
+    return CursorPaginator(post.comments.select_related('author'),
+                           NUM_COMMENTS_ON_PAGE,
+                           'created_at').get_page(cursor)
+
+
+class IndexListView(FeedEntryMixin, CursorPaginationMixin, ListView):
     """Главная страница."""
 
     model = Post
     template_name = 'blog/index.html'
+    replica_reads = True
 
-    ordering = ('-pub_date',)
-    queryset = Post.objects.select_related('category',
-                                           'location',
-                                           'author').filter(
-        is_published=True,
-        category__is_published=True,
-        pub_date__lt=datetime.now()
-    ).annotate(comment_count=Count('comments'))
-    paginate_by = NUM_POST_ON_PAGE
+    def get_queryset(self):
+        """Получение queryset."""
+        return FeedEntry.objects.visible()
+
+
+class SearchListView(CursorPaginationMixin, ListView):
+    """Поиск по публикациям и комментариям."""
+
+    model = Post
+    template_name = 'blog/search.html'
+    query_kwarg = 'q'
+
+    def get_search_query(self):
+        """Строка поискового запроса."""
+        return self.request.GET.get(self.query_kwarg, '').strip()
+
+    def get_queryset(self):
+        """Публикации для карточек; отбирает и ранжирует SearchPaginator."""
+        return Post.objects.for_cards()
+
+    def paginate_queryset(self, queryset, page_size):
+        """Страница результатов, ранжированных bm25."""
+        paginator = SearchPaginator(self.get_search_query(), page_size,
+                                    queryset=queryset)
+        page = paginator.get_page(self.request.GET.get(self.cursor_kwarg))
+        return (paginator, page, page.object_list, page.has_other_pages())
+
+    def get_context_data(self, **kwargs):
+        """Запрос нужен форме и ссылкам пагинации."""
+        context = super().get_context_data(**kwargs)
+        query = self.get_search_query()
+        context['query'] = query
+        context['page_query'] = urlencode({self.query_kwarg: query}) + '&'
+        return context
 
 
-class PostDetailView(DetailView):
+class PostDetailView(SingleFetchMixin, DetailView):
     """Страница выбранной публикации."""
 
     model = Post
     template_name = 'blog/detail.html'
+    replica_reads = True
 
-    def dispatch(self, request, *args, **kwargs):
-        """Переопределение dispatch."""
-        instance = get_object_or_404(Post.objects.
-                                     select_related('category',
-                                                    'location',
-                                                    'author'),
-                                     pk=kwargs['pk'])
-        if ((not instance.is_published
-            or not instance.category.is_published
-            or instance.pub_date > timezone.now())
-                and (instance.author != request.user)):
-            raise Http404()
-        return super().dispatch(request, *args, **kwargs)
+    def get_queryset(self):
+        """Видимые публикации и все публикации автора."""
+        return Post.objects.with_relations().visible_for(self.request.user)
 
     def get_context_data(self, **kwargs):
         """Переопределение context."""
         context = super().get_context_data(**kwargs)
         context['form'] = CommentForm()
-        context['comments'] = (
-            self.object.comments.select_related(
-                'author'
-            )
-        )
+        page = paginate_comments(self.object,
+                                 self.request.GET.get('comments'))
+        context['comments_page'] = page
+        context['comments'] = page[::-1]
+        return context
+
+
+class CommentListView(CursorPaginationMixin, ListView):
+    """Фрагмент с более ранними комментариями поста."""
+
+    template_name = 'includes/comment_list.html'
+    replica_reads = True
+    paginate_by = NUM_COMMENTS_ON_PAGE
+    cursor_date_field = 'created_at'
+    post_obj = None
+
+    def get_queryset(self):
+        """Комментарии видимого поста."""
+        self.post_obj = get_object_or_404(
+            Post.objects.visible_for(self.request.user), pk=self.kwargs['pk'])
+        return self.post_obj.comments.select_related('author')
+
+    def get_context_data(self, **kwargs):
+        """Переопределение context."""
+        context = super().get_context_data(**kwargs)
+        context['post'] = self.post_obj
+        context['comments_page'] = context['page_obj']
+        context['comments'] = context['page_obj'][::-1]
         return context
 
 
-class CategoryPostsListView(ListView):
+class CategoryPostsListView(FeedEntryMixin, CursorPaginationMixin,
+                            ListView):
     """Список постов категории."""
 
-    model = Category
+    model = Post
     template_name = 'blog/category.html'
+    replica_reads = True
+    category = None
+
+    def get_queryset(self):
+        """Получение queryset."""
+        self.category = get_object_or_404(Category,
+                                          slug=self.kwargs['category_slug'],
+                                          is_published=True)
+        return FeedEntry.objects.visible().filter(category=self.category)
 
     def get_context_data(self, **kwargs):
         """Переопределение context."""
         context = super().get_context_data(**kwargs)
-        category = get_object_or_404(Category,
-                                     slug=self.kwargs['category_slug'],
-                                     is_published=True)
-        context['category'] = category
-        page_obj = Post.objects.select_related('category',
-                                               'location',
-                                               'author').filter(
-            category__slug=self.kwargs['category_slug'],
-            is_published=True, pub_date__lt=datetime.now()).annotate(
-            comment_count=Count('comments')).order_by('-pub_date')
-        context['page_obj'] = (Paginator(page_obj,
-                                         NUM_POST_ON_PAGE
-                                         ).
-                               get_page(self.request.GET.get('page')))
+        context['category'] = self.category
         return context
 
 
-class ProfileListView(ListView):
+class ProfileListView(CursorPaginationMixin, ListView):
     """Страница профиля пользователя."""
 
     model = Post
     template_name = 'blog/profile.html'
+    replica_reads = True
     slug_url_kwarg = 'username'
-    paginate_by = NUM_POST_ON_PAGE
     user = None
 
     def get_queryset(self):
         """Поучение queryset."""
         self.user = get_object_or_404(User, username=self.kwargs['username'])
-        return Post.objects.select_related('category',
-                                           'location',
-                                           'author').filter(
-            author=self.user).order_by(
-            '-pub_date').annotate(comment_count=Count('comments'))
+        return Post.objects.for_cards().filter(author=self.user)
 
     def get_context_data(self, **kwargs):
         """Переопределение context."""
@@ -154,7 +276,8 @@ class ProfileUpdateView(LoginRequiredMixin, UpdateView):
                             kwargs={'username': self.request.user})
 
 
-class PostCreateView(PostMixin, LoginRequiredMixin, CreateView):
+class PostCreateView(PostMixin, LoginRequiredMixin, QueuedWriteMixin,
+                     CreateView):
     """Создание публикации."""
 
     def form_valid(self, form):
@@ -167,21 +290,17 @@ class PostCreateView(PostMixin, LoginRequiredMixin, CreateView):
         return reverse('blog:profile', kwargs={'username': self.object.author})
 
 
-class PostUpdateView(PostMixin, LoginRequiredMixin, UpdateView):
+class PostUpdateView(PostMixin, LoginRequiredMixin, SingleFetchMixin,
+                     UpdateView):
     """Редактирование публикации."""
 
     model = Post
 
-    def dispatch(self, request, *args, **kwargs):
-        """Переопределение dispatch."""
-        self.post_obj = get_object_or_404(Post.objects.
-                                          select_related('category',
-                                                         'location',
-                                                         'author'),
-                                          pk=kwargs['pk'])
-        if self.post_obj.author != self.request.user:
-            return redirect('blog:post_detail', pk=self.post_obj.pk)
-        return super().dispatch(request, *args, **kwargs)
+    def check_object(self, obj):
+        """Чужую публикацию редактировать нельзя."""
+        if obj.author_id != self.request.user.pk:
+            return redirect('blog:post_detail', pk=obj.pk)
+        return None
 
     def form_valid(self, form):
         """Валидация формы."""
@@ -190,41 +309,37 @@ class PostUpdateView(PostMixin, LoginRequiredMixin, UpdateView):
 
     def get_success_url(self):
         """Удачное перенаправление."""
-        return reverse('blog:post_detail', kwargs={'pk': self.post_obj.pk})
+        return reverse('blog:post_detail', kwargs={'pk': self.object.pk})
 
 
-class PostDeleteView(LoginRequiredMixin, DeleteView):
+class PostDeleteView(LoginRequiredMixin, SingleFetchMixin, DeleteView):
     """Удаление публикации."""
 
     model = Post
     template_name = 'blog/create.html'
 
-    def dispatch(self, request, *args, **kwargs):
-        """Переопределение dispatch."""
-        instance = get_object_or_404(Post.objects.
-                                     select_related('category',
-                                                    'location',
-                                                    'author'),
-                                     pk=kwargs['pk'])
-        if instance.author != request.user:
+    def get_queryset(self):
+        """Публикация вместе с местом для страницы подтверждения."""
+        return Post.objects.select_related('location')
+
+    def check_object(self, obj):
+        """Удалить можно только свою публикацию."""
+        if obj.author_id != self.request.user.pk:
             raise PermissionDenied
-        return super().dispatch(request, *args, **kwargs)
+        return None
 
     def get_success_url(self):
         """Удачное перенаправление."""
         return reverse('blog:profile', args=[self.request.user])
 
 
-class CommentCreateView(CommentMixin, LoginRequiredMixin, CreateView):
+class CommentCreateView(CommentMixin, LoginRequiredMixin, QueuedWriteMixin,
+                        CreateView):
     """Создание комментария к посту."""
 
     def dispatch(self, request, *args, **kwargs):
         """Переопределение dispatch."""
-        self.post_obj = get_object_or_404(Post.objects.
-                                          select_related('category',
-                                                         'location',
-                                                         'author'),
-                                          pk=kwargs['pk'])
+        self.post_obj = get_object_or_404(Post, pk=kwargs['pk'])
         return super().dispatch(request, *args, **kwargs)
 
     def form_valid(self, form):
@@ -238,37 +353,56 @@ class CommentCreateView(CommentMixin, LoginRequiredMixin, CreateView):
         return reverse('blog:post_detail', kwargs={'pk': self.post_obj.pk})
 
 
-class CommentUpdateView(CommentMixin, LoginRequiredMixin, UpdateView):
+class CommentUpdateView(CommentMixin, LoginRequiredMixin, SingleFetchMixin,
+                        UpdateView):
     """Редактирование комментария к посту."""
 
     pk_url_kwarg = 'comment_pk'
 
-    def dispatch(self, request, *args, **kwargs):
-        """Переопределение dispatch."""
-        instance = get_object_or_404(Comment, pk=kwargs['comment_pk'])
-        if instance.author != request.user:
+    def check_object(self, obj):
+        """Чужой комментарий для редактирования не существует."""
+        if obj.author_id != self.request.user.pk:
             raise Http404
-        return super().dispatch(request, *args, **kwargs)
+        return None
 
     def get_success_url(self):
         """Удачное перенаправление."""
         return reverse('blog:post_detail', kwargs={'pk': self.kwargs['pk']})
 
 
-class CommentDeleteView(LoginRequiredMixin, DeleteView):
+class CommentDeleteView(LoginRequiredMixin, SingleFetchMixin, DeleteView):
     """Удаление комментария."""
 
     model = Comment
     template_name = 'blog/comment.html'
     pk_url_kwarg = 'comment_pk'
 
-    def dispatch(self, request, *args, **kwargs):
-        """Переопределение dispatch."""
-        instance = get_object_or_404(Comment, pk=kwargs['comment_pk'])
-        if instance.author != request.user:
+    def check_object(self, obj):
+        """Удалить можно только свой комментарий."""
+        if obj.author_id != self.request.user.pk:
             raise PermissionDenied
-        return super().dispatch(request, *args, **kwargs)
+        return None
+
+    def delete(self, request, *args, **kwargs):
+        """Удаление вместе с пересчётом счётчика комментариев."""
+        with transaction.atomic():
+            return super().delete(request, *args, **kwargs)
 
     def get_success_url(self):
         """Удачное перенаправление."""
         return reverse('blog:post_detail', kwargs={'pk': self.kwargs['pk']})
+
+
+def metrics_view(request):
+    """Метрики в формате Prometheus по токену METRICS_TOKEN.
+
+    Токен передаётся заголовком Authorization: Bearer, как его
+    отправляет Prometheus с параметром authorization в scrape_config.
+    """
+    scheme, _, supplied = request.headers.get(
+        'Authorization', '').partition(' ')
+    if scheme.lower() != 'bearer' or not token_matches(
+            supplied.strip(), getattr(settings, 'METRICS_TOKEN', None)):
+        raise Http404
+    return HttpResponse(metrics.render(),
+                        content_type='text/plain; version=0.0.4')
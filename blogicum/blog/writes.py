@@ -0,0 +1,201 @@
+"""Запись в SQLite без ошибок «database is locked».
+
+Каждая запись выполняется в транзакции BEGIN IMMEDIATE: блокировка
+на запись берётся до первого запроса, поэтому при занятой базе
+ошибка возникает до выполнения функции и её безопасно повторить.
+Повторы ограничены, с экспоненциальной задержкой и случайным
+разбросом.
+
+Если включён settings.SQLITE_WRITE_QUEUE, записи процесса идут
+через один поток-писатель, который объединяет несколько ожидающих
+записей в одну транзакцию (group commit), и каждый воркер держит
+не больше одного писателя в очереди на блокировку SQLite.
+"""
+import concurrent.futures
+import queue
+import random
+import threading
+import time
+from contextlib import contextmanager
+
+from django.conf import settings
+from django.db import (DEFAULT_DB_ALIAS, OperationalError, connections,
+                       transaction)
+
+
+class WriteUnavailable(Exception):
+    """База не приняла запись за отведённые попытки."""
+
+
+def write_setting(name, default):
+    """Параметр очереди записи из настроек."""
+    return getattr(settings, name, default)
+
+
+def is_locked_error(error):
+    """Ошибка SQLite о занятой базе."""
+    return 'locked' in str(error) or 'busy' in str(error)
+
+
+@contextmanager
+def immediate_atomic(using=DEFAULT_DB_ALIAS):
+    """transaction.atomic, который в SQLite начинается с BEGIN IMMEDIATE.
+
+    Транзакция открывается вручную: автокоммит выключается,
+    BEGIN IMMEDIATE выполняется явным запросом, а atomic внутри такой
+    транзакции только ставит точку сохранения. Внутри уже открытой
+    транзакции и для других баз это обычный atomic.
+    """
+    connection = connections[using]
+    if connection.vendor != 'sqlite' or not connection.get_autocommit():
+        with transaction.atomic(using=using):
+            yield
+        return
+    transaction.set_autocommit(False, using=using)
+    try:
+        with connection.cursor() as cursor:
+            cursor.execute('BEGIN IMMEDIATE')
+        try:
+            with transaction.atomic(using=using):
+                yield
+            transaction.commit(using=using)
+        except BaseException:
+            transaction.rollback(using=using)
+            raise
+    finally:
+        transaction.set_autocommit(True, using=using)
+
+
+def _run_batch(functions, using):
+    """Функции в точках сохранения внутри уже открытой транзакции."""
+    outcomes = []
+    for function in functions:
+        try:
+            with transaction.atomic(using=using):
+                outcomes.append((function(), None))
+        except OperationalError as error:
+            if is_locked_error(error):
+                raise WriteUnavailable(
+                    'База занята во время записи.') from error
+            outcomes.append((None, error))
+        except Exception as error:
+            outcomes.append((None, error))
+    return outcomes
+
+
+def run_in_transaction(functions, using=DEFAULT_DB_ALIAS):
+    """Выполнение функций в одной транзакции с повтором блокировок.
+
+    Каждая функция выполняется в своей точке сохранения, так что
+    исключение одной не отменяет остальные. Возвращает список пар
+    (результат, исключение). Повторяется только BEGIN IMMEDIATE:
+    ошибка после начала записи поднимает WriteUnavailable.
+    """
+    attempts = write_setting('SQLITE_WRITE_RETRIES', 5)
+    backoff = write_setting('SQLITE_WRITE_BACKOFF', 0.05)
+    for attempt in range(attempts):
+        begun = False
+        try:
+            with immediate_atomic(using):
+                begun = True
+                return _run_batch(functions, using)
+        except OperationalError as error:
+            if not is_locked_error(error):
+                raise
+            if begun:
+                raise WriteUnavailable(
+                    'База занята при фиксации.') from error
+            if attempt + 1 == attempts:
+                raise WriteUnavailable('База занята.') from error
+            time.sleep(backoff * 2 ** attempt * random.uniform(0.5, 1.5))
+
+
+class WriteQueue:
+    """Поток-писатель с объединением записей в одну транзакцию."""
+
+    def __init__(self, using=DEFAULT_DB_ALIAS):
+        """Пустая очередь; поток стартует при первой записи."""
+        self.using = using
+        self.queue = queue.Queue()
+        self.thread = None
+        self.lock = threading.Lock()
+
+    def submit(self, function):
+        """Постановка функции в очередь, возвращает Future."""
+        future = concurrent.futures.Future()
+        self.queue.put((function, future))
+        with self.lock:
+            if self.thread is None or not self.thread.is_alive():
+                self.thread = threading.Thread(
+                    target=self._writer, name='blog-writer', daemon=True)
+                self.thread.start()
+        return future
+
+    def _batch(self):
+        """Первая запись и всё, что успело накопиться за окно группы."""
+        batch = [self.queue.get()]
+        deadline = time.perf_counter() + write_setting(
+            'SQLITE_WRITE_GROUP_WINDOW', 0)
+        limit = write_setting('SQLITE_WRITE_GROUP_SIZE', 64)
+        while len(batch) < limit:
+            timeout = deadline - time.perf_counter()
+            try:
+                batch.append(self.queue.get(timeout=max(timeout, 0)))
+            except queue.Empty:
+                break
+        return batch
+
+    def _writer(self):
+        """Основной цикл потока-писателя."""
+        while True:
+            batch = [(function, future) for function, future in self._batch()
+                     if future.set_running_or_notify_cancel()]
+            if not batch:
+                continue
+            futures = [future for _, future in batch]
+            try:
+                outcomes = run_in_transaction(
+                    [function for function, _ in batch], self.using)
+            except BaseException as error:
+                # Соединение писателя живёт долго: после сбоя базы
+                # оно переоткрывается при следующей записи.
+                if not isinstance(error, WriteUnavailable):
+                    connections[self.using].close()
+                for future in futures:
+                    future.set_exception(error)
+                continue
+            for future, (result, error) in zip(futures, outcomes):
+                if error is None:
+                    future.set_result(result)
+                else:
+                    future.set_exception(error)
+
+
+_queue = WriteQueue()
+
+
+def run_write(function, using=DEFAULT_DB_ALIAS):
+    """Выполнение функции записи и возврат её результата.
+
+    Исключения функции пробрасываются как есть; если база так и не
+    освободилась, поднимается WriteUnavailable. По истечении
+    SQLITE_WRITE_TIMEOUT снимается только запись, которая ещё ждёт
+    в очереди: начатую уже не отменить, поэтому её исход дожидаются,
+    и повтор запроса не продублирует запись.
+    """
+    connection = connections[using]
+    if (not write_setting('SQLITE_WRITE_QUEUE', False)
+            or connection.vendor != 'sqlite'
+            or connection.in_atomic_block):
+        [(result, error)] = run_in_transaction([function], using)
+        if error is not None:
+            raise error
+        return result
+    future = _queue.submit(function)
+    try:
+        return future.result(
+            timeout=write_setting('SQLITE_WRITE_TIMEOUT', 30))
+    except concurrent.futures.TimeoutError as error:
+        if future.cancel():
+            raise WriteUnavailable('Очередь записи не успела.') from error
+    return future.result()
@@ -1,6 +1,9 @@
 """Settings проекта."""
+import os
 from pathlib import Path
 
+from django.core.exceptions import ImproperlyConfigured
+
 BASE_DIR = Path(__file__).resolve().parent.parent
 
 SECRET_KEY = "django-insecure--u!+vka!5)e+zlmhri1m+x8h)y*d&wtzvgj)+-k$v(7&i9)4^w"
@@ -26,7 +29,12 @@ INSTALLED_APPS = [
 ]
 
 MIDDLEWARE = [
+    "blog.middleware.ServerTimingMiddleware",
+    "blog.middleware.MetricsMiddleware",
     "django.middleware.security.SecurityMiddleware",
+    "blog.middleware.AnonymousPageCacheMiddleware",
+    "blog.middleware.ReplicaRoutingMiddleware",
+    "blog.middleware.NPlusOneMiddleware",
     "django.contrib.sessions.middleware.SessionMiddleware",
     "django.middleware.common.CommonMiddleware",
     "django.middleware.csrf.CsrfViewMiddleware",
@@ -58,13 +66,95 @@ TEMPLATES = [
 
 WSGI_APPLICATION = "blogicum.wsgi.application"
 
-DATABASES = {
-    "default": {
-        "ENGINE": "django.db.backends.sqlite3",
-        "NAME": BASE_DIR / "db.sqlite3",
+# Профиль базы выбирается переменной окружения BLOGICUM_DB:
+# sqlite (по умолчанию) или экспериментальный postgresql — тесты
+# и бенчмарки на нём проходят, но под реальной нагрузкой он не работал
+# (замеры в README). Драйвер ставится из requirements-postgresql.txt.
+# Соединения постоянные (CONN_MAX_AGE) и проверяются
+# перед каждым запросом (CONN_HEALTH_CHECKS, см. blog.connections).
+# Пула в Django 3.2 нет: каждый поток воркера держит одно соединение,
+# а общий пул даёт PgBouncer в режиме transaction — с ним нужен
+# DB_PGBOUNCER=1, отключающий серверные курсоры.
+DB_PROFILE = os.getenv("BLOGICUM_DB", "sqlite")
+
+if DB_PROFILE == "sqlite":
+    DATABASES = {
+        "default": {
+            "ENGINE": "django.db.backends.sqlite3",
+            "NAME": os.getenv("SQLITE_PATH", BASE_DIR / "db.sqlite3"),
+            "CONN_MAX_AGE": int(os.getenv("DB_CONN_MAX_AGE", 0)),
+        }
     }
+elif DB_PROFILE == "postgresql":
+    try:
+        import psycopg2  # noqa: F401
+    except ImportError:
+        raise ImproperlyConfigured(
+            "Для BLOGICUM_DB=postgresql установите драйвер: "
+            "pip install -r requirements-postgresql.txt.")
+    DATABASES = {
+        "default": {
+            "ENGINE": "django.db.backends.postgresql",
+            "NAME": os.getenv("POSTGRES_DB", "blogicum"),
+            "USER": os.getenv("POSTGRES_USER", "blogicum"),
+            "PASSWORD": os.getenv("POSTGRES_PASSWORD", ""),
+            "HOST": os.getenv("POSTGRES_HOST", "localhost"),
+            "PORT": os.getenv("POSTGRES_PORT", "5432"),
+            "CONN_MAX_AGE": int(os.getenv("DB_CONN_MAX_AGE", 60)),
+            "CONN_HEALTH_CHECKS": True,
+            "DISABLE_SERVER_SIDE_CURSORS": os.getenv("DB_PGBOUNCER") == "1",
+            "OPTIONS": {"connect_timeout": 5},
+        }
+    }
+else:
+    raise ImproperlyConfigured(
+        f"Неизвестный профиль базы BLOGICUM_DB={DB_PROFILE!r}.")
+
+# Реплика для чтения (см. blog.routers): файл SQLite, который
+# обновляет manage.py sync_replica, или отдельный сервер PostgreSQL.
+# Реплика SQLite открывается только для чтения и без WAL, чтобы
+# её можно было атомарно заменить копией.
+if os.getenv("SQLITE_REPLICA_PATH") and DB_PROFILE == "sqlite":
+    DATABASES["replica"] = {
+        **DATABASES["default"],
+        "NAME": os.getenv("SQLITE_REPLICA_PATH"),
+        "PRAGMAS": {"journal_mode": None, "query_only": "on"},
+        "TEST": {"MIRROR": "default"},
+    }
+elif os.getenv("POSTGRES_REPLICA_HOST") and DB_PROFILE == "postgresql":
+    DATABASES["replica"] = {
+        **DATABASES["default"],
+        "HOST": os.getenv("POSTGRES_REPLICA_HOST"),
+        "TEST": {"MIRROR": "default"},
+    }
+
+DATABASE_ROUTERS = ["blog.routers.ReplicaRouter"]
+
+# Сколько секунд после записи клиент читает из основной базы.
+REPLICA_STICKY_SECONDS = 5
+
+# PRAGMA для каждого нового соединения SQLite (см. blog.sqlite).
+# WAL позволяет читателям не ждать писателя, busy_timeout — ждать
+# блокировку вместо ошибки «database is locked».
+SQLITE_PRAGMAS = {
+    "journal_mode": "wal",
+    "synchronous": "normal",
+    "busy_timeout": 5000,
+    "cache_size": -20000,
+    "mmap_size": 128 * 1024 * 1024,
+    "temp_store": "memory",
 }
 
+# Запись через один поток-писатель на процесс с group commit
+# (см. blog.writes). Без очереди записи всё равно повторяются
+# при блокировке, а при исчерпании попыток отвечают 503.
+SQLITE_WRITE_QUEUE = False
+SQLITE_WRITE_RETRIES = 5
+SQLITE_WRITE_BACKOFF = 0.05
+SQLITE_WRITE_GROUP_WINDOW = 0
+SQLITE_WRITE_GROUP_SIZE = 64
+SQLITE_WRITE_TIMEOUT = 30
+
 AUTH_PASSWORD_VALIDATORS = [
     {
         "NAME": "django.contrib.auth.password_validation.UserAttributeSimilarityValidator",
@@ -108,8 +198,95 @@ LOGIN_REDIRECT_URL = 'blog:index'
 
 MEDIA_ROOT = BASE_DIR / 'media'
 
+POST_IMAGE_WIDTHS = (320, 640, 1280)
+
 EMAIL_BACKEND = 'django.core.mail.backends.filebased.EmailBackend'
 
 EMAIL_FILE_PATH = BASE_DIR / 'sent_emails'
 
 LOGIN_URL = 'login'
+
+POST_VISIBILITY_BUCKET = 30
+
+# LocMemCache живёт в одном процессе: при нескольких воркерах
+# для корректной инвалидации нужен общий бэкенд (Redis, Memcached).
+CACHES = {
+    "default": {
+        "BACKEND": "django.core.cache.backends.locmem.LocMemCache",
+    }
+}
+
+PAGE_CACHE_TIMEOUT = 30
+
+POST_CARD_CACHE_TIMEOUT = 60 * 60
+
+# Число публикаций в лентах: до COUNT_ESTIMATE_LIMIT записей точно,
+# дальше — «более N» (см. blog.counts).
+COUNT_ESTIMATE_LIMIT = 10000
+
+COUNT_CACHE_TIMEOUT = 60
+
+# Заголовок Server-Timing для запросов с заголовком
+# X-Server-Timing-Token, равным SERVER_TIMING_TOKEN, и строка JSON
+# в логе blog.perf на каждый запрос (см.
+# blog.middleware.ServerTimingMiddleware). Без токена заголовок
+# не получает никто. Строки лога пишутся на уровне INFO: включите
+# их через PERF_LOG_LEVEL=INFO.
+SERVER_TIMING = True
+SERVER_TIMING_TOKEN = os.getenv("SERVER_TIMING_TOKEN") or None
+
+# Метрики для Prometheus по адресу /metrics/ (см. blog.metrics).
+# Отдаются только с заголовком Authorization: Bearer METRICS_TOKEN;
+# без токена адрес отвечает 404 всем.
+# При нескольких воркерах задайте общий METRICS_DIR и очищайте его
+# при деплое; без него каждый процесс отдаёт только свои метрики.
+METRICS_ENABLED = True
+METRICS_DIR = os.getenv("METRICS_DIR") or None
+METRICS_TOKEN = os.getenv("METRICS_TOKEN") or None
+
+# Поиск N+1: одинаковые по форме SELECT, повторившиеся в запросе
+# NPLUSONE_THRESHOLD раз (см. blog.nplusone). В тестах включается
+# флагом pytest --nplusone.
+NPLUSONE_DETECT = DEBUG
+NPLUSONE_RAISE = False
+NPLUSONE_THRESHOLD = 3
+
+# Журнал SQL дольше SLOW_QUERY_MS миллисекунд (см. blog.slowlog);
+# пустое значение выключает журнал. Отчёт: manage.py slow_queries.
+SLOW_QUERY_MS = float(os.getenv("SLOW_QUERY_MS", 0)) or None
+SLOW_QUERY_LOG = os.getenv("SLOW_QUERY_LOG", BASE_DIR / "slow_sql.jsonl")
+
+LOGGING = {
+    "version": 1,
+    "disable_existing_loggers": False,
+    "formatters": {
+        "message": {"format": "%(message)s"},
+    },
+    "handlers": {
+        "console": {"class": "logging.StreamHandler"},
+        "slow_sql": {
+            "class": "logging.handlers.RotatingFileHandler",
+            "filename": SLOW_QUERY_LOG,
+            "maxBytes": 10 * 1024 * 1024,
+            "backupCount": 5,
+            "encoding": "utf-8",
+            "delay": True,
+            "formatter": "message",
+        },
+    },
+    "loggers": {
+        "blog.perf": {
+            "handlers": ["console"],
+            "level": os.getenv("PERF_LOG_LEVEL", "WARNING"),
+            "propagate": False,
+        },
+        "blog.slow_sql": {
+            "handlers": ["slow_sql"],
+            "level": "WARNING",
+            "propagate": False,
+        },
+    },
+}
+
+# Сколько самых новых совпадений ранжировать bm25 при поиске.
+SEARCH_CANDIDATES = 1000
@@ -23,9 +23,11 @@ class AboutView(TemplateView):
     """Вывод страницы О Нас."""
 
     template_name = "pages/about.html"
+    replica_reads = True
 
 
 class RulesView(TemplateView):
     """Вывод страницы Наши Правила."""
 
     template_name = "pages/rules.html"
+    replica_reads = True
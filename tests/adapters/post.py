@@ -29,6 +29,8 @@ class PostModelAdapter(StudentModelAdapter):
             "is_published",
             "title",
             "text",
+            "text_html",
+            "excerpt",
             "pub_date",
             "author",
             "category",
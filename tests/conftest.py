@@ -19,6 +19,7 @@ from typing import (
 import pytest
 from django.apps import apps
 from django.contrib.auth import get_user_model
+from django.db import connection
 from django.db.models import Model, Field
 from django.forms import BaseForm
 from django.http import HttpResponse
@@ -26,6 +27,11 @@ from django.test import override_settings
 from django.test.client import Client
 from mixer.backend.django import mixer as _mixer
 
+# Проверки SQLite-специфичных возможностей: PRAGMA, FTS5, планы запросов.
+sqlite_only = pytest.mark.skipif(
+    connection.vendor != "sqlite", reason="Проверка только для SQLite."
+)
+
 N_PER_FIXTURE = 3
 N_PER_PAGE = 10
 COMMENT_TEXT_DISPLAY_LEN_FOR_TESTS = 50
@@ -41,6 +47,15 @@ def enable_debug_false():
         yield
 
 
+@pytest.fixture(autouse=True)
+def clear_cache():
+    from django.core.cache import cache
+
+    cache.clear()
+    yield
+    cache.clear()
+
+
 class SafeImportFromContextManager:
     def __init__(
             self,
@@ -92,6 +107,8 @@ pytest_plugins = [
     "fixtures.locations",
     "fixtures.categories",
     "fixtures.comments",
+    "fixtures.nplusone",
+    "fixtures.query_plans",
     "adapters.comment",
 ]
 
@@ -0,0 +1,33 @@
+from contextlib import contextmanager
+
+import pytest
+from django.test import override_settings
+
+
+def pytest_addoption(parser):
+    parser.addoption(
+        "--nplusone", action="store_true",
+        help="Падать на N+1 в любом HTTP-запросе тестов.",
+    )
+
+
+@pytest.fixture(autouse=True)
+def nplusone_guard(request):
+    if not request.config.getoption("--nplusone"):
+        yield
+        return
+    with override_settings(NPLUSONE_DETECT=True, NPLUSONE_RAISE=True):
+        yield
+
+
+@pytest.fixture
+def assert_no_nplusone():
+    from blog.nplusone import detect
+
+    @contextmanager
+    def check(threshold=None):
+        with detect(threshold) as detector:
+            yield detector
+        assert not detector.problems(), detector.report()
+
+    return check
@@ -0,0 +1,30 @@
+import json
+from pathlib import Path
+
+import pytest
+
+SNAPSHOT = Path(__file__).resolve().parent.parent / "snapshots" / (
+    "query_plans.json"
+)
+
+
+def pytest_addoption(parser):
+    parser.addoption(
+        "--update-query-plans", action="store_true",
+        help="Перезаписать снимок планов tests/snapshots/query_plans.json.",
+    )
+
+
+@pytest.fixture
+def query_plan_snapshot(request):
+    def compare(plans):
+        if request.config.getoption("--update-query-plans"):
+            SNAPSHOT.parent.mkdir(exist_ok=True)
+            SNAPSHOT.write_text(
+                json.dumps(plans, ensure_ascii=False, indent=2) + "\n",
+                encoding="utf-8",
+            )
+            return plans
+        return json.loads(SNAPSHOT.read_text(encoding="utf-8"))
+
+    return compare
@@ -0,0 +1,39 @@
+import json
+
+import pytest
+from django.core.management import call_command
+
+pytestmark = [pytest.mark.django_db]
+
+
+def test_bench_reports_every_route(tmp_path):
+    from blog import bench
+    from blog.models import Comment, Post, User
+
+    assert bench.percentile([5, 1, 4, 2, 3], 50) == 3
+    assert bench.percentile([5, 1, 4, 2, 3], 99) == 5
+
+    output = tmp_path / "bench.json"
+    call_command("bench", "--use-existing", "--repeat", "2",
+                 "--json", str(output))
+    assert not (Post.objects.exists() or Comment.objects.exists()
+                or User.objects.filter(username="bench_user").exists()), (
+        "Убедитесь, что бенчмарк с --use-existing не оставляет в базе"
+        " свои объекты."
+    )
+    report = json.loads(output.read_text(encoding="utf-8"))
+    routes = {(row["route"], row["client"]) for row in report["routes"]}
+    for name in ("blog:index", "blog:post_detail", "blog:edit_post",
+                 "pages:about", "pages:rules"):
+        for client in ("anonymous", "authenticated"):
+            assert (name, client) in routes, (
+                f"Убедитесь, что бенчмарк замеряет маршрут {name}"
+                f" для клиента {client}."
+            )
+    for row in report["routes"]:
+        assert row["status"] < 500, (
+            f"Убедитесь, что маршрут {row['route']} отвечает без ошибки"
+            " в бенчмарке."
+        )
+        assert {"p50_ms", "p95_ms", "p99_ms", "queries", "sql_ms",
+                "template_ms"} <= row.keys()
@@ -0,0 +1,92 @@
+import pytest
+from django.core.management import call_command
+from django.db import transaction
+
+pytestmark = [pytest.mark.django_db]
+
+
+def test_comment_count_follows_comments(
+        mixer, another_user, post_with_published_location
+):
+    post = post_with_published_location
+    comments = mixer.cycle(3).blend("blog.Comment", post=post)
+    mixer.cycle(2).blend("blog.Comment", post=post, author=another_user)
+    post.refresh_from_db()
+    assert post.comment_count == 5, (
+        "Убедитесь, что счётчик комментариев растёт при их создании."
+    )
+
+    comments[0].delete()
+    post.refresh_from_db()
+    assert post.comment_count == 4, (
+        "Убедитесь, что счётчик комментариев уменьшается при удалении."
+    )
+
+    another_user.delete()
+    post.refresh_from_db()
+    assert post.comment_count == 2, (
+        "Убедитесь, что счётчик комментариев учитывает каскадное удаление"
+        " автора комментариев."
+    )
+
+    post.comments.all().delete()
+    post.refresh_from_db()
+    assert post.comment_count == 0, (
+        "Убедитесь, что счётчик комментариев учитывает удаление queryset."
+    )
+
+
+def test_rolled_back_post_delete_keeps_counting(
+        mixer, post_with_published_location
+):
+    from blog.models import deleting_posts
+
+    post = post_with_published_location
+    comment = mixer.blend("blog.Comment", post=post)
+    pk = post.pk
+    with pytest.raises(RuntimeError):
+        with transaction.atomic():
+            post.delete()
+            raise RuntimeError("откат удаления")
+    assert pk not in deleting_posts.get(), (
+        "Убедитесь, что пост после отката удаления не считается удаляемым."
+    )
+    comment.delete()
+    post = type(post).objects.get(pk=pk)
+    assert post.comment_count == 0, (
+        "Убедитесь, что после отката удаления поста счётчик комментариев"
+        " снова уменьшается."
+    )
+
+
+def test_recount_comments_repairs_counter(
+        mixer, post_with_published_location
+):
+    from blog.cache import card_tag, tag_versions
+    from blog.models import FeedEntry
+
+    post = post_with_published_location
+    mixer.cycle(3).blend("blog.Comment", post=post)
+    type(post).objects.filter(pk=post.pk).update(comment_count=42)
+    FeedEntry.objects.filter(post=post).update(comment_count=42)
+    before = tag_versions([card_tag("post", post.pk)])
+
+    call_command("recount_comments", batch_size=1)
+    post.refresh_from_db()
+    assert post.comment_count == 3, (
+        "Убедитесь, что команда `recount_comments` исправляет счётчик."
+    )
+    assert FeedEntry.objects.get(post=post).comment_count == 3, (
+        "Убедитесь, что команда `recount_comments` исправляет счётчик"
+        " в ленте."
+    )
+    assert tag_versions([card_tag("post", post.pk)]) != before, (
+        "Убедитесь, что команда `recount_comments` сбрасывает кеш"
+        " карточек исправленных постов."
+    )
+
+    FeedEntry.objects.filter(post=post).update(comment_count=7)
+    call_command("recount_comments")
+    assert FeedEntry.objects.get(post=post).comment_count == 3, (
+        "Убедитесь, что расхождение только в ленте тоже исправляется."
+    )
@@ -0,0 +1,74 @@
+import runpy
+import sys
+
+import pytest
+
+
+def load_settings(monkeypatch, **env):
+    from blogicum import settings
+
+    for name, value in env.items():
+        monkeypatch.setenv(name, value)
+    return runpy.run_path(settings.__file__)
+
+
+def test_sqlite_is_default_profile(monkeypatch):
+    monkeypatch.delenv("BLOGICUM_DB", raising=False)
+    database = load_settings(monkeypatch)["DATABASES"]["default"]
+    assert database["ENGINE"] == "django.db.backends.sqlite3", (
+        "Убедитесь, что по умолчанию используется SQLite."
+    )
+    assert database["CONN_MAX_AGE"] == 0
+
+
+def test_postgresql_profile_from_environment(monkeypatch):
+    pytest.importorskip("psycopg2")
+    database = load_settings(
+        monkeypatch, BLOGICUM_DB="postgresql", POSTGRES_HOST="db",
+        POSTGRES_DB="blog", DB_CONN_MAX_AGE="300", DB_PGBOUNCER="1",
+    )["DATABASES"]["default"]
+    assert database["ENGINE"] == "django.db.backends.postgresql"
+    assert (database["HOST"], database["NAME"]) == ("db", "blog")
+    assert database["CONN_MAX_AGE"] == 300, (
+        "Убедитесь, что профиль PostgreSQL держит соединения постоянными."
+    )
+    assert database["CONN_HEALTH_CHECKS"]
+    assert database["DISABLE_SERVER_SIDE_CURSORS"]
+
+
+def test_postgresql_profile_requires_driver(monkeypatch):
+    from django.core.exceptions import ImproperlyConfigured
+
+    monkeypatch.setitem(sys.modules, "psycopg2", None)
+    with pytest.raises(ImproperlyConfigured, match="requirements-postgresql"):
+        load_settings(monkeypatch, BLOGICUM_DB="postgresql")
+
+
+def test_unknown_profile_rejected(monkeypatch):
+    from django.core.exceptions import ImproperlyConfigured
+
+    with pytest.raises(ImproperlyConfigured):
+        load_settings(monkeypatch, BLOGICUM_DB="oracle")
+
+
+@pytest.mark.django_db
+def test_unusable_connection_closed(monkeypatch):
+    from django.db import connections
+
+    from blog.connections import close_unusable
+
+    connection = connections.create_connection("default")
+    connection.ensure_connection()
+    assert not close_unusable(connection), (
+        "Убедитесь, что без CONN_HEALTH_CHECKS соединение не проверяется."
+    )
+    connection.settings_dict = dict(
+        connection.settings_dict, CONN_HEALTH_CHECKS=True
+    )
+    assert not close_unusable(connection)
+    closed = []
+    monkeypatch.setattr(connection, "is_usable", lambda: False)
+    monkeypatch.setattr(connection, "close", lambda: closed.append(True))
+    assert close_unusable(connection) and closed, (
+        "Убедитесь, что соединение, не прошедшее проверку, закрывается."
+    )
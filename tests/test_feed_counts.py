@@ -0,0 +1,53 @@
+import pytest
+from django.test import override_settings
+
+pytestmark = [pytest.mark.django_db]
+
+
+def test_feed_count_cached_and_invalidated(
+        client, mixer, user, published_category, published_location,
+        many_posts_with_published_locations, django_assert_num_queries
+):
+    response = client.get("/")
+    assert response.context["paginator"].count == 20
+    assert "Публикаций: 20" in response.content.decode(), (
+        "Убедитесь, что лента показывает число публикаций."
+    )
+
+    from blog.counts import feed_count
+    from blog.models import FeedEntry
+
+    queryset = FeedEntry.objects.visible()
+    tags = ["feed:index"]
+    feed_count(queryset, tags)
+    with django_assert_num_queries(0):
+        assert feed_count(queryset, tags) == 20, (
+            "Убедитесь, что число публикаций берётся из кеша."
+        )
+
+    mixer.blend(
+        "blog.Post", author=user, category=published_category,
+        location=published_location,
+    )
+    assert feed_count(FeedEntry.objects.visible(), tags) == 21, (
+        "Убедитесь, что число публикаций сбрасывается при изменениях."
+    )
+
+
+@override_settings(COUNT_ESTIMATE_LIMIT=5)
+def test_feed_count_estimate_and_exact(many_posts_with_published_locations):
+    from blog.counts import feed_count
+    from blog.models import FeedEntry
+
+    queryset = FeedEntry.objects.visible()
+    estimate = feed_count(queryset, ["feed:index"])
+    assert (int(estimate), estimate.exact) == (5, False), (
+        "Убедитесь, что для больших лент число оценивается сверху"
+        " порогом COUNT_ESTIMATE_LIMIT."
+    )
+    assert str(estimate) == "более 5"
+    exact = feed_count(queryset, ["feed:index"], exact=True)
+    assert (int(exact), exact.exact) == (20, True), (
+        "Убедитесь, что точное число считается по явному запросу."
+    )
+    assert feed_count(queryset, ["feed:index"]).exact
@@ -0,0 +1,130 @@
+import json
+
+import pytest
+
+pytestmark = [pytest.mark.django_db]
+
+
+def entry_values(FeedEntry):
+    return list(FeedEntry.objects.order_by("pk").values())
+
+
+def test_feed_entries_follow_changes(
+        mixer, user, published_category, published_location,
+        post_with_published_location
+):
+    from blog.models import FeedEntry
+
+    post = post_with_published_location
+    entry = FeedEntry.objects.get(post=post)
+    assert (entry.title, entry.category_slug, entry.location_name,
+            entry.author_username) == (
+        post.title, published_category.slug, published_location.name,
+        user.username,
+    ), "Убедитесь, что строка ленты создаётся вместе с публикацией."
+
+    comment = mixer.blend("blog.Comment", post=post, author=user)
+    assert FeedEntry.objects.get(post=post).comment_count == 1
+    comment.delete()
+    assert FeedEntry.objects.get(post=post).comment_count == 0
+
+    published_location.is_published = False
+    published_location.save()
+    assert FeedEntry.objects.get(post=post).location_name == ""
+
+    user.username = "renamed_author"
+    user.save()
+    assert FeedEntry.objects.get(post=post).author_username == (
+        "renamed_author"
+    ), "Убедитесь, что имя автора в ленте обновляется."
+
+    published_category.title = "Новое название"
+    published_category.save()
+    assert FeedEntry.objects.get(post=post).category_title == (
+        "Новое название"
+    )
+
+    published_category.is_published = False
+    published_category.save()
+    assert not FeedEntry.objects.exists(), (
+        "Убедитесь, что снятие категории с публикации убирает её посты"
+        " из ленты."
+    )
+    published_category.is_published = True
+    published_category.save()
+    assert FeedEntry.objects.filter(post=post).exists(), (
+        "Убедитесь, что возврат категории возвращает её посты в ленту."
+    )
+
+    post.is_published = False
+    post.save()
+    assert not FeedEntry.objects.filter(post=post).exists()
+    post.is_published = True
+    post.save()
+    post.delete()
+    assert not FeedEntry.objects.exists()
+
+
+def test_rebuild_matches_incremental(
+        mixer, user, published_category, posts_with_unpublished_category,
+        future_posts, many_posts_with_published_locations
+):
+    from django.core.management import call_command
+
+    from blog.models import FeedEntry
+
+    mixer.cycle(5).blend(
+        "blog.Comment", post=many_posts_with_published_locations[0],
+        author=user,
+    )
+    incremental = entry_values(FeedEntry)
+    call_command("rebuild_feed")
+    assert entry_values(FeedEntry) == incremental, (
+        "Убедитесь, что инкрементальная лента совпадает с пересозданной."
+    )
+    assert not FeedEntry.objects.filter(
+        post__in=posts_with_unpublished_category).exists()
+
+
+def test_index_reads_feed_entries(
+        client, django_assert_max_num_queries,
+        many_posts_with_published_locations
+):
+    with django_assert_max_num_queries(2):
+        response = client.get("/")
+    page = response.context["page_obj"]
+    assert len(page) == 10
+    with django_assert_max_num_queries(1):
+        response = client.get("/", {"cursor": page.next_cursor})
+    assert len(response.context["page_obj"]) == 10, (
+        "Убедитесь, что главная читает ленту одним запросом, а число"
+        " публикаций берёт из кеша."
+    )
+
+
+def test_loaddata_fills_feed(tmp_path):
+    from django.core.management import call_command
+
+    from blog.models import FeedEntry
+
+    # Как в db.json: пост идёт в фикстуре раньше своего автора.
+    fixture = tmp_path / "posts.json"
+    fixture.write_text(json.dumps([
+        {"model": "blog.category", "pk": 1, "fields": {
+            "title": "Категория", "description": "Описание",
+            "slug": "fixture-category", "is_published": True,
+            "created_at": "2022-12-18T23:06:18Z"}},
+        {"model": "blog.post", "pk": 1, "fields": {
+            "title": "Обед", "text": "Обед у В. А. Морозовой.",
+            "pub_date": "1897-02-13T00:00:00Z", "author": 1,
+            "category": 1, "location": None, "is_published": True,
+            "created_at": "2022-12-18T23:06:18Z"}},
+        {"model": "auth.user", "pk": 1, "fields": {
+            "username": "fixture_author", "password": "!",
+            "date_joined": "2022-12-18T23:06:18Z"}},
+    ]), encoding="utf-8")
+    call_command("loaddata", str(fixture), verbosity=0)
+    entry = FeedEntry.objects.get(post_id=1)
+    assert entry.author_username == "fixture_author", (
+        "Убедитесь, что после loaddata лента содержит загруженные посты."
+    )
@@ -0,0 +1,94 @@
+from io import BytesIO
+
+import pytest
+from django.core.files.uploadedfile import SimpleUploadedFile
+from PIL import Image
+
+pytestmark = [pytest.mark.django_db]
+
+
+def _photo(width, height, orientation=None):
+    image = Image.new("RGB", (width, height), "red")
+    exif = Image.Exif()
+    exif[0x010F] = "Phone maker"
+    if orientation:
+        exif[0x0112] = orientation
+    buffer = BytesIO()
+    image.save(buffer, "JPEG", exif=exif)
+    return SimpleUploadedFile(
+        "photo.jpg", buffer.getvalue(), content_type="image/jpeg"
+    )
+
+
+def test_renditions_are_oriented_and_stripped(
+        post_with_published_location, django_capture_on_commit_callbacks
+):
+    post = post_with_published_location
+    post.image = _photo(2000, 1000, orientation=6)
+    with django_capture_on_commit_callbacks(execute=True):
+        post.save()
+
+    renditions = post.image_renditions["renditions"]
+    assert [r["width"] for r in renditions] == [320, 640], (
+        "Убедитесь, что для изображения создаются копии фиксированной"
+        " ширины, не превышающей исходную."
+    )
+    assert post.image_renditions["width"] == 1000, (
+        "Убедитесь, что ориентация изображения исправляется по EXIF."
+    )
+    for rendition in renditions:
+        with post.image.storage.open(rendition["name"]) as fh:
+            image = Image.open(fh)
+            assert image.size == (rendition["width"], rendition["height"])
+            assert not image.getexif(), (
+                "Убедитесь, что из копий изображения удаляются метаданные."
+            )
+
+
+def test_card_uses_srcset(
+        user_client, post_with_published_location,
+        django_capture_on_commit_callbacks
+):
+    post = post_with_published_location
+    user_client.get("/")
+    post.image = _photo(1600, 900)
+    with django_capture_on_commit_callbacks(execute=True):
+        post.save()
+    content = user_client.get("/").content.decode("utf-8")
+    assert 'srcset="' in content and 'width="640"' in content, (
+        "Убедитесь, что карточка публикации выводит `srcset` и размеры"
+        " изображения."
+    )
+
+
+def test_renditions_built_after_commit(
+        post_with_published_location, django_capture_on_commit_callbacks
+):
+    from blog.images import RENDITIONS_DIR
+    from blog.models import Post
+
+    post = post_with_published_location
+    storage = post.image.storage
+
+    def rendition_files():
+        if not storage.exists(RENDITIONS_DIR):
+            return set()
+        return set(storage.listdir(RENDITIONS_DIR)[1])
+
+    before = rendition_files()
+    post.image = _photo(1600, 900)
+    with django_capture_on_commit_callbacks() as callbacks:
+        post.save()
+        assert not post.image_renditions, (
+            "Убедитесь, что копии изображения создаются после коммита,"
+            " а не внутри транзакции сохранения."
+        )
+    assert rendition_files() == before, (
+        "Убедитесь, что до коммита файлы копий не создаются."
+    )
+
+    for callback in callbacks:
+        callback()
+    assert Post.objects.get(pk=post.pk).image_renditions["renditions"], (
+        "Убедитесь, что после коммита копии сохраняются в публикации."
+    )
@@ -0,0 +1,115 @@
+import multiprocessing
+import os
+import threading
+
+import pytest
+from django.test import override_settings
+
+
+def test_mmap_dict_persists_and_grows(tmp_path):
+    from blog.metrics import MmapDict
+
+    path = tmp_path / "table.metrics"
+    table = MmapDict(str(path))
+    for number in range(3000):
+        table.add(f"ключ-{number}", number)
+    table.add("ключ-1", 0.5)
+    reopened = dict(MmapDict(str(path)).items())
+    assert len(reopened) == 3000 and reopened["ключ-1"] == 1.5, (
+        "Убедитесь, что таблица метрик сохраняет значения в файле."
+    )
+
+
+def test_read_entries_tolerates_grown_file(tmp_path):
+    from blog.metrics import MmapDict, read_entries
+
+    table = MmapDict(str(tmp_path / "table.metrics"))
+    table.add("первый", 1)
+    table.add("второй", 2)
+    snapshot = bytes(table._map)
+    cut = table._positions["второй"]
+    assert [key for key, _, _ in read_entries(snapshot[:cut])] == [
+        "первый"
+    ], (
+        "Убедитесь, что чтение таблицы пропускает записи за концом"
+        " отображённой части файла."
+    )
+
+
+def test_finished_threads_hand_over_tables():
+    from blog import metrics
+
+    def tables():
+        pool = metrics._pools.get((os.getpid(), None))
+        return len(pool.tables()) if pool else 0
+
+    with override_settings(METRICS_DIR=None):
+        record_requests(1)
+        before = tables()
+        for _ in range(20):
+            thread = threading.Thread(target=record_requests, args=(1,))
+            thread.start()
+            thread.join()
+        assert tables() <= before + 1, (
+            "Убедитесь, что таблица завершившегося потока достаётся новому"
+            " потоку, а не создаётся заново."
+        )
+        assert 'blog_requests_total{view="blog:index",status="200"}' in (
+            metrics.render()
+        )
+
+
+def record_requests(count):
+    from blog import metrics
+
+    for _ in range(count):
+        metrics.REQUESTS.inc(1, "blog:index", "200")
+
+
+def test_metrics_aggregated_across_processes(tmp_path):
+    from blog import metrics
+
+    with override_settings(METRICS_DIR=str(tmp_path)):
+        worker = multiprocessing.get_context("fork").Process(
+            target=record_requests, args=(5,)
+        )
+        worker.start()
+        worker.join()
+        record_requests(2)
+        text = metrics.render()
+    assert 'blog_requests_total{view="blog:index",status="200"} 7' in text, (
+        "Убедитесь, что метрики суммируются по всем процессам."
+    )
+
+
+@pytest.mark.django_db
+def test_metrics_endpoint(
+        client, tmp_path, many_posts_with_published_locations
+):
+    with override_settings(METRICS_DIR=str(tmp_path),
+                           METRICS_TOKEN="metrics-secret"):
+        client.get("/")
+        client.get("/")
+        text = client.get(
+            "/metrics/", HTTP_AUTHORIZATION="Bearer metrics-secret"
+        ).content.decode()
+        hidden = client.get("/metrics/")
+        wrong = client.get("/metrics/", HTTP_AUTHORIZATION="Bearer wrong")
+    assert 'blog_requests_total{view="blog:index",status="200"} 2' in text
+    assert ('blog_request_duration_seconds_count'
+            '{view="blog:index",status="200"} 2') in text, (
+        "Убедитесь, что время ответа собирается в гистограмму по маршруту."
+    )
+    assert ('blog_request_duration_seconds_bucket'
+            '{view="blog:index",status="200",le="+Inf"} 2') in text
+    assert 'blog_cache_hits_total{view="blog:index"}' in text
+    assert 'blog_response_size_bytes_sum{view="blog:index"' in text
+    assert hidden.status_code == wrong.status_code == 404, (
+        "Убедитесь, что метрики доступны только по токену METRICS_TOKEN,"
+        " а не по адресу клиента."
+    )
+    with override_settings(METRICS_TOKEN=None):
+        response = client.get("/metrics/", HTTP_AUTHORIZATION="Bearer ")
+    assert response.status_code == 404, (
+        "Убедитесь, что без токена в настройках метрики закрыты."
+    )
@@ -0,0 +1,53 @@
+import pytest
+from django.test import Client, override_settings
+
+pytestmark = [pytest.mark.django_db]
+
+
+def test_detector_reports_template_line(
+        assert_no_nplusone, many_posts_with_published_locations
+):
+    from django.template import engines
+
+    from blog.models import Post
+
+    template = engines["django"].from_string(
+        "{% for post in posts %}\n{{ post.author.username }}{% endfor %}"
+    )
+    with pytest.raises(AssertionError) as error:
+        with assert_no_nplusone():
+            template.render({"posts": Post.objects.all()[:5]})
+    report = str(error.value)
+    assert "5x SELECT" in report and ":2" in report, (
+        "Убедитесь, что детектор N+1 находит повторяющиеся запросы и"
+        " показывает строку шаблона, которая их вызвала."
+    )
+    with assert_no_nplusone():
+        template.render({
+            "posts": Post.objects.select_related("author")[:5]
+        })
+
+
+@override_settings(NPLUSONE_DETECT=True, NPLUSONE_RAISE=True)
+def test_feed_pages_have_no_nplusone(
+        user, many_posts_with_published_locations, published_category,
+        comment_to_a_post
+):
+    client = Client()
+    client.force_login(user)
+    post = many_posts_with_published_locations[0]
+    for url in ("/", f"/category/{published_category.slug}/",
+                f"/profile/{user.username}/", f"/posts/{post.id}/"):
+        assert client.get(url).status_code == 200, (
+            f"Убедитесь, что на странице {url} нет N+1."
+        )
+
+
+def test_post_delete_cascade_has_no_nplusone(
+        assert_no_nplusone, mixer, user, post_with_published_location
+):
+    mixer.cycle(5).blend(
+        "blog.Comment", post=post_with_published_location, author=user
+    )
+    with assert_no_nplusone():
+        post_with_published_location.delete()
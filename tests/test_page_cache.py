@@ -0,0 +1,131 @@
+import pytest
+from django.db import connection
+from django.test.utils import CaptureQueriesContext
+
+pytestmark = [pytest.mark.django_db]
+
+
+def _get(client, url):
+    with CaptureQueriesContext(connection) as ctx:
+        response = client.get(url)
+    assert response.status_code == 200
+    return response.content.decode("utf-8"), len(ctx.captured_queries)
+
+
+def test_anonymous_pages_are_cached(
+        client, user, post_with_published_location
+):
+    post = post_with_published_location
+    for url in ("/", f"/posts/{post.id}/", f"/profile/{user.username}/",
+                f"/category/{post.category.slug}/"):
+        first, _ = _get(client, url)
+        second, n_queries = _get(client, url)
+        assert second == first and n_queries == 0, (
+            f"Убедитесь, что страница `{url}` для анонимного пользователя"
+            " отдаётся из кеша."
+        )
+
+
+def test_comment_invalidates_post_and_feeds(
+        mixer, client, user, another_category, post_with_published_location
+):
+    post = post_with_published_location
+    other_post = mixer.blend(
+        "blog.Post", author=user, category=another_category
+    )
+    detail_url = f"/posts/{post.id}/"
+    other_url = f"/category/{another_category.slug}/"
+    _get(client, "/")
+    _get(client, detail_url)
+    _get(client, other_url)
+
+    mixer.blend("blog.Comment", post=post, text="Свежий комментарий")
+
+    content, n_queries = _get(client, detail_url)
+    assert n_queries and "Свежий комментарий" in content, (
+        "Убедитесь, что новый комментарий сбрасывает кеш страницы поста."
+    )
+    content, n_queries = _get(client, "/")
+    assert n_queries and "Комментарии (1)" in content, (
+        "Убедитесь, что новый комментарий сбрасывает кеш ленты."
+    )
+    _, n_queries = _get(client, other_url)
+    assert other_post.category_id != post.category_id and n_queries == 0, (
+        "Убедитесь, что комментарий не сбрасывает кеш чужих лент."
+    )
+
+
+def test_category_change_invalidates_only_its_pages(
+        client, user, another_category, post_with_published_location
+):
+    post = post_with_published_location
+    category_url = f"/category/{post.category.slug}/"
+    other_url = f"/category/{another_category.slug}/"
+    for url in (category_url, other_url, f"/profile/{user.username}/"):
+        _get(client, url)
+
+    post.category.description = "Новое описание категории"
+    post.category.save()
+    content, n_queries = _get(client, category_url)
+    assert n_queries and "Новое описание категории" in content, (
+        "Убедитесь, что изменение категории сбрасывает кеш её ленты."
+    )
+    for url in (other_url, f"/profile/{user.username}/"):
+        _, n_queries = _get(client, url)
+        assert n_queries == 0, (
+            f"Убедитесь, что изменение категории не сбрасывает кеш"
+            f" страницы `{url}`."
+        )
+
+
+def test_unpublished_category_hides_cached_post(
+        client, post_with_published_location
+):
+    post = post_with_published_location
+    _get(client, f"/posts/{post.id}/")
+    post.category.is_published = False
+    post.category.save()
+    assert client.get(f"/posts/{post.id}/").status_code == 404, (
+        "Убедитесь, что снятие категории с публикации сбрасывает кеш"
+        " страниц её публикаций."
+    )
+
+
+def test_tags_bumped_again_after_commit(django_capture_on_commit_callbacks):
+    from blog.cache import bump, tag_versions
+
+    [before] = tag_versions(["feed:test"])
+    with django_capture_on_commit_callbacks(execute=True) as callbacks:
+        bump("feed:test")
+        [inside] = tag_versions(["feed:test"])
+    [after] = tag_versions(["feed:test"])
+    assert callbacks and before != inside != after, (
+        "Убедитесь, что версии тегов меняются ещё раз после фиксации"
+        " транзакции."
+    )
+
+
+def test_post_save_reads_tags_from_instance(post_with_published_location):
+    from blog.models import Post
+
+    post = Post.objects.with_relations().get(
+        pk=post_with_published_location.pk
+    )
+    post.title = "Новый заголовок"
+    with CaptureQueriesContext(connection) as ctx:
+        post.save()
+    selects = [query["sql"] for query in ctx.captured_queries
+               if query["sql"].startswith(
+                   'SELECT "blog_category"."slug", "auth_user"."username"')]
+    assert not selects, (
+        "Убедитесь, что теги лент при сохранении публикации берутся"
+        " из экземпляра, а не перечитываются из базы."
+    )
+
+
+def test_session_bypasses_cache(user_client, post_with_published_location):
+    _get(user_client, "/")
+    _, n_queries = _get(user_client, "/")
+    assert n_queries, (
+        "Убедитесь, что пользователи с сессией не получают страницы из кеша."
+    )
@@ -0,0 +1,90 @@
+import re
+
+import pytest
+from django.utils import timezone
+
+from conftest import N_PER_PAGE
+
+pytestmark = [pytest.mark.django_db]
+
+
+def _get_cursor(content: str, label: str):
+    match = re.search(
+        r'href="\?cursor=([\w-]+)">\s*' + re.escape(label), content
+    )
+    return match.group(1) if match else None
+
+
+@pytest.mark.parametrize("url", ["/", "/profile/{username}/"])
+def test_cursor_pagination_walks_feed(
+        user, user_client, many_posts_with_published_locations, url
+):
+    url = url.format(username=user.username)
+    posts = many_posts_with_published_locations
+    if url == "/":
+        posts = [post for post in posts if post.pub_date < timezone.now()]
+    expected = sorted(
+        posts,
+        key=lambda post: (post.pub_date, post.id),
+        reverse=True,
+    )
+
+    first_page = user_client.get(url)
+    first_ids = [post.id for post in first_page.context["page_obj"]]
+    assert first_ids == [post.id for post in expected[:N_PER_PAGE]], (
+        "Убедитесь, что первая страница ленты содержит самые новые публикации."
+    )
+    next_cursor = _get_cursor(first_page.content.decode("utf-8"), ">>")
+    assert next_cursor, (
+        "Убедитесь, что пагинатор выводит ссылку на следующую страницу."
+    )
+
+    second_page = user_client.get(f"{url}?cursor={next_cursor}")
+    second_ids = [post.id for post in second_page.context["page_obj"]]
+    assert second_ids == [
+        post.id for post in expected[N_PER_PAGE:N_PER_PAGE * 2]
+    ], "Убедитесь, что курсор ведёт на следующую страницу ленты."
+
+    prev_cursor = _get_cursor(second_page.content.decode("utf-8"), "<<")
+    assert prev_cursor, (
+        "Убедитесь, что пагинатор выводит ссылку на предыдущую страницу."
+    )
+    back_page = user_client.get(f"{url}?cursor={prev_cursor}")
+    assert [post.id for post in back_page.context["page_obj"]] == first_ids, (
+        "Убедитесь, что курсор предыдущей страницы возвращает к первой."
+    )
+
+
+def test_broken_cursor_falls_back_to_first_page(
+        user_client, many_posts_with_published_locations
+):
+    response = user_client.get("/?cursor=not-a-cursor")
+    assert response.status_code == 200
+    assert len(response.context["page_obj"]) == N_PER_PAGE
+
+
+def test_comments_are_paginated(
+        mixer, user_client, post_with_published_location
+):
+    from blog.views import NUM_COMMENTS_ON_PAGE
+
+    post = post_with_published_location
+    comments = mixer.cycle(NUM_COMMENTS_ON_PAGE + 5).blend(
+        "blog.Comment", post=post
+    )
+    expected = sorted(comments, key=lambda c: (c.created_at, c.id))
+
+    response = user_client.get(f"/posts/{post.id}/")
+    shown = [comment.id for comment in response.context["comments"]]
+    assert shown == [c.id for c in expected[-NUM_COMMENTS_ON_PAGE:]], (
+        "Убедитесь, что на странице поста выводятся только самые новые"
+        " комментарии, «от старых к новым»."
+    )
+
+    cursor = response.context["comments_page"].next_cursor
+    fragment = user_client.get(f"/posts/{post.id}/comments/?cursor={cursor}")
+    assert fragment.status_code == 200
+    assert [comment.id for comment in fragment.context["comments"]] == [
+        c.id for c in expected[:-NUM_COMMENTS_ON_PAGE]
+    ], "Убедитесь, что фрагмент возвращает более ранние комментарии."
+    assert "<html" not in fragment.content.decode("utf-8")
@@ -0,0 +1,47 @@
+import pytest
+
+pytestmark = [pytest.mark.django_db]
+
+
+def _render_card(post):
+    from blog.cache import render_post_cards
+
+    return render_post_cards([post])[0]
+
+
+def test_card_reused_and_versioned(
+        mixer, post_with_published_location, published_category
+):
+    post = post_with_published_location
+    first = _render_card(post)
+
+    post.title = "Несохранённый заголовок"
+    assert _render_card(post) == first, (
+        "Убедитесь, что карточка публикации берётся из кеша."
+    )
+
+    post.save()
+    assert "Несохранённый заголовок" in _render_card(post), (
+        "Убедитесь, что карточка обновляется при сохранении публикации."
+    )
+
+    mixer.blend("blog.Comment", post=post)
+    post.refresh_from_db()
+    assert "Комментарии (1)" in _render_card(post), (
+        "Убедитесь, что карточка обновляется при изменении счётчика"
+        " комментариев."
+    )
+
+    published_category.title = "Новое название категории"
+    published_category.save()
+    post.refresh_from_db()
+    assert "Новое название категории" in _render_card(post), (
+        "Убедитесь, что карточка обновляется при изменении категории."
+    )
+
+    post.author.username = "renamed_author"
+    post.author.save()
+    post.refresh_from_db()
+    assert "@renamed_author" in _render_card(post), (
+        "Убедитесь, что карточка обновляется при изменении автора."
+    )
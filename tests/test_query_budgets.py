@@ -0,0 +1,82 @@
+import pytest
+from django.core.cache import cache
+from django.db import connections
+from django.test.utils import CaptureQueriesContext
+
+from blog.budgets import QUERY_BUDGETS
+
+pytestmark = [pytest.mark.django_db]
+
+# Объёмы данных растут от шага к шагу; число запросов должно стоять.
+VOLUMES = [
+    dict(users=2, categories=2, locations=2, posts=5, comments=10),
+    dict(users=5, categories=4, locations=4, posts=60, comments=400),
+]
+SEARCH_QUERY = "Текст"
+
+
+def _count_queries(client, url):
+    cache.clear()
+    with CaptureQueriesContext(connections["default"]) as ctx:
+        response = client.get(url)
+    assert response.status_code < 400, (
+        f"Убедитесь, что страница `{url}` открывается."
+    )
+    return len(ctx.captured_queries)
+
+
+def _measure(name, comments):
+    from blog import bench
+    from blog.models import Comment, User
+
+    user, kwargs_source = bench.sample_objects()
+    # Комментарии разных авторов к странице публикации, чтобы N+1
+    # по авторам рос вместе с данными.
+    authors = list(User.objects.all())
+    Comment.objects.bulk_create(
+        Comment(post_id=kwargs_source["pk"], text="Комментарий.",
+                author=authors[i % len(authors)])
+        for i in range(comments)
+    )
+    url = dict(bench.routes(kwargs_source))[name]
+    if name == "blog:search":
+        url += f"?q={SEARCH_QUERY}"
+    authenticated = bench.make_client()
+    authenticated.force_login(user)
+    return (_count_queries(bench.make_client(), url),
+            _count_queries(authenticated, url))
+
+
+def test_every_route_has_budget():
+    from blog import bench
+
+    kwargs_source = dict(pk=1, category_slug="slug", username="user",
+                         comment_pk=1)
+    missing = [name for name, _ in bench.routes(kwargs_source)
+               if name not in QUERY_BUDGETS]
+    assert not missing, (
+        f"Задайте бюджет запросов в blog/budgets.py для маршрутов: {missing}."
+    )
+
+
+@pytest.mark.parametrize("name", sorted(QUERY_BUDGETS))
+def test_query_count_within_budget_and_constant(name, settings):
+    from blog.budgets import query_budget
+    from blog.seed import seed
+
+    settings.METRICS_TOKEN = "budget-secret"
+    counts = []
+    for step, volume in enumerate(VOLUMES):
+        seed(random_seed=step, **volume)
+        counts.append(_measure(name, volume["comments"] // 10))
+    budget = query_budget(name)
+    for anonymous, authenticated in counts:
+        assert max(anonymous, authenticated) <= budget, (
+            f"Убедитесь, что маршрут {name} укладывается в бюджет"
+            f" {budget} SQL-запросов: анонимно {anonymous},"
+            f" с авторизацией {authenticated}."
+        )
+    assert len(set(counts)) == 1, (
+        f"Убедитесь, что число SQL-запросов маршрута {name} не растёт"
+        f" с объёмом данных: {counts}."
+    )
@@ -0,0 +1,60 @@
+import pytest
+
+from conftest import sqlite_only
+
+pytestmark = [pytest.mark.django_db, sqlite_only]
+
+HOT_QUERYSETS = ("index_feed", "index_feed_deep", "category_lookup",
+                 "category_feed", "profile_feed", "comment_list",
+                 "scheduler_due", "scheduler_next")
+
+
+@pytest.fixture
+def plans():
+    from blog.explain import plan_snapshot
+    from blog.seed import seed
+
+    seed(users=5, categories=3, locations=3, posts=50, comments=200)
+    return plan_snapshot()
+
+
+def test_hot_querysets_use_indexes(plans):
+    from blog.explain import plan_problems
+
+    assert set(HOT_QUERYSETS) <= plans.keys()
+    for name, plan in plans.items():
+        assert not plan_problems(plan), (
+            f"Убедитесь, что запрос {name} читает таблицы по индексу"
+            f" и не сортирует во временном B-дереве: {plan}."
+        )
+
+
+def test_plan_problems_flags_scans_and_automatic_indexes():
+    from blog.explain import plan_problems
+
+    bad = [
+        "SCAN blog_post",
+        "SCAN blog_location LEFT-JOIN",
+        "SEARCH blog_comment USING AUTOMATIC COVERING INDEX (post_id=?)",
+        "USE TEMP B-TREE FOR ORDER BY",
+    ]
+    good = [
+        "SCAN blog_feedentry USING INDEX feed_pub_date_idx",
+        "SCAN blog_post USING COVERING INDEX post_visible_pub_date_idx",
+        "SEARCH blog_post USING INTEGER PRIMARY KEY (rowid=?)",
+        "SCAN CONSTANT ROW",
+    ]
+    assert plan_problems(bad + good) == bad, (
+        "Убедитесь, что план отмечает полный просмотр таблицы, в том числе"
+        " с LEFT-JOIN, автоматические индексы и сортировку без индекса."
+    )
+
+
+def test_query_plans_match_snapshot(plans, query_plan_snapshot):
+    snapshot = query_plan_snapshot(plans)
+    for name in sorted(plans.keys() | snapshot.keys()):
+        assert plans.get(name) == snapshot.get(name), (
+            f"План запроса {name} изменился: {plans.get(name)} вместо"
+            f" {snapshot.get(name)}. Если изменение ожидаемо, обновите"
+            " снимок: pytest --update-query-plans."
+        )
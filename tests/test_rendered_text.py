@@ -0,0 +1,73 @@
+import json
+
+import pytest
+from django.template.defaultfilters import truncatewords
+
+pytestmark = [pytest.mark.django_db]
+
+TEXT = (
+    "<b>Жирный</b> текст\nвторая строка и ещё много слов для обрезки"
+    " по десяти словам"
+)
+
+
+def test_rendered_text_follows_text(
+        mixer, user, post_with_published_location
+):
+    post = post_with_published_location
+    post.text = TEXT
+    post.save()
+    post.refresh_from_db()
+    assert post.text_html == (
+        "&lt;b&gt;Жирный&lt;/b&gt; текст<br>вторая строка и ещё много"
+        " слов для обрезки по десяти словам"
+    ), "Убедитесь, что HTML текста публикации считается при сохранении."
+    assert post.excerpt == truncatewords(TEXT, 10), "Убедитесь, что начало текста совпадает с фильтром truncatewords:10."
+
+    post.text = "Новый текст"
+    post.save(update_fields=["text"])
+    post.refresh_from_db()
+    assert post.excerpt == "Новый текст", (
+        "Убедитесь, что save(update_fields=['text']) обновляет и"
+        " вычисляемые поля."
+    )
+
+    comment = mixer.blend("blog.Comment", post=post, author=user, text=TEXT)
+    comment.refresh_from_db()
+    assert comment.text_html.startswith("&lt;b&gt;")
+    assert "<br>" in comment.text_html
+
+
+def test_feed_does_not_load_full_text(
+        client, user, post_with_published_location
+):
+    response = client.get(f"/profile/{user.username}/")
+    post = response.context["page_obj"][0]
+    assert {"text", "text_html"} <= post.get_deferred_fields(), (
+        "Убедитесь, что ленты не загружают полный текст публикаций."
+    )
+    assert post_with_published_location.excerpt in response.content.decode()
+
+
+def test_rendered_text_filled_by_loaddata(tmp_path, user, published_category):
+    from django.core.management import call_command
+
+    from blog.models import Comment, Post
+
+    fixture = tmp_path / "posts.json"
+    fixture.write_text(json.dumps([
+        {"model": "blog.post", "pk": 100, "fields": {
+            "title": "Обед", "text": TEXT, "author": user.pk,
+            "pub_date": "1897-02-13T00:00:00Z",
+            "category": published_category.pk, "is_published": True,
+            "created_at": "2022-12-18T23:06:18Z"}},
+        {"model": "blog.comment", "pk": 100, "fields": {
+            "text": TEXT, "post": 100, "author": user.pk,
+            "created_at": "2022-12-18T23:06:18Z"}},
+    ]), encoding="utf-8")
+    call_command("loaddata", str(fixture), verbosity=0)
+    post = Post.objects.get(pk=100)
+    assert post.text_html.startswith("&lt;b&gt;Жирный") and (
+        post.excerpt == truncatewords(TEXT, 10)
+    ), "Убедитесь, что loaddata заполняет HTML и начало текста публикации."
+    assert "<br>" in Comment.objects.get(pk=100).text_html
@@ -0,0 +1,85 @@
+import sqlite3
+
+import pytest
+from django.db import connections
+from django.test.utils import CaptureQueriesContext
+
+
+@pytest.fixture
+def replica(transactional_db):
+    """Реплика, указывающая на ту же тестовую базу, что и основная."""
+    connections.databases["replica"] = dict(
+        connections.databases["default"], TEST={"MIRROR": "default"}
+    )
+    yield connections["replica"]
+    connections["replica"].close()
+    del connections.databases["replica"]
+    delattr(connections._connections, "replica")
+
+
+def count_queries(client, method, url, **kwargs):
+    with CaptureQueriesContext(connections["default"]) as primary, \
+            CaptureQueriesContext(connections["replica"]) as replica:
+        response = getattr(client, method)(url, **kwargs)
+    return response, len(primary), len(replica)
+
+
+def test_read_views_use_replica_until_write(
+        replica, user_client, post_with_published_location
+):
+    post_url = f"/posts/{post_with_published_location.id}/"
+    for url in ("/", post_url):
+        response, primary, replicated = count_queries(user_client, "get", url)
+        assert response.status_code == 200
+        assert replicated and primary <= 1, (
+            "Убедитесь, что страницы только для чтения читают данные с"
+            " реплики, а в основную базу идёт только сессия."
+        )
+
+    response, _, replicated = count_queries(
+        user_client, "post", f"{post_url}comment/", data={"text": "Текст"}
+    )
+    assert not replicated, "Убедитесь, что запись идёт в основную базу."
+    assert "primary_until" in response.cookies
+    response, primary, replicated = count_queries(
+        user_client, "get", post_url
+    )
+    assert not replicated and primary, (
+        "Убедитесь, что после записи клиент какое-то время читает из"
+        " основной базы."
+    )
+
+
+def test_edit_views_stay_on_primary(
+        replica, user_client, post_with_published_location
+):
+    url = f"/posts/{post_with_published_location.id}/edit/"
+    response, primary, replicated = count_queries(user_client, "get", url)
+    assert response.status_code == 200
+    assert primary and not replicated, (
+        "Убедитесь, что страницы редактирования читают из основной базы."
+    )
+
+
+def test_copy_sqlite(tmp_path):
+    from blog.routers import copy_sqlite
+
+    primary_path, replica_path = tmp_path / "db.sqlite3", tmp_path / "r"
+    primary = sqlite3.connect(primary_path)
+    primary.execute("PRAGMA journal_mode = WAL")
+    primary.execute("CREATE TABLE post (title TEXT)")
+    primary.execute("INSERT INTO post VALUES ('первый')")
+    primary.commit()
+    copy_sqlite(primary_path, replica_path)
+    primary.execute("INSERT INTO post VALUES ('второй')")
+    primary.commit()
+
+    replica = sqlite3.connect(replica_path)
+    assert replica.execute("SELECT count(*) FROM post").fetchone() == (1,)
+    assert replica.execute("PRAGMA journal_mode").fetchone() == ("delete",)
+    copy_sqlite(primary_path, replica_path)
+    assert sqlite3.connect(replica_path).execute(
+        "SELECT count(*) FROM post"
+    ).fetchone() == (2,), "Убедитесь, что копия реплики обновляется."
+    replica.close()
+    primary.close()
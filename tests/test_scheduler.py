@@ -0,0 +1,97 @@
+from datetime import timedelta
+
+import pytest
+from django.utils import timezone
+
+pytestmark = [pytest.mark.django_db]
+
+
+def test_future_post_activated_by_scheduler(
+        client, mixer, user, published_category
+):
+    from blog.cache import INDEX_TAG, author_tag, tag_versions
+    from blog.models import FeedEntry
+    from blog.scheduler import activate_due
+
+    now = timezone.now()
+    post = mixer.blend(
+        "blog.Post", author=user, category=published_category,
+        is_published=True, pub_date=now + timedelta(hours=1),
+    )
+    assert not FeedEntry.objects.filter(post=post).exists(), (
+        "Убедитесь, что отложенный пост не попадает в ленту до даты"
+        " публикации."
+    )
+    assert not FeedEntry.objects.visible().query.where, (
+        "Убедитесь, что запрос ленты не сравнивает дату со временем."
+    )
+
+    assert activate_due(now) == 0
+    before = tag_versions([INDEX_TAG, author_tag(user.username)])
+    assert activate_due(now + timedelta(hours=2)) == 1, (
+        "Убедитесь, что планировщик публикует наступившие посты."
+    )
+    assert FeedEntry.objects.filter(post=post).exists()
+    after = tag_versions([INDEX_TAG, author_tag(user.username)])
+    assert all(new != old for new, old in zip(after, before)), (
+        "Убедитесь, что планировщик сбрасывает кеш затронутых лент."
+    )
+    assert activate_due(now + timedelta(hours=3)) == 0
+
+
+def test_scheduler_does_not_miss_older_due_posts(
+        mixer, user, published_category
+):
+    from blog.models import FeedEntry
+    from blog.scheduler import activate_due
+
+    now = timezone.now()
+    activate_due(now - timedelta(hours=1))
+    scheduled = mixer.blend(
+        "blog.Post", author=user, category=published_category,
+        is_published=True, pub_date=now + timedelta(minutes=10),
+    )
+    activate_due(now)
+    mixer.blend(
+        "blog.Post", author=user, category=published_category,
+        is_published=True, pub_date=now - timedelta(minutes=1),
+    )
+    assert activate_due(now + timedelta(minutes=30)) == 1, (
+        "Убедитесь, что планировщик публикует все посты, дата которых"
+        " наступила после прошлого запуска."
+    )
+    assert FeedEntry.objects.filter(post=scheduled).exists()
+
+
+def test_last_tick_stored_in_database():
+    from django.core.cache import cache
+
+    from blog.scheduler import activate_due, last_tick
+
+    now = timezone.now()
+    activate_due(now)
+    cache.clear()
+    assert last_tick() == now, (
+        "Убедитесь, что время прошлого тика хранится в базе и видно"
+        " всем процессам планировщика."
+    )
+    assert activate_due(now + timedelta(minutes=5)) == 0
+    assert last_tick() == now + timedelta(minutes=5)
+
+
+def test_publish_scheduled_command(
+        mixer, user, published_category, future_posts
+):
+    from django.core.management import call_command
+
+    from blog.models import FeedEntry, Post
+
+    Post.objects.filter(pk__in=[post.pk for post in future_posts]).update(
+        category=published_category, is_published=True,
+        pub_date=timezone.now() - timedelta(minutes=1),
+    )
+    call_command("publish_scheduled", "--catch-up", verbosity=0)
+    assert FeedEntry.objects.filter(post__in=future_posts).count() == 3, (
+        "Убедитесь, что команда publish_scheduled публикует"
+        " наступившие посты."
+    )
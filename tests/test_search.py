@@ -0,0 +1,132 @@
+from datetime import timedelta
+
+import pytest
+from django.test import override_settings
+from django.utils import timezone
+
+from conftest import sqlite_only
+
+pytestmark = [pytest.mark.django_db]
+
+
+@pytest.fixture
+def searchable_posts(mixer, user, published_location, published_category):
+    past = timezone.now() - timedelta(days=1)
+
+    def blend(title, text, **kwargs):
+        fields = dict(
+            title=title, text=text, author=user, pub_date=past,
+            location=published_location, category=published_category,
+        )
+        fields.update(kwargs)
+        return mixer.blend("blog.Post", **fields)
+
+    return {
+        "title": blend("Публикации о ёжиках", "Лес и поле."),
+        "text": blend("Заметка", "Сегодня видел ежика в лесу."),
+        "other": blend("Про котов", "Коты спят."),
+        "hidden": blend("Ежик", "Снят с публикации.", is_published=False),
+        "future": blend(
+            "Ежик", "Отложенная.", pub_date=timezone.now() + timedelta(
+                days=1)
+        ),
+    }
+
+
+@sqlite_only
+def test_search_ranks_visible_posts(client, searchable_posts):
+    response = client.get("/search/", {"q": "ёжик"})
+    assert response.status_code == 200
+    posts = list(response.context["page_obj"])
+    assert posts == [searchable_posts["title"], searchable_posts["text"]], (
+        "Убедитесь, что поиск находит формы слова без учёта регистра и ё,"
+        " ставит совпадение в заголовке выше совпадения в тексте"
+        " и не показывает скрытые и отложенные публикации."
+    )
+
+
+@sqlite_only
+def test_search_candidates_skip_hidden_posts(
+        client, user, searchable_posts, mixer
+):
+    mixer.blend("blog.Comment", post=searchable_posts["hidden"],
+                author=user, text="Ежик под кроватью.")
+    with override_settings(SEARCH_CANDIDATES=2):
+        response = client.get("/search/", {"q": "ежик"})
+    assert set(response.context["page_obj"]) == {
+        searchable_posts["title"], searchable_posts["text"]
+    }, (
+        "Убедитесь, что скрытые и отложенные публикации отбрасываются"
+        " до ограничения числа кандидатов поиска."
+    )
+
+
+@sqlite_only
+def test_search_tables_without_prefix_index():
+    from django.db import connection
+
+    with connection.cursor() as cursor:
+        cursor.execute(
+            "SELECT sql FROM sqlite_master"
+            " WHERE name IN ('blog_post_fts', 'blog_comment_fts')"
+        )
+        definitions = [row[0] for row in cursor.fetchall()]
+    assert len(definitions) == 2 and not any(
+        "prefix" in sql for sql in definitions
+    ), (
+        "Убедитесь, что таблицы поиска не строят префиксный индекс:"
+        " префиксных запросов поиск не делает."
+    )
+
+
+@sqlite_only
+def test_search_index_follows_changes(
+        client, user, searchable_posts, mixer
+):
+    other = searchable_posts["other"]
+    mixer.blend("blog.Comment", post=other, author=user,
+                text="Один кот поймал ежа-ежика.")
+    response = client.get("/search/", {"q": "ежики"})
+    assert other in response.context["page_obj"], (
+        "Убедитесь, что поиск учитывает текст комментариев."
+    )
+
+    searchable_posts["text"].text = "Ничего интересного."
+    searchable_posts["text"].save()
+    searchable_posts["title"].delete()
+    response = client.get("/search/", {"q": "ежик"})
+    assert list(response.context["page_obj"]) == [other], (
+        "Убедитесь, что индекс поиска обновляется при изменении"
+        " и удалении публикаций."
+    )
+
+
+def test_search_cursor_pages(
+        client, mixer, user, published_location, published_category
+):
+    mixer.cycle(15).blend(
+        "blog.Post", title="Путешествие", text="Текст", author=user,
+        location=published_location, category=published_category,
+        pub_date=timezone.now() - timedelta(days=1),
+    )
+    first = client.get("/search/", {"q": "путешествия"}).context["page_obj"]
+    assert len(first) == 10 and first.has_next()
+    second = client.get(
+        "/search/", {"q": "путешествия", "cursor": first.next_cursor}
+    ).context["page_obj"]
+    assert len(second) == 5 and not second.has_next(), (
+        "Убедитесь, что результаты поиска разбиты на страницы курсором."
+    )
+    assert not set(first) & set(second)
+    back = client.get(
+        "/search/", {"q": "путешествия", "cursor": second.previous_cursor}
+    ).context["page_obj"]
+    assert list(back) == list(first)
+
+
+def test_search_query_is_escaped(client, searchable_posts):
+    for query in (' "OR" * NEAR(', "  ", "-ежик", "ежик AND"):
+        response = client.get("/search/", {"q": query})
+        assert response.status_code == 200, (
+            "Убедитесь, что синтаксис FTS5 в запросе не ломает поиск."
+        )
@@ -0,0 +1,62 @@
+import json
+import logging
+import re
+
+import pytest
+from django.test import Client, override_settings
+
+pytestmark = [pytest.mark.django_db]
+
+
+TOKEN = "timing-secret"
+
+
+@override_settings(SERVER_TIMING_TOKEN=TOKEN)
+def test_server_timing_header_and_log(
+        caplog, many_posts_with_published_locations
+):
+    client = Client(HTTP_X_SERVER_TIMING_TOKEN=TOKEN)
+    with caplog.at_level(logging.INFO, logger="blog.perf"):
+        first = client.get("/")
+        second = client.get("/")
+    header = first["Server-Timing"]
+    assert re.search(r'total;dur=[\d.]+', header), (
+        "Убедитесь, что ответ содержит заголовок Server-Timing с общим"
+        " временем запроса."
+    )
+    queries = int(re.search(r'db;dur=[\d.]+;desc="(\d+) queries"',
+                            header).group(1))
+    assert queries >= 1 and "tpl;dur=" in header
+    assert 'cache;desc="hit=1 miss=0"' in second["Server-Timing"], (
+        "Убедитесь, что Server-Timing учитывает попадания в кеш страниц."
+    )
+
+    records = [json.loads(record.getMessage()) for record in caplog.records
+               if record.name == "blog.perf"]
+    assert records[0]["view"] == "blog:index"
+    assert records[0]["status"] == 200
+    assert records[0]["sql_count"] == queries, (
+        "Убедитесь, что строка лога blog.perf совпадает с заголовком."
+    )
+
+
+@override_settings(SERVER_TIMING_TOKEN=TOKEN)
+def test_server_timing_hidden_without_token(published_category):
+    for client in (Client(), Client(HTTP_X_SERVER_TIMING_TOKEN="wrong")):
+        assert "Server-Timing" not in client.get("/"), (
+            "Убедитесь, что заголовок Server-Timing получают только"
+            " запросы с токеном SERVER_TIMING_TOKEN, а не по адресу"
+            " клиента."
+        )
+    with override_settings(SERVER_TIMING_TOKEN=None):
+        response = Client(HTTP_X_SERVER_TIMING_TOKEN="").get("/")
+    assert "Server-Timing" not in response, (
+        "Убедитесь, что без токена в настройках заголовок не получает"
+        " никто."
+    )
+
+
+@override_settings(SERVER_TIMING=False, SERVER_TIMING_TOKEN=TOKEN)
+def test_server_timing_disabled(published_category):
+    response = Client(HTTP_X_SERVER_TIMING_TOKEN=TOKEN).get("/")
+    assert "Server-Timing" not in response
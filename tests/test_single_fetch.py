@@ -0,0 +1,42 @@
+import pytest
+from django.db import connection
+from django.test.utils import CaptureQueriesContext
+
+pytestmark = [pytest.mark.django_db]
+
+
+def _count_table_selects(client, url, table):
+    with CaptureQueriesContext(connection) as ctx:
+        response = client.get(url)
+    assert response.status_code == 200
+    return sum(
+        1 for query in ctx.captured_queries
+        if query["sql"].startswith("SELECT")
+        and f'FROM "{table}"' in query["sql"]
+    )
+
+
+@pytest.mark.parametrize("url", [
+    "/posts/{pk}/", "/posts/{pk}/edit/", "/posts/{pk}/delete/",
+])
+def test_post_fetched_once(user_client, post_with_published_location, url):
+    url = url.format(pk=post_with_published_location.pk)
+    assert _count_table_selects(user_client, url, "blog_post") == 1, (
+        f"Убедитесь, что на странице `{url}` публикация загружается"
+        " из базы один раз."
+    )
+
+
+@pytest.mark.parametrize("url", [
+    "/posts/{post}/edit_comment/{pk}/", "/posts/{post}/delete_comment/{pk}/",
+])
+def test_comment_fetched_once(mixer, user, user_client,
+                              post_with_published_location, url):
+    comment = mixer.blend(
+        "blog.Comment", post=post_with_published_location, author=user
+    )
+    url = url.format(post=comment.post_id, pk=comment.pk)
+    assert _count_table_selects(user_client, url, "blog_comment") == 1, (
+        f"Убедитесь, что на странице `{url}` комментарий загружается"
+        " из базы один раз."
+    )
@@ -0,0 +1,65 @@
+import json
+import logging
+
+import pytest
+from django.core.management import call_command
+from django.test import Client, override_settings
+
+
+def test_fingerprint_normalizes_values():
+    from blog.slowlog import fingerprint
+
+    first = fingerprint(
+        "SELECT * FROM blog_post WHERE id IN (1, 2, 3) AND title = 'А'"
+    )
+    second = fingerprint(
+        'SELECT *  FROM blog_post\nWHERE id IN (%s, %s) AND title = %s'
+    )
+    assert first == second == (
+        "SELECT * FROM blog_post WHERE id IN (...) AND title = ?"
+    ), "Убедитесь, что отпечаток запроса не зависит от значений."
+
+
+@pytest.mark.django_db
+@override_settings(SLOW_QUERY_MS=0.000001)
+def test_slow_queries_logged_with_view_and_stack(
+        caplog, post_with_published_location
+):
+    logger = logging.getLogger("blog.slow_sql")
+    handlers, logger.handlers = logger.handlers, [caplog.handler]
+    try:
+        Client().get(f"/posts/{post_with_published_location.id}/")
+    finally:
+        logger.handlers = handlers
+    entries = [json.loads(record.getMessage())
+               for record in caplog.records if record.name == logger.name]
+    assert entries, (
+        "Убедитесь, что запросы дольше SLOW_QUERY_MS попадают в журнал."
+    )
+    assert {entry["view"] for entry in entries} == {"blog:post_detail"}
+    assert any(frame.startswith("blog/views.py:")
+               for entry in entries for frame in entry["stack"]), (
+        "Убедитесь, что в журнал попадает стек вызовов кода проекта."
+    )
+
+
+def test_slow_queries_report(tmp_path, capsys):
+    log = tmp_path / "slow.jsonl"
+    rotated = tmp_path / "slow.jsonl.1"
+
+    def line(shape, duration, view="blog:index"):
+        return json.dumps({
+            "id": shape, "fingerprint": shape, "duration_ms": duration,
+            "view": view, "stack": ["blog/views.py:1 in get"],
+        }) + "\n"
+
+    rotated.write_text(line("a", 100) + line("b", 10))
+    log.write_text(line("b", 10) + line("b", 30) + "не JSON\n")
+    call_command("slow_queries", file=str(log), json=True, sort="count")
+    report = json.loads(capsys.readouterr().out)
+    assert [row["id"] for row in report] == ["b", "a"], (
+        "Убедитесь, что отчёт читает ротированные журналы и сортирует"
+        " запросы по выбранному признаку."
+    )
+    assert (report[0]["count"], report[0]["total_ms"],
+            report[0]["p95_ms"]) == (3, 50, 30)
@@ -0,0 +1,50 @@
+import sqlite3
+
+import pytest
+from django.db import connection
+from django.test import override_settings
+
+from conftest import sqlite_only
+
+pytestmark = [pytest.mark.django_db, sqlite_only]
+
+
+def test_pragmas_applied_to_connection():
+    with connection.cursor() as cursor:
+        cursor.execute("PRAGMA busy_timeout")
+        busy_timeout = cursor.fetchone()[0]
+        cursor.execute("PRAGMA temp_store")
+        temp_store = cursor.fetchone()[0]
+    assert busy_timeout > 0, (
+        "Убедитесь, что соединение SQLite получает busy_timeout из"
+        " настроек."
+    )
+    assert temp_store == 2, (
+        "Убедитесь, что соединение SQLite получает temp_store=memory."
+    )
+
+
+def test_pragmas_from_settings(tmp_path):
+    from blog.sqlite import apply_pragmas, sqlite_pragmas
+
+    from django.conf import settings
+
+    with override_settings(SQLITE_PRAGMAS={**settings.SQLITE_PRAGMAS,
+                                           "busy_timeout": 1234,
+                                           "mmap_size": None}):
+        pragmas = sqlite_pragmas()
+    assert pragmas["busy_timeout"] == 1234
+    assert "mmap_size" not in pragmas, (
+        "Убедитесь, что значение None отключает PRAGMA."
+    )
+
+    db = sqlite3.connect(tmp_path / "db.sqlite3")
+    apply_pragmas(db, pragmas)
+    assert db.execute("PRAGMA journal_mode").fetchone()[0] == "wal", (
+        "Убедитесь, что файл базы переводится в режим WAL."
+    )
+    assert db.execute("PRAGMA synchronous").fetchone()[0] == 1
+    assert db.execute("PRAGMA busy_timeout").fetchone()[0] == 1234
+    with pytest.raises(ValueError):
+        apply_pragmas(db, {"journal_mode": "wal; DROP TABLE x"})
+    db.close()
@@ -0,0 +1,45 @@
+from datetime import datetime, timedelta
+
+import pytest
+import pytz
+from django.test import override_settings
+
+pytestmark = [pytest.mark.django_db]
+
+
+@override_settings(POST_VISIBILITY_BUCKET=30)
+def test_visible_sql_is_stable_within_bucket(PostModel):
+    from blog.models import rounded_now
+
+    now = rounded_now()
+    assert now.second % 30 == 0 and now.microsecond == 0, (
+        "Убедитесь, что «сейчас» округляется до интервала"
+        " `POST_VISIBILITY_BUCKET`."
+    )
+    first = PostModel.objects.visible().query.sql_with_params()
+    second = PostModel.objects.visible().query.sql_with_params()
+    if rounded_now() == now:
+        assert first == second, (
+            "Убедитесь, что в пределах одного интервала запрос ленты"
+            " не меняется."
+        )
+
+
+def test_visible_for_author(
+        user, another_user, PostModel, future_posts,
+        post_with_published_location
+):
+    assert list(PostModel.objects.visible()) == [
+        post_with_published_location
+    ], "Убедитесь, что отложенные публикации не видны читателям."
+    assert PostModel.objects.visible_for(user).count() == (
+        len(future_posts) + 1
+    ), "Убедитесь, что автор видит свои отложенные публикации."
+    assert PostModel.objects.visible_for(another_user).count() == 1
+
+
+def test_visible_with_explicit_now(PostModel, post_with_published_location):
+    past = datetime(1900, 1, 1, tzinfo=pytz.UTC)
+    assert not PostModel.objects.visible(now=past).exists()
+    later = post_with_published_location.pub_date + timedelta(seconds=1)
+    assert PostModel.objects.visible(now=later).exists()
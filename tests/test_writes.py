@@ -0,0 +1,141 @@
+import threading
+import time
+
+import pytest
+from django.db import OperationalError, connection
+from django.test.utils import CaptureQueriesContext
+
+from conftest import sqlite_only
+from django.test import override_settings
+
+pytestmark = [pytest.mark.django_db]
+
+
+def test_busy_database_answers_503(
+        monkeypatch, user_client, post_with_published_location
+):
+    from blog import views
+    from blog.models import Comment
+    from blog.writes import WriteUnavailable
+
+    def busy(function, using="default"):
+        raise WriteUnavailable("База занята.")
+
+    monkeypatch.setattr(views, "run_write", busy)
+    post = post_with_published_location
+    response = user_client.post(
+        f"/posts/{post.pk}/comment/", data={"text": "Текст"}
+    )
+    assert response.status_code == 503, (
+        "Убедитесь, что при занятой базе создание комментария отвечает"
+        " 503, а не 500."
+    )
+    assert response.has_header("Retry-After")
+    assert not Comment.objects.exists()
+
+
+def test_locked_begin_is_retried(monkeypatch):
+    from contextlib import contextmanager
+
+    from blog import writes
+
+    attempts = []
+    original = writes.immediate_atomic
+
+    @contextmanager
+    def flaky(using="default"):
+        attempts.append(using)
+        if len(attempts) < 3:
+            raise OperationalError("database is locked")
+        with original(using):
+            yield
+
+    monkeypatch.setattr(writes, "immediate_atomic", flaky)
+    with override_settings(SQLITE_WRITE_BACKOFF=0):
+        assert writes.run_write(lambda: 42) == 42
+    assert len(attempts) == 3, (
+        "Убедитесь, что запись повторяется, если базу не удалось"
+        " заблокировать."
+    )
+
+    attempts.clear()
+    with override_settings(SQLITE_WRITE_BACKOFF=0, SQLITE_WRITE_RETRIES=2):
+        with pytest.raises(writes.WriteUnavailable):
+            writes.run_write(lambda: 42)
+    assert len(attempts) == 2, "Убедитесь, что число повторов ограничено."
+
+
+@pytest.mark.django_db(transaction=True)
+def test_write_queue_commits_group(user, post_with_published_location):
+    from blog.models import Comment, Post
+    from blog.writes import WriteQueue
+
+    post = post_with_published_location
+    write_queue = WriteQueue()
+
+    def failing():
+        raise ValueError("ошибка одной записи")
+
+    functions = [
+        lambda: Comment.objects.create(post=post, author=user, text="1"),
+        failing,
+        lambda: Comment.objects.create(post=post, author=user, text="2"),
+    ]
+    futures = [write_queue.submit(function) for function in functions]
+    assert futures[0].result(timeout=10).text == "1"
+    with pytest.raises(ValueError):
+        futures[1].result(timeout=10)
+    assert futures[2].result(timeout=10).text == "2"
+    assert Post.objects.get(pk=post.pk).comment_count == 2, (
+        "Убедитесь, что ошибка одной записи в группе не отменяет"
+        " остальные."
+    )
+
+
+@sqlite_only
+@pytest.mark.django_db(transaction=True)
+def test_write_begins_immediate(user, post_with_published_location):
+    from blog.models import Comment
+    from blog.writes import run_write
+
+    with CaptureQueriesContext(connection) as ctx:
+        comment = run_write(lambda: Comment.objects.create(
+            post=post_with_published_location, author=user, text="Текст"))
+    assert ctx.captured_queries[0]["sql"] == "BEGIN IMMEDIATE", (
+        "Убедитесь, что запись в SQLite начинается с BEGIN IMMEDIATE."
+    )
+    assert connection.get_autocommit()
+    assert Comment.objects.filter(pk=comment.pk).exists()
+
+
+@sqlite_only
+@pytest.mark.django_db(transaction=True)
+def test_write_timeout_waits_for_running_write():
+    from blog.writes import WriteUnavailable, run_write
+
+    started, done = threading.Event(), []
+
+    def slow():
+        started.set()
+        time.sleep(0.3)
+        done.append("медленная")
+        return "медленная"
+
+    results = []
+    with override_settings(SQLITE_WRITE_QUEUE=True,
+                           SQLITE_WRITE_TIMEOUT=0.05):
+        writer = threading.Thread(
+            target=lambda: results.append(run_write(slow)))
+        writer.start()
+        started.wait(5)
+        with pytest.raises(WriteUnavailable):
+            run_write(lambda: done.append("в очереди"))
+        writer.join()
+    assert results == ["медленная"], (
+        "Убедитесь, что по таймауту начатая запись не считается"
+        " неудавшейся, а её результат дожидаются."
+    )
+    time.sleep(0.1)
+    assert done == ["медленная"], (
+        "Убедитесь, что по таймауту снимается запись, ждущая в очереди."
+    )